@@ -60,15 +60,16 @@ export const fetchCandidateById = async (
   }
 };
 
-// Generate a pre-signed URL for a file
+// Generate a pre-signed URL for one of a candidate's files
 export const getFileDownloadUrl = async (
+  candidateId: number,
   key: string,
 ): Promise<string | null> => {
   try {
     const response = await api.get<{ url: string }>(
       `/api/files/presigned-url`,
       {
-        params: { key },
+        params: { key, candidate_id: candidateId },
       },
     );
     return response.data.url;
@@ -59,6 +59,7 @@ const NotesField: React.FC<NotesFieldProps> = ({ value, label }) => {
 interface FileFieldProps {
   value: string | null;
   label: string;
+  candidateId: number;
   fileKey: string | null;
   isPhoto?: boolean;
 }
@@ -66,6 +67,7 @@ interface FileFieldProps {
 const FileField: React.FC<FileFieldProps> = ({
   value,
   label,
+  candidateId,
   fileKey,
   isPhoto = false,
 }) => {
@@ -89,7 +91,7 @@ const FileField: React.FC<FileFieldProps> = ({
         processedKey = [...parts, "photos", filename].join("/");
       }
 
-      const downloadUrl = await getFileDownloadUrl(processedKey);
+      const downloadUrl = await getFileDownloadUrl(candidateId, processedKey);
       if (downloadUrl) {
         // Create a temporary anchor element to trigger the download
         const link = document.createElement("a");
@@ -261,6 +263,7 @@ const CandidateProfile = () => {
                 <FileField
                   key={key}
                   value={value as string}
+                  candidateId={Number(id)}
                   fileKey={value as string}
                   isPhoto={key === "upload_photo"}
                   label={formatFieldName(key)}
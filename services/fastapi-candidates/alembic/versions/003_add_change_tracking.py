@@ -0,0 +1,68 @@
+"""Add updated_at change tracking and deleted_at soft-delete marker.
+
+Revision ID: 003
+Revises: 002
+Create Date: 2025-01-03 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "003"
+down_revision: Union[str, None] = "002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "candidates",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+    )
+    op.add_column(
+        "candidates",
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+    )
+
+    # ----------------------------------------------------------------
+    # Keep updated_at current for every write, including bulk imports
+    # that bypass the ORM.  clock_timestamp() (not now()) so rows
+    # written late in a long transaction sort after earlier ones.
+    # ----------------------------------------------------------------
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION candidates_touch_updated_at()
+        RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := clock_timestamp();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER trg_candidates_updated_at "
+        "BEFORE INSERT OR UPDATE ON candidates "
+        "FOR EACH ROW EXECUTE FUNCTION candidates_touch_updated_at()"
+    )
+
+    # B-tree on (updated_at, id) — the change feed's keyset cursor
+    op.create_index("ix_candidates_updated_at_id", "candidates", ["updated_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_candidates_updated_at_id", "candidates")
+    op.execute("DROP TRIGGER IF EXISTS trg_candidates_updated_at ON candidates")
+    op.execute("DROP FUNCTION IF EXISTS candidates_touch_updated_at()")
+    op.drop_column("candidates", "deleted_at")
+    op.drop_column("candidates", "updated_at")
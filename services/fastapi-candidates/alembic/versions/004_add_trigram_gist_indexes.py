@@ -0,0 +1,43 @@
+"""Add GiST trigram indexes for similarity (KNN) lookups.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2025-01-04 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "004"
+down_revision: Union[str, None] = "003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ----------------------------------------------------------------
+    # GiST trigram indexes — serve ORDER BY key <-> :target LIMIT k
+    #
+    # The GIN trigram indexes from 001/002 answer ILIKE but cannot
+    # return rows in distance order; GiST can, so nearest-neighbour
+    # duplicate lookups become index scans that stop after k rows.
+    #
+    # The name index is on the exact expression app.similarity builds
+    # (first_name || ' ' || last_name) so the planner can match it.
+    # ----------------------------------------------------------------
+    op.execute(
+        "CREATE INDEX ix_candidates_full_name_gist ON candidates "
+        "USING gist ((first_name || ' ' || last_name) gist_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX ix_candidates_email_gist "
+        "ON candidates USING gist (email gist_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_candidates_email_gist")
+    op.execute("DROP INDEX IF EXISTS ix_candidates_full_name_gist")
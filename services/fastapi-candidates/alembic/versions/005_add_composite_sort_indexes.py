@@ -0,0 +1,83 @@
+"""Add id-terminated and composite B-tree indexes for multi-key sorts.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2025-01-05 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "005"
+down_revision: Union[str, None] = "004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Single-column sort indexes from 001/002, superseded by (col, id)
+SINGLE_COLUMNS = [
+    "first_name",
+    "last_name",
+    "email",
+    "state",
+    "favourite",
+    "create_time",
+]
+
+
+def upgrade() -> None:
+    # ----------------------------------------------------------------
+    # Every sort now ends with id as a deterministic tiebreaker, so a
+    # plain (col) index would still need an incremental sort per page.
+    # (col, id) serves ORDER BY col, id directly — and still serves the
+    # state/favourite equality filters through its leading column.
+    # ----------------------------------------------------------------
+    for col in SINGLE_COLUMNS:
+        op.create_index(f"ix_candidates_{col}_id", "candidates", [col, "id"])
+        op.drop_index(f"ix_candidates_{col}", "candidates")
+
+    # ----------------------------------------------------------------
+    # Composite indexes for app.sorting.COMPOSITE_SORTS.  Mixed
+    # directions need their own index; the fully reversed order of each
+    # is a backward scan of the same index.
+    # ----------------------------------------------------------------
+    op.create_index(
+        "ix_candidates_state_create_time",
+        "candidates",
+        ["state", "create_time", "id"],
+    )
+    op.create_index(
+        "ix_candidates_state_create_time_desc",
+        "candidates",
+        ["state", sa.text("create_time DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_candidates_favourite_create_time",
+        "candidates",
+        ["favourite", "create_time", "id"],
+    )
+    op.create_index(
+        "ix_candidates_favourite_create_time_desc",
+        "candidates",
+        ["favourite", sa.text("create_time DESC"), sa.text("id DESC")],
+    )
+    op.create_index(
+        "ix_candidates_last_name_first_name",
+        "candidates",
+        ["last_name", "first_name", "id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_candidates_last_name_first_name", "candidates")
+    op.drop_index("ix_candidates_favourite_create_time_desc", "candidates")
+    op.drop_index("ix_candidates_favourite_create_time", "candidates")
+    op.drop_index("ix_candidates_state_create_time_desc", "candidates")
+    op.drop_index("ix_candidates_state_create_time", "candidates")
+    for col in reversed(SINGLE_COLUMNS):
+        op.create_index(f"ix_candidates_{col}", "candidates", [col])
+        op.drop_index(f"ix_candidates_{col}_id", "candidates")
@@ -0,0 +1,207 @@
+"""Range-partition candidates by month of create_time.
+
+Revision ID: 006
+Revises: 005
+Create Date: 2025-01-06 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "006"
+down_revision: Union[str, None] = "005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months of empty partitions created ahead of now; app.partitions keeps
+# this horizon moving (partitions are named candidates_pYYYY_MM there too)
+PREMAKE_MONTHS = 3
+
+COLUMNS = (
+    "id, first_name, last_name, email, phone_number, state, favourite, "
+    "create_time, notes, upload_file, upload_photo, updated_at, deleted_at"
+)
+
+
+def _columns() -> list[sa.Column]:
+    """Columns as of revision 005; create_time becomes NOT NULL."""
+    return [
+        sa.Column(
+            "id",
+            sa.Integer(),
+            nullable=False,
+            server_default=sa.text("nextval('candidates_id_seq')"),
+        ),
+        sa.Column("first_name", sa.String(255), server_default=""),
+        sa.Column("last_name", sa.String(255), server_default=""),
+        sa.Column("email", sa.String(255), server_default=""),
+        sa.Column("phone_number", sa.String(50), server_default=""),
+        sa.Column("state", sa.String(100), server_default=""),
+        sa.Column("favourite", sa.String(255), server_default=""),
+        sa.Column(
+            "create_time",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column("notes", sa.Text(), server_default=""),
+        sa.Column("upload_file", sa.String(500), server_default=""),
+        sa.Column("upload_photo", sa.String(500), server_default=""),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.Column("deleted_at", sa.DateTime(), nullable=True),
+    ]
+
+
+def _create_indexes() -> None:
+    """Every index from 001-005 (on a partitioned table, one per partition)."""
+    for col in ["first_name", "last_name", "email", "state", "favourite"]:
+        op.execute(
+            f"CREATE INDEX ix_candidates_{col}_trgm "
+            f"ON candidates USING gin ({col} gin_trgm_ops)"
+        )
+    op.execute(
+        "CREATE INDEX ix_candidates_full_name_gist ON candidates "
+        "USING gist ((first_name || ' ' || last_name) gist_trgm_ops)"
+    )
+    op.execute(
+        "CREATE INDEX ix_candidates_email_gist "
+        "ON candidates USING gist (email gist_trgm_ops)"
+    )
+    for col in ["first_name", "last_name", "email", "state", "favourite"]:
+        op.create_index(f"ix_candidates_{col}_id", "candidates", [col, "id"])
+    op.create_index("ix_candidates_create_time_id", "candidates", ["create_time", "id"])
+    for col in ["state", "favourite"]:
+        op.create_index(
+            f"ix_candidates_{col}_create_time",
+            "candidates",
+            [col, "create_time", "id"],
+        )
+        op.create_index(
+            f"ix_candidates_{col}_create_time_desc",
+            "candidates",
+            [col, sa.text("create_time DESC"), sa.text("id DESC")],
+        )
+    op.create_index(
+        "ix_candidates_last_name_first_name",
+        "candidates",
+        ["last_name", "first_name", "id"],
+    )
+    op.create_index("ix_candidates_updated_at_id", "candidates", ["updated_at", "id"])
+
+
+def _create_trigger() -> None:
+    # Created after the copy so existing updated_at values survive
+    op.execute(
+        "CREATE TRIGGER trg_candidates_updated_at "
+        "BEFORE INSERT OR UPDATE ON candidates "
+        "FOR EACH ROW EXECUTE FUNCTION candidates_touch_updated_at()"
+    )
+
+
+def _swap_out(old_name: str) -> None:
+    """Rename the current table aside, freeing its names and sequence."""
+    op.execute(f"ALTER TABLE candidates RENAME TO {old_name}")
+    op.execute(f"ALTER INDEX candidates_pkey RENAME TO {old_name}_pkey")
+    op.execute("ALTER SEQUENCE candidates_id_seq OWNED BY NONE")
+
+
+def _copy_from(old_name: str) -> None:
+    op.execute(f"INSERT INTO candidates ({COLUMNS}) SELECT {COLUMNS} FROM {old_name}")
+    op.execute("ALTER SEQUENCE candidates_id_seq OWNED BY candidates.id")
+
+
+def upgrade() -> None:
+    # ----------------------------------------------------------------
+    # Rebuild candidates as a table range-partitioned by month.
+    #
+    # Each month is its own heap with its own (smaller) indexes, so
+    # vacuum and index maintenance touch only the hot partitions, and
+    # queries filtered on create_time skip every partition outside the
+    # range (partition pruning).  Old months can be detached and
+    # archived without a bulk DELETE (app.partitions).
+    #
+    # The primary key must include the partition key, so it becomes
+    # (id, create_time); ids still come from the same sequence and stay
+    # unique.  The copy holds an exclusive lock for its duration — run
+    # this in a maintenance window on large tables.
+    # ----------------------------------------------------------------
+    _swap_out("candidates_unpartitioned")
+    # The backfill must not restamp updated_at (the change feed would
+    # replay every backfilled row); the old table is still unpartitioned,
+    # so one DISABLE covers it
+    op.execute(
+        "ALTER TABLE candidates_unpartitioned DISABLE TRIGGER trg_candidates_updated_at"
+    )
+    op.execute(
+        "UPDATE candidates_unpartitioned SET create_time = updated_at "
+        "WHERE create_time IS NULL"
+    )
+    op.execute(
+        "ALTER TABLE candidates_unpartitioned ENABLE TRIGGER trg_candidates_updated_at"
+    )
+
+    op.create_table(
+        "candidates",
+        *_columns(),
+        sa.PrimaryKeyConstraint("id", "create_time", name="candidates_pkey"),
+        postgresql_partition_by="RANGE (create_time)",
+    )
+    # Rows outside every monthly range (far past/future imports) land here
+    op.execute("CREATE TABLE candidates_default PARTITION OF candidates DEFAULT")
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            m date;
+            horizon date := date_trunc('month', now())::date
+                + interval '{PREMAKE_MONTHS} months';
+        BEGIN
+            SELECT date_trunc('month', min(create_time))::date INTO m
+            FROM candidates_unpartitioned;
+            m := least(coalesce(m, horizon), date_trunc('month', now())::date);
+            WHILE m <= horizon LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF candidates '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    'candidates_p' || to_char(m, 'YYYY_MM'),
+                    m,
+                    (m + interval '1 month')::date
+                );
+                m := (m + interval '1 month')::date;
+            END LOOP;
+        END $$
+        """
+    )
+
+    _copy_from("candidates_unpartitioned")
+    op.execute("DROP TABLE candidates_unpartitioned")
+    # Indexes are built after the copy: one bulk build per partition
+    # instead of per-row maintenance during the insert
+    _create_indexes()
+    _create_trigger()
+    op.execute("ANALYZE candidates")
+
+
+def downgrade() -> None:
+    # Rows in partitions already detached by app.partitions are not restored
+    _swap_out("candidates_partitioned")
+    op.create_table(
+        "candidates",
+        *_columns(),
+        sa.PrimaryKeyConstraint("id", name="candidates_pkey"),
+    )
+    op.alter_column("candidates", "create_time", nullable=True)
+    _copy_from("candidates_partitioned")
+    op.execute("DROP TABLE candidates_partitioned CASCADE")
+    _create_indexes()
+    _create_trigger()
@@ -0,0 +1,43 @@
+"""Add lower(col) text_pattern_ops indexes for short prefix terms.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2025-01-07 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "007"
+down_revision: Union[str, None] = "006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# app.search.SEARCH_COLUMNS
+COLUMNS = ["first_name", "last_name", "email", "state", "favourite"]
+
+
+def upgrade() -> None:
+    # ----------------------------------------------------------------
+    # B-tree prefix indexes — serve 1–2 character typeahead terms
+    #
+    # A term shorter than three characters has no trigrams, so the GIN
+    # indexes cannot narrow it and '%jo%' means a full scan.  When every
+    # term is that short, app.search matches it as a prefix instead:
+    # lower(col) ~>=~ 'jo' AND lower(col) ~<~ 'jp', a range scan on
+    # these indexes.  text_pattern_ops compares byte-wise, so the range
+    # is correct whatever the database collation.
+    # ----------------------------------------------------------------
+    for col in COLUMNS:
+        op.execute(
+            f"CREATE INDEX ix_candidates_{col}_lower_prefix "
+            f"ON candidates (lower({col}) text_pattern_ops)"
+        )
+
+
+def downgrade() -> None:
+    for col in reversed(COLUMNS):
+        op.execute(f"DROP INDEX IF EXISTS ix_candidates_{col}_lower_prefix")
@@ -0,0 +1,113 @@
+"""Add normalized email_lower / phone_digits lookup columns.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2025-01-08 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "008"
+down_revision: Union[str, None] = "007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# app.models.normalize_email / normalize_phone
+EMAIL_LOWER = "lower(btrim(coalesce({row}email, '')))"
+PHONE_DIGITS = "regexp_replace(coalesce({row}phone_number, ''), '[^0-9]', '', 'g')"
+
+
+def _updated_at_trigger(action: str) -> None:
+    # ENABLE/DISABLE TRIGGER on a partitioned table only recurses to the
+    # partitions' cloned triggers from PG 15, so name each one
+    op.execute(
+        f"""
+        DO $$
+        DECLARE rel regclass;
+        BEGIN
+            FOR rel IN
+                SELECT 'candidates'::regclass
+                UNION ALL
+                SELECT inhrelid::regclass FROM pg_inherits
+                WHERE inhparent = 'candidates'::regclass
+            LOOP
+                EXECUTE format(
+                    'ALTER TABLE %s {action} TRIGGER trg_candidates_updated_at',
+                    rel
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+
+
+def upgrade() -> None:
+    # Constant defaults: a catalog-only change, no table rewrite
+    for name, length in (("email_lower", 255), ("phone_digits", 50)):
+        op.add_column(
+            "candidates",
+            sa.Column(name, sa.String(length), nullable=False, server_default=""),
+        )
+
+    # ----------------------------------------------------------------
+    # Keep the lookup keys in step with email / phone_number for writes
+    # that bypass the ORM (the ORM sets them itself).  UPDATE OF limits
+    # the trigger to writes that touch the source columns.
+    # ----------------------------------------------------------------
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION candidates_normalize_lookup_keys()
+        RETURNS trigger AS $$
+        BEGIN
+            NEW.email_lower := {EMAIL_LOWER.format(row="NEW.")};
+            NEW.phone_digits := {PHONE_DIGITS.format(row="NEW.")};
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER trg_candidates_lookup_keys "
+        "BEFORE INSERT OR UPDATE OF email, phone_number ON candidates "
+        "FOR EACH ROW EXECUTE FUNCTION candidates_normalize_lookup_keys()"
+    )
+
+    # Backfill without bumping updated_at: the rows' API-visible fields
+    # do not change, so change-feed consumers need not re-sync them all
+    _updated_at_trigger("DISABLE")
+    op.execute(
+        f"UPDATE candidates SET email_lower = {EMAIL_LOWER.format(row='')}, "
+        f"phone_digits = {PHONE_DIGITS.format(row='')}"
+    )
+    _updated_at_trigger("ENABLE")
+
+    # ----------------------------------------------------------------
+    # B-tree indexes for GET/POST /external/candidates/lookup.  Not
+    # UNIQUE: existing duplicates are what the dedupe report finds, and
+    # a unique index on the partitioned table would have to include
+    # create_time anyway.  Partial on live rows, matching the lookup's
+    # deleted_at IS NULL filter.
+    # ----------------------------------------------------------------
+    for name in ("email_lower", "phone_digits"):
+        op.create_index(
+            f"ix_candidates_{name}",
+            "candidates",
+            [name],
+            postgresql_where=sa.text("deleted_at IS NULL"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_candidates_phone_digits", "candidates")
+    op.drop_index("ix_candidates_email_lower", "candidates")
+    op.execute("DROP TRIGGER IF EXISTS trg_candidates_lookup_keys ON candidates")
+    op.execute("DROP FUNCTION IF EXISTS candidates_normalize_lookup_keys()")
+    op.drop_column("candidates", "phone_digits")
+    op.drop_column("candidates", "email_lower")
@@ -0,0 +1,55 @@
+"""Write create_time / updated_at defaults and trigger stamps in UTC.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2025-01-09 00:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "009"
+down_revision: Union[str, None] = "008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The columns are timestamp without time zone holding naive UTC (what the
+# ORM writes, and what app.changes compares against).  now() and
+# clock_timestamp() cast to them in the session's TimeZone, so on a
+# non-UTC server or session they stored local time.
+TOUCH_FUNCTION = """
+    CREATE OR REPLACE FUNCTION candidates_touch_updated_at()
+    RETURNS trigger AS $$
+    BEGIN
+        NEW.updated_at := {stamp};
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+def _set_stamps(trigger: str, default: str) -> None:
+    op.execute(TOUCH_FUNCTION.format(stamp=trigger))
+    for column in ("create_time", "updated_at"):
+        op.alter_column(
+            "candidates",
+            column,
+            server_default=sa.text(default),
+            existing_nullable=False,
+        )
+
+
+def upgrade() -> None:
+    # Existing values are left as they are: which time zone each one was
+    # written in is not recorded.  On servers that always ran in UTC (the
+    # postgres image default) they are already correct.
+    _set_stamps("timezone('utc', clock_timestamp())", "timezone('utc', now())")
+
+
+def downgrade() -> None:
+    _set_stamps("clock_timestamp()", "now()")
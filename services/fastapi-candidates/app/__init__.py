@@ -1 +1,6 @@
 """FastAPI candidates service application package."""
+
+import time
+
+# Reference point for the import/boot timings reported by app.main
+IMPORT_STARTED = time.perf_counter()
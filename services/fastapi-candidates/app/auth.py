@@ -1,4 +1,6 @@
-"""API key authentication dependency."""
+"""API key authentication dependencies."""
+
+import hmac
 
 from fastapi import HTTPException, Security
 from fastapi.security import APIKeyHeader
@@ -6,6 +8,7 @@ from fastapi.security import APIKeyHeader
 from app.config import settings
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+admin_key_header = APIKeyHeader(name="X-Admin-Key", auto_error=False)
 
 
 async def require_api_key(api_key: str | None = Security(api_key_header)) -> str:
@@ -20,3 +23,19 @@ async def require_api_key(api_key: str | None = Security(api_key_header)) -> str
         raise HTTPException(status_code=403, detail="Invalid API key")
 
     return api_key
+
+
+async def require_admin_key(
+    admin_key: str | None = Security(admin_key_header),
+) -> str:
+    """Validate the X-Admin-Key header against the configured admin key."""
+    if not admin_key:
+        raise HTTPException(status_code=401, detail="Admin key required")
+
+    if not settings.admin_api_key:
+        raise HTTPException(status_code=500, detail="Admin access not configured")
+
+    if not hmac.compare_digest(admin_key, settings.admin_api_key):
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+
+    return admin_key
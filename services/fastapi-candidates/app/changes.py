@@ -0,0 +1,102 @@
+"""Keyset cursor over ``(updated_at, id)`` for the incremental change feed.
+
+Rows are returned in ``(updated_at, id)`` order, so a cursor is simply
+the key of the last row a consumer has seen.  Cursors are opaque
+base64url strings; callers should store and echo them back unchanged.
+
+``updated_at`` is stamped when a row is written, not when its
+transaction commits, so a transaction still open when a consumer reads
+could later commit rows behind that consumer's cursor.  Two bounds hold
+such rows back until they can no longer be overtaken:
+
+- On PostgreSQL, only rows stamped before the start of the oldest open
+  transaction that has written anything (``pg_stat_activity``) are
+  returned.  Every row such a transaction writes is stamped after it
+  started, so nothing can commit behind the horizon however long it
+  runs.  Sessions of other roles are only visible to a role with
+  ``pg_read_all_stats``: writers must use the app's role or the app's
+  role needs that grant.  Prepared (two-phase) transactions are not
+  covered.
+- Rows written within ``changes_safety_lag_seconds`` of now are held
+  back on every database, covering clock skew between the app and the
+  database and the SQLite test setup.
+"""
+
+import base64
+import binascii
+from datetime import UTC, datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    column,
+    func,
+    literal_column,
+    select,
+    table,
+    tuple_,
+)
+
+from app.config import settings
+from app.models import Candidate
+
+CursorKey = tuple[datetime, int]
+
+
+def encode_cursor(key: CursorKey) -> str:
+    """Encode an ``(updated_at, id)`` key as an opaque cursor."""
+    updated_at, candidate_id = key
+    raw = f"{updated_at.isoformat()}|{candidate_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> CursorKey:
+    """Decode a cursor produced by :func:`encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        stamp, _, candidate_id = (
+            base64.urlsafe_b64decode(padded).decode().rpartition("|")
+        )
+        return datetime.fromisoformat(stamp), int(candidate_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+_activity = table(
+    "pg_stat_activity", column("xact_start", DateTime), column("backend_xid")
+)
+
+
+def open_writes_horizon() -> ColumnElement[datetime]:
+    """Start (naive UTC) of the oldest open transaction that has written.
+
+    ``'infinity'`` when no transaction holds a transaction id.
+    """
+    oldest = (
+        select(func.timezone("utc", func.min(_activity.c.xact_start)))
+        .where(_activity.c.backend_xid.is_not(None))
+        .scalar_subquery()
+    )
+    return func.coalesce(oldest, literal_column("'infinity'::timestamp"))
+
+
+def change_filters(
+    after: CursorKey | None, postgres: bool = True
+) -> list[ColumnElement[bool]]:
+    """WHERE clauses selecting rows changed after ``after`` and settled.
+
+    ``postgres`` adds the open-transaction horizon, which reads
+    ``pg_stat_activity``.
+    """
+    filters: list[ColumnElement[bool]] = []
+    if after is not None:
+        filters.append(tuple_(Candidate.updated_at, Candidate.id) > tuple_(*after))
+    if postgres:
+        filters.append(Candidate.updated_at < open_writes_horizon())
+    if settings.changes_safety_lag_seconds > 0:
+        horizon = datetime.now(UTC).replace(tzinfo=None) - timedelta(
+            seconds=settings.changes_safety_lag_seconds
+        )
+        filters.append(Candidate.updated_at <= horizon)
+    return filters
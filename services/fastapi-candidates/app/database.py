@@ -1,14 +1,66 @@
 """Async SQLAlchemy engine and session factory."""
 
+import asyncio
+from collections.abc import Sequence
+
+from sqlalchemy import Executable, make_url
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from app import profiling, query_cache
 from app.config import settings
 
-engine = create_async_engine(settings.database_url, echo=False)
+
+def _pool_options(url: str) -> dict:
+    """Queue-pool sizing; only meaningful for the Postgres driver."""
+    if make_url(url).get_backend_name() != "postgresql":
+        return {}
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+    }
+
+
+engine = create_async_engine(
+    settings.database_url, echo=False, **_pool_options(settings.database_url)
+)
 async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+query_cache.install(engine.sync_engine)
+profiling.install(engine.sync_engine)
 
 
 async def get_db() -> AsyncSession:
     """Yield an async database session for dependency injection."""
     async with async_session() as session:
         yield session
+
+
+async def warmup(
+    session_factory: async_sessionmaker,
+    connections: int,
+    statements: Sequence[Executable],
+) -> int:
+    """Open ``connections`` pool connections and run ``statements`` on each.
+
+    Every session holds its connection until all of them have primed, so
+    the pool really opens ``connections`` distinct connections.  Each one
+    pays connection setup, asyncpg type introspection and statement
+    preparation now instead of on its first request; SQLAlchemy's
+    compiled cache is filled on the first pass.  Returns the number of
+    connections primed.
+    """
+    if connections <= 0:
+        return 0
+    barrier = asyncio.Barrier(connections)
+
+    async def prime() -> None:
+        async with session_factory() as session:
+            try:
+                for stmt in statements:
+                    (await session.execute(stmt)).close()
+                await barrier.wait()
+            except BaseException:
+                await barrier.abort()
+                raise
+
+    await asyncio.gather(*(prime() for _ in range(connections)))
+    return connections
@@ -0,0 +1,314 @@
+"""Read-through cache of serialized single-candidate responses.
+
+``GET /external/candidates/{id}`` and ``GET /api/candidates/{id}`` look
+up the id here before running the primary-key query.  Entries are the
+response bytes themselves (``CandidateOut`` / ``CandidateFull`` JSON),
+so a hit skips the database, ORM hydration and Pydantic validation.
+
+- **Bounded**: an LRU capped at ``ENTITY_CACHE_MAX_BYTES`` of response
+  bytes plus a fixed per-entry overhead.
+- **TTL**: entries expire after ``ENTITY_CACHE_TTL`` seconds; misses
+  (404s) are cached for the shorter ``ENTITY_CACHE_NEGATIVE_TTL``.
+- **Versioned**: each entry records the row's ``updated_at``.  A
+  background poll of the change feed evicts every cached id whose row
+  changed since, so edits and soft deletes show up well before the TTL.
+  Loads that raced an invalidation are not stored.
+- **Stampede protection**: concurrent misses for one key wait on a
+  per-key lock, and only the first runs the query.
+
+``ENTITY_CACHE_TTL=0`` (the default) disables the cache.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models import Candidate
+from app.queries import by_id_stmt
+
+logger = logging.getLogger(__name__)
+
+# Approximate bookkeeping cost of one entry beyond its bytes
+ENTRY_OVERHEAD = 200
+
+# A loader returns the serialized body (None for "not found") and the
+# row version it was built from
+Loader = Callable[[], Awaitable[tuple[bytes | None, datetime | None]]]
+
+
+@dataclass
+class _Entry:
+    body: bytes | None
+    version: datetime | None
+    expires_at: float
+
+    @property
+    def size(self) -> int:
+        return ENTRY_OVERHEAD + (len(self.body) if self.body is not None else 0)
+
+
+@dataclass
+class _KeyLock:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    users: int = 0
+
+
+@dataclass
+class EntityCacheStats:
+    """Counters for the stats endpoint."""
+
+    hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+class EntityCache:
+    """Memory-capped LRU of serialized entities, keyed by ``(id, kind)``."""
+
+    def __init__(
+        self,
+        ttl: float,
+        negative_ttl: float = 5.0,
+        max_bytes: int = 32 * 1024 * 1024,
+    ):
+        """Cache entries for ``ttl`` seconds (0 disables) in ``max_bytes``."""
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_bytes = max_bytes
+        self.stats = EntityCacheStats()
+        self._entries: OrderedDict[tuple[int, Hashable], _Entry] = OrderedDict()
+        self._kinds: dict[int, set[Hashable]] = {}
+        self._locks: dict[tuple[int, Hashable], _KeyLock] = {}
+        self._bytes = 0
+        # Bumped by every invalidation; a load that saw an older epoch
+        # may have read a row version that is already stale
+        self._epoch = 0
+        # Newest updated_at seen on the change feed (None: empty table)
+        self._cursor: datetime | None = None
+        self._polled = False
+        self._task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether lookups are cached at all."""
+        return self.ttl > 0
+
+    def __len__(self) -> int:
+        """Return the number of cached entries (including negative ones)."""
+        return len(self._entries)
+
+    # ── Lookups ──────────────────────────────────────────────────────
+
+    async def get_or_load(
+        self, candidate_id: int, kind: Hashable, loader: Loader
+    ) -> bytes | None:
+        """Return the cached body for ``(candidate_id, kind)``, loading on miss.
+
+        ``None`` means the candidate does not exist (possibly a cached
+        404).  Concurrent misses for the same key share one ``loader``
+        call.
+        """
+        if not self.enabled:
+            return (await loader())[0]
+        key = (candidate_id, kind)
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry.body
+
+        key_lock = self._locks.setdefault(key, _KeyLock())
+        key_lock.users += 1
+        try:
+            async with key_lock.lock:
+                entry = self._lookup(key, count=False)
+                if entry is not None:
+                    self.stats.coalesced += 1
+                    return entry.body
+                self.stats.misses += 1
+                epoch = self._epoch
+                body, version = await loader()
+                if epoch == self._epoch:
+                    self._store(key, body, version)
+                return body
+        finally:
+            key_lock.users -= 1
+            if not key_lock.users:
+                del self._locks[key]
+
+    def _lookup(self, key: tuple[int, Hashable], count=True) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        if count:
+            if entry.body is None:
+                self.stats.negative_hits += 1
+            else:
+                self.stats.hits += 1
+        return entry
+
+    def _store(self, key, body: bytes | None, version: datetime | None) -> None:
+        ttl = self.ttl if body is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+        if key in self._entries:
+            self._remove(key)
+        entry = _Entry(body, version, time.monotonic() + ttl)
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._kinds.setdefault(key[0], set()).add(key[1])
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.stats.evictions += 1
+
+    def _remove(self, key: tuple[int, Hashable]) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        kinds = self._kinds[key[0]]
+        kinds.discard(key[1])
+        if not kinds:
+            del self._kinds[key[0]]
+
+    # ── Invalidation ─────────────────────────────────────────────────
+
+    def invalidate(self, candidate_id: int, version: datetime | None = None) -> None:
+        """Evict ``candidate_id`` unless cached at ``version`` or later.
+
+        Without ``version`` every entry for the id is evicted.  Either
+        way, loads already in flight are not stored.
+        """
+        self._epoch += 1
+        for kind in list(self._kinds.get(candidate_id, ())):
+            entry = self._entries[(candidate_id, kind)]
+            if version is None or entry.version is None or entry.version < version:
+                self._remove((candidate_id, kind))
+                self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._epoch += 1
+        self._entries.clear()
+        self._kinds.clear()
+        self._bytes = 0
+
+    async def poll_changes(self, session: AsyncSession) -> int:
+        """Invalidate ids changed since the last poll; return rows seen.
+
+        The first poll only records where the change feed ends.  Each
+        poll re-reads ``CHANGES_SAFETY_LAG_SECONDS`` before the previous
+        high-water mark, so a transaction that committed late with an
+        earlier ``updated_at`` is still seen; entries already at the
+        row's version survive the re-read.
+        """
+        if not self._polled:
+            stmt = select(func.max(Candidate.updated_at))
+            self._cursor = (await session.execute(stmt)).scalar_one()
+            self._polled = True
+            return 0
+        stmt = select(Candidate.id, Candidate.updated_at)
+        if self._cursor is not None:
+            lag = timedelta(seconds=settings.changes_safety_lag_seconds)
+            stmt = stmt.where(Candidate.updated_at > self._cursor - lag)
+        seen = 0
+        for candidate_id, updated_at in await session.execute(stmt):
+            self.invalidate(candidate_id, updated_at)
+            self._cursor = max(self._cursor or updated_at, updated_at)
+            seen += 1
+        return seen
+
+    async def start(self, session_factory: async_sessionmaker) -> None:
+        """Record the change-feed position and start polling it."""
+        async with session_factory() as session:
+            await self.poll_changes(session)
+        self._task = asyncio.create_task(self._poll_loop(session_factory))
+
+    async def stop(self) -> None:
+        """Cancel the poll loop and drop every entry."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._cursor = None
+        self._polled = False
+        self.clear()
+
+    async def _poll_loop(self, session_factory: async_sessionmaker) -> None:
+        while True:
+            await asyncio.sleep(settings.entity_cache_refresh_seconds)
+            try:
+                async with session_factory() as session:
+                    await self.poll_changes(session)
+            except Exception:
+                logger.exception("entity cache invalidation poll failed")
+
+    def as_dict(self) -> dict:
+        """Counters, size and hit rate, for the stats endpoint."""
+        s = self.stats
+        lookups = s.hits + s.negative_hits + s.misses + s.coalesced
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": s.hits,
+            "negative_hits": s.negative_hits,
+            "misses": s.misses,
+            "coalesced": s.coalesced,
+            "evictions": s.evictions,
+            "invalidations": s.invalidations,
+            "hit_rate": (round((lookups - s.misses) / lookups, 4) if lookups else None),
+        }
+
+
+entity_cache = EntityCache(
+    settings.entity_cache_ttl,
+    settings.entity_cache_negative_ttl,
+    settings.entity_cache_max_bytes,
+)
+
+
+async def candidate_response(
+    db: AsyncSession,
+    candidate_id: int,
+    schema: type[BaseModel],
+    exclude_none: bool = False,
+) -> Response:
+    """The ``schema`` JSON for one live candidate, through the entity cache.
+
+    Raises a 404 for unknown or soft-deleted ids.
+    """
+
+    async def load() -> tuple[bytes | None, datetime | None]:
+        result = await db.execute(by_id_stmt(candidate_id))
+        candidate = result.scalar_one_or_none()
+        if candidate is None:
+            return None, None
+        out = schema.model_validate(candidate)
+        return out.model_dump_json(exclude_none=exclude_none).encode(), (
+            candidate.updated_at
+        )
+
+    body = await entity_cache.get_or_load(candidate_id, schema.__name__, load)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    return Response(body, media_type="application/json")
@@ -0,0 +1,127 @@
+"""Faceted value counts for the current candidate search.
+
+Facet counts are computed in a single grouped query over the same
+filtered set as the page being returned.  On PostgreSQL this uses
+``GROUP BY GROUPING SETS`` so every requested facet is aggregated in one
+scan; other dialects (SQLite in tests) fall back to an equivalent
+``UNION ALL`` of per-column ``GROUP BY`` queries.
+"""
+
+import time
+
+from fastapi import HTTPException
+from sqlalchemy import ColumnElement, func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models import Candidate
+from app.search import NOT_DELETED
+
+# Columns that can be requested via ``?facets=``
+FACET_COLUMNS = {
+    "state": Candidate.state,
+    "favourite": Candidate.favourite,
+}
+
+# Unfiltered facet counts keyed by requested fields -> (expires_at, counts)
+_unfiltered_cache: dict[tuple[str, ...], tuple[float, dict[str, dict[str, int]]]] = {}
+
+
+def parse_facets(raw: str) -> list[str]:
+    """Parse a comma-separated ``facets`` parameter into known field names."""
+    fields: list[str] = []
+    for name in (part.strip() for part in raw.split(",")):
+        if not name:
+            continue
+        if name not in FACET_COLUMNS:
+            allowed = ", ".join(FACET_COLUMNS)
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unknown facet '{name}' (allowed: {allowed})",
+            )
+        if name not in fields:
+            fields.append(name)
+    return fields
+
+
+def clear_facet_cache() -> None:
+    """Drop all cached unfiltered facet counts."""
+    _unfiltered_cache.clear()
+
+
+async def compute_facets(
+    db: AsyncSession,
+    filters: list[ColumnElement[bool]],
+    fields: list[str],
+) -> dict[str, dict[str, int]]:
+    """Return ``{field: {value: count}}`` for the filtered candidate set.
+
+    When there are no filters and ``settings.facet_cache_ttl`` is positive
+    the result is cached, since the unfiltered counts are the same for
+    every default listing.
+    """
+    if not fields:
+        return {}
+
+    key = tuple(fields)
+    cacheable = not filters and settings.facet_cache_ttl > 0
+    if cacheable:
+        cached = _unfiltered_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+    if db.get_bind().dialect.name == "postgresql":
+        counts = await _grouping_sets_counts(db, filters, fields)
+    else:
+        counts = await _union_counts(db, filters, fields)
+
+    if cacheable:
+        _unfiltered_cache[key] = (time.monotonic() + settings.facet_cache_ttl, counts)
+    return counts
+
+
+async def _grouping_sets_counts(
+    db: AsyncSession,
+    filters: list[ColumnElement[bool]],
+    fields: list[str],
+) -> dict[str, dict[str, int]]:
+    """Aggregate all facets in one ``GROUPING SETS`` query (PostgreSQL)."""
+    cols = [FACET_COLUMNS[f] for f in fields]
+    stmt = (
+        select(*cols, *(func.grouping(c) for c in cols), func.count())
+        .select_from(Candidate)
+        .where(NOT_DELETED, *filters)
+        .group_by(func.grouping_sets(*cols))
+    )
+    counts: dict[str, dict[str, int]] = {f: {} for f in fields}
+    n = len(fields)
+    for row in (await db.execute(stmt)).all():
+        values, grouping, count = row[:n], row[n : 2 * n], row[-1]
+        # GROUPING(col) is 0 for the column this row was grouped by
+        idx = grouping.index(0)
+        counts[fields[idx]][values[idx] or ""] = count
+    return counts
+
+
+async def _union_counts(
+    db: AsyncSession,
+    filters: list[ColumnElement[bool]],
+    fields: list[str],
+) -> dict[str, dict[str, int]]:
+    """Aggregate all facets with a ``UNION ALL`` of ``GROUP BY`` queries."""
+    stmt = union_all(
+        *(
+            select(
+                literal(f).label("facet"),
+                FACET_COLUMNS[f].label("value"),
+                func.count().label("n"),
+            )
+            .where(NOT_DELETED, *filters)
+            .group_by(FACET_COLUMNS[f])
+            for f in fields
+        )
+    )
+    counts: dict[str, dict[str, int]] = {f: {} for f in fields}
+    for facet, value, count in (await db.execute(stmt)).all():
+        counts[facet][value or ""] = count
+    return counts
@@ -0,0 +1,503 @@
+"""Index usage, size and bloat report for ``candidates``.
+
+Every index on ``candidates`` is maintained on every insert and update,
+so an index no query path needs is pure write amplification.  This
+module answers which ones those are:
+
+- :func:`index_uses` maps each index the migrations create to the API
+  paths that need it, each with a representative statement built by the
+  same code the routes use (``page_stmt``/``order_by`` per ``SortField``
+  and composite sort, ``build_filters`` per search form, the change feed
+  and similarity queries).
+- :func:`index_report` reads ``pg_stat_user_indexes`` (summed over the
+  partitions' child indexes), ``pg_relation_size`` and a B-tree bloat
+  estimate, and runs each path's ``EXPLAIN`` with sequential scans
+  disabled to see which index the planner would pick for it.
+- Indexes with no scans since the statistics were reset are flagged
+  ``unused``; B-tree indexes whose keys are a leading prefix of another
+  index's are flagged ``redundant``.  Flagged, non-unique indexes that
+  no plan check picks are ``droppable``.  Indexes with no known use
+  (``no_known_use``) have nothing to check a drop against, so they are
+  never droppable by default and have to be named explicitly.
+- :func:`render_drop_migration` writes an Alembic migration dropping
+  chosen indexes.  It embeds the plan checks' SQL and re-runs them before
+  dropping anything, aborting if the planner would still use an index;
+  its downgrade recreates each index, partition indexes included, from
+  its recorded definition.
+
+Postgres only; ``scripts/index_report.py`` and ``GET /admin/indexes``
+are the entry points.
+"""
+
+import json
+import math
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import Select, select, text
+from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.changes import change_filters
+from app.lookup import lookup_stmt
+from app.models import Candidate
+from app.queries import by_id_stmt, count_stmt, page_stmt
+from app.search import SEARCH_COLUMNS, build_filters
+from app.similarity import key_expression
+from app.sorting import COMPOSITE_SORTS, SortField, order_by
+
+TABLE = "candidates"
+
+# Sample search term for the trigram plan checks (any 3+ characters)
+_SAMPLE_TERM = "abcd"
+
+# B-tree layout constants for the bloat estimate
+_PAGE = 8192
+_PAGE_OVERHEAD = 24 + 16  # page header + B-tree special space
+_TUPLE_OVERHEAD = 8 + 4  # index tuple header + line pointer
+_FILLFACTOR = 0.9
+
+
+@dataclass(frozen=True)
+class IndexUse:
+    """One API path that needs an index, with a statement it runs."""
+
+    path: str
+    stmt: Select
+
+
+@dataclass
+class IndexInfo:
+    """Usage, size and verdict for one index."""
+
+    name: str
+    method: str
+    definition: str
+    keys: list[str]
+    is_primary: bool = False
+    is_unique: bool = False
+    predicate: str | None = None
+    bytes: int = 0
+    scans: int = 0
+    tuples_read: int = 0
+    bloat: float | None = None
+    used_by: list[str] = field(default_factory=list)
+    chosen_by: list[str] = field(default_factory=list)
+    flags: list[str] = field(default_factory=list)
+
+    @property
+    def droppable(self) -> bool:
+        """Flagged, not enforcing uniqueness, and no plan check picks it.
+
+        An index with no known use has no plan checks, so the migration's
+        guard could not catch a query still relying on it; such indexes
+        are never droppable by default and must be named explicitly.
+        """
+        return (
+            bool(self.flags)
+            and bool(self.used_by)
+            and not (self.is_primary or self.is_unique)
+            and not self.chosen_by
+        )
+
+
+@dataclass
+class IndexReport:
+    """All indexes on ``candidates`` plus table-level context."""
+
+    indexes: list[IndexInfo]
+    rows: int
+    table_bytes: int
+    stats_reset: datetime | None
+
+    def as_dict(self) -> dict:
+        """JSON-ready form for the admin endpoint and ``--json``."""
+        droppable = [i for i in self.indexes if i.droppable]
+        return {
+            "table": TABLE,
+            "rows": self.rows,
+            "table_bytes": self.table_bytes,
+            "index_bytes": sum(i.bytes for i in self.indexes),
+            "indexes_per_write": len(self.indexes),
+            "stats_reset": self.stats_reset.isoformat() if self.stats_reset else None,
+            "droppable": [i.name for i in droppable],
+            "droppable_bytes": sum(i.bytes for i in droppable),
+            "indexes": [{**vars(i), "droppable": i.droppable} for i in self.indexes],
+        }
+
+
+def _sort_stmt(keys: list[tuple[str, bool]]) -> Select:
+    return page_stmt([], order_by(keys), offset=0, limit=20)
+
+
+def index_uses() -> dict[str, list[IndexUse]]:
+    """The API paths that need each index created by the migrations."""
+    uses: dict[str, list[IndexUse]] = {
+        f"{TABLE}_pkey": [
+            IndexUse("GET /candidates/{id}", by_id_stmt(1)),
+            IndexUse("sort=id", _sort_stmt([("id", False)])),
+        ],
+    }
+    for field_ in SortField:
+        if field_ is not SortField.id:
+            uses[f"ix_{TABLE}_{field_.value}_id"] = [
+                IndexUse(f"sort={field_.value}", _sort_stmt([(field_.value, False)]))
+            ]
+    for combo in sorted(COMPOSITE_SORTS):
+        names = [key.removeprefix("-") for key in combo]
+        suffix = "_desc" if any(key.startswith("-") for key in combo) else ""
+        keys = [(key.removeprefix("-"), key.startswith("-")) for key in combo]
+        uses[f"ix_{TABLE}_{'_'.join(names)}{suffix}"] = [
+            IndexUse(f"sort={','.join(combo)}", _sort_stmt(keys))
+        ]
+    for col in (c.key for c in SEARCH_COLUMNS):
+        uses[f"ix_{TABLE}_{col}_trgm"] = [
+            IndexUse(
+                f"search={col}:term (substring)",
+                count_stmt(build_filters(f"{col}:{_SAMPLE_TERM}")),
+            )
+        ]
+        uses[f"ix_{TABLE}_{col}_lower_prefix"] = [
+            IndexUse(
+                f"search={col}:jo (short prefix)",
+                count_stmt(build_filters(f"{col}:jo")),
+            )
+        ]
+    for by, name in (("name", "full_name"), ("email", "email")):
+        key = key_expression(Candidate, by)
+        knn = select(Candidate.id).order_by(key.op("<->")(_SAMPLE_TERM)).limit(10)
+        uses[f"ix_{TABLE}_{name}_gist"] = [
+            IndexUse(f"GET /candidates/{{id}}/similar?by={by}", knn)
+        ]
+    changes = (
+        select(Candidate)
+        .where(*change_filters((datetime(2000, 1, 1), 0)))
+        .order_by(Candidate.updated_at, Candidate.id)
+        .limit(1001)
+    )
+    uses[f"ix_{TABLE}_updated_at_id"] = [IndexUse("GET /candidates/changes", changes)]
+    uses[f"ix_{TABLE}_email_lower"] = [
+        IndexUse("GET /candidates/lookup?email=", lookup_stmt(["a@example.com"], []))
+    ]
+    uses[f"ix_{TABLE}_phone_digits"] = [
+        IndexUse("GET /candidates/lookup?phone=", lookup_stmt([], ["5550001234"]))
+    ]
+    return uses
+
+
+def compile_sql(stmt: Select) -> str:
+    """``stmt`` as Postgres SQL with its parameters inlined.
+
+    Compiled for asyncpg, whose paramstyle leaves ``%`` unescaped, so the
+    text runs as-is through ``exec_driver_sql``.
+    """
+    return str(
+        stmt.compile(
+            dialect=PGDialect_asyncpg(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+def plan_index_names(plan) -> set[str]:
+    """Every ``Index Name`` in an ``EXPLAIN (FORMAT JSON)`` result."""
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    found: set[str] = set()
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if "Index Name" in node:
+                found.add(node["Index Name"])
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return found
+
+
+def estimate_btree_bloat(size: int, rows: float, key_width: int) -> float | None:
+    """Fraction of a B-tree's size beyond a freshly built copy (rough).
+
+    The ideal size packs ``rows`` tuples of ``key_width`` bytes (plus
+    tuple header and line pointer, 8-byte aligned) into leaf pages at the
+    default 90% fillfactor; inner pages are ignored, so the estimate
+    leans low.
+    """
+    if size <= _PAGE or rows <= 0:
+        return None
+    tuple_size = _TUPLE_OVERHEAD + math.ceil(key_width / 8) * 8
+    per_page = max(int((_PAGE - _PAGE_OVERHEAD) * _FILLFACTOR // tuple_size), 1)
+    ideal = (math.ceil(rows / per_page) + 1) * _PAGE
+    return round(max(0.0, 1 - ideal / size), 4)
+
+
+def flag_redundant(indexes: list[IndexInfo]) -> None:
+    """Flag B-tree indexes whose keys lead another B-tree index's keys."""
+    btrees = [i for i in indexes if i.method == "btree"]
+    for a in btrees:
+        if a.is_primary or a.is_unique:
+            continue
+        for b in btrees:
+            if b is a or b.predicate != a.predicate:
+                continue
+            if b.keys[: len(a.keys)] != a.keys:
+                continue
+            # Of two identical plain indexes, only the later name is redundant
+            if (
+                b.keys == a.keys
+                and b.name > a.name
+                and not (b.is_primary or b.is_unique)
+            ):
+                continue
+            a.flags.append(f"redundant:{b.name}")
+            break
+
+
+# ── Catalog queries ─────────────────────────────────────────────────
+
+_INDEXES = text(
+    """
+    SELECT p.relname AS name, am.amname AS method,
+           i.indisprimary AS is_primary, i.indisunique AS is_unique,
+           pg_get_indexdef(p.oid) AS definition,
+           ARRAY(SELECT pg_get_indexdef(p.oid, k, true)
+                 FROM generate_series(1, i.indnkeyatts) k) AS keys,
+           pg_get_expr(i.indpred, i.indrelid) AS predicate,
+           (SELECT coalesce(sum(pg_relation_size(m.oid)), 0)::bigint
+              FROM (SELECT p.oid UNION ALL
+                    SELECT inhrelid FROM pg_inherits WHERE inhparent = p.oid) m
+           ) AS bytes,
+           (SELECT coalesce(sum(s.idx_scan), 0)::bigint
+              FROM pg_stat_user_indexes s
+             WHERE s.indexrelid = p.oid OR s.indexrelid IN
+                   (SELECT inhrelid FROM pg_inherits WHERE inhparent = p.oid)
+           ) AS scans,
+           (SELECT coalesce(sum(s.idx_tup_read), 0)::bigint
+              FROM pg_stat_user_indexes s
+             WHERE s.indexrelid = p.oid OR s.indexrelid IN
+                   (SELECT inhrelid FROM pg_inherits WHERE inhparent = p.oid)
+           ) AS tuples_read
+      FROM pg_index i
+      JOIN pg_class p ON p.oid = i.indexrelid
+      JOIN pg_am am ON am.oid = p.relam
+     WHERE i.indrelid = to_regclass(:table)
+     ORDER BY p.relname
+    """
+)
+
+# Partition child index -> the parent index it belongs to
+_CHILDREN = text(
+    """
+    SELECT c.relname AS child, p.relname AS parent
+      FROM pg_index i
+      JOIN pg_class p ON p.oid = i.indexrelid
+      JOIN pg_inherits h ON h.inhparent = p.oid
+      JOIN pg_class c ON c.oid = h.inhrelid
+     WHERE i.indrelid = to_regclass(:table)
+    """
+)
+
+_TABLE_SIZE = text(
+    """
+    SELECT coalesce(sum(greatest(c.reltuples, 0)), 0) AS rows,
+           coalesce(sum(pg_table_size(c.oid)), 0)::bigint AS bytes
+      FROM pg_class c
+     WHERE c.oid = to_regclass(:table)
+        OR c.oid IN (SELECT inhrelid FROM pg_inherits
+                     WHERE inhparent = to_regclass(:table))
+    """
+)
+
+_WIDTHS = text(
+    "SELECT attname, max(avg_width) FROM pg_stats "
+    "WHERE schemaname = current_schema() AND tablename = :table GROUP BY attname"
+)
+
+_STATS_RESET = text(
+    "SELECT stats_reset FROM pg_stat_database WHERE datname = current_database()"
+)
+
+
+def _key_width(keys: list[str], widths: dict[str, int]) -> int | None:
+    total = 0
+    for key in keys:
+        # A key is a column or an expression over one (lower(email))
+        matches = [w for col, w in widths.items() if re.search(rf"\b{col}\b", key)]
+        if not matches:
+            return None
+        total += max(matches)
+    return total
+
+
+async def chosen_indexes(db: AsyncSession, stmt: Select) -> set[str]:
+    """Indexes the planner picks for ``stmt`` with sequential scans off.
+
+    Disabling sequential scans asks "can this path use an index, and
+    which" rather than "would it at today's table size".
+    """
+    conn = await db.connection()
+    await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    try:
+        result = await conn.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compile_sql(stmt)}"
+        )
+        return plan_index_names(result.scalar_one())
+    finally:
+        await conn.exec_driver_sql("RESET enable_seqscan")
+
+
+async def index_report(db: AsyncSession, check_plans: bool = True) -> IndexReport:
+    """Collect usage, size, bloat and verdicts for every index on the table."""
+    params = {"table": TABLE}
+    rows, table_bytes = (await db.execute(_TABLE_SIZE, params)).one()
+    widths = dict((await db.execute(_WIDTHS, params)).all())
+    stats_reset = (await db.execute(_STATS_RESET)).scalar_one_or_none()
+    parents = dict((await db.execute(_CHILDREN, params)).all())
+    uses = index_uses()
+
+    indexes = []
+    for row in (await db.execute(_INDEXES, params)).mappings():
+        info = IndexInfo(**row)
+        info.used_by = [use.path for use in uses.get(info.name, [])]
+        if info.method == "btree" and (width := _key_width(info.keys, widths)):
+            info.bloat = estimate_btree_bloat(info.bytes, rows, width)
+        if info.scans == 0 and not info.is_primary:
+            info.flags.append("unused")
+        if not info.used_by:
+            info.flags.append("no_known_use")
+        indexes.append(info)
+    flag_redundant(indexes)
+
+    if check_plans:
+        by_name = {i.name: i for i in indexes}
+        for name_uses in uses.values():
+            for use in name_uses:
+                for chosen in await chosen_indexes(db, use.stmt):
+                    info = by_name.get(parents.get(chosen, chosen))
+                    if info is not None and use.path not in info.chosen_by:
+                        info.chosen_by.append(use.path)
+    return IndexReport(indexes, int(rows), int(table_bytes), stats_reset)
+
+
+# ── Drop migration ──────────────────────────────────────────────────
+
+_MIGRATION = '''"""Drop unused or redundant indexes on candidates.
+
+Generated by scripts/index_report.py from the index usage report.
+
+Revision ID: {revision}
+Revises: {down_revision}
+Create Date: {created}
+
+"""
+
+import json
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "{revision}"
+down_revision: Union[str, None] = "{down_revision}"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Index -> (definition to restore, report verdict)
+INDEXES = {indexes}
+
+# Index -> statements of the API paths that needed it when this was
+# generated; the upgrade refuses to run if the planner still picks it.
+PLAN_CHECKS = {plan_checks}
+
+CHILDREN = (
+    "SELECT c.relname FROM pg_inherits h JOIN pg_class c ON c.oid = h.inhrelid "
+    "WHERE h.inhparent = to_regclass('{{}}')"
+)
+
+
+def _index_names(node) -> set:
+    if isinstance(node, dict):
+        found = {{node["Index Name"]}} if "Index Name" in node else set()
+        for value in node.values():
+            found |= _index_names(value)
+        return found
+    if isinstance(node, list):
+        return set().union(*(_index_names(value) for value in node))
+    return set()
+
+
+def _guard() -> None:
+    conn = op.get_bind()
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    try:
+        for name, statements in PLAN_CHECKS.items():
+            names = {{name}} | set(
+                conn.exec_driver_sql(CHILDREN.format(name)).scalars()
+            )
+            for sql in statements:
+                plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {{sql}}")
+                plan = plan.scalar_one()
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                if _index_names(plan) & names:
+                    raise RuntimeError(
+                        f"{{name}} is still chosen by the planner for: {{sql}}"
+                    )
+    finally:
+        conn.exec_driver_sql("RESET enable_seqscan")
+
+
+def upgrade() -> None:
+    _guard()
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {{name}}")
+
+
+def downgrade() -> None:
+    for definition, _ in INDEXES.values():
+        op.execute(definition)
+'''
+
+
+def restorable_definition(definition: str) -> str:
+    """``definition`` as it must be replayed to recreate the whole index.
+
+    ``pg_get_indexdef`` renders an index on a partitioned table as
+    ``CREATE INDEX ... ON ONLY candidates``, which creates an invalid
+    parent index with no partition indexes attached.  Without ``ONLY``
+    Postgres recreates the partitions' indexes and attaches them.
+    """
+    return re.sub(r"\bON ONLY\b", "ON", definition, count=1)
+
+
+def render_drop_migration(
+    indexes: list[IndexInfo], revision: str, down_revision: str
+) -> str:
+    """Source of an Alembic migration dropping ``indexes``, guarded."""
+    uses = index_uses()
+    dropped = {
+        i.name: (
+            restorable_definition(i.definition),
+            ", ".join(i.flags) or "chosen manually",
+        )
+        for i in indexes
+    }
+    checks = {
+        i.name: [compile_sql(use.stmt) for use in uses.get(i.name, [])] for i in indexes
+    }
+    return _MIGRATION.format(
+        revision=revision,
+        down_revision=down_revision,
+        created=datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f"),
+        indexes=_literal(dropped),
+        plan_checks=_literal(checks),
+    )
+
+
+def _literal(value: dict) -> str:
+    """A dict as Python source, one key per line."""
+    if not value:
+        return "{}"
+    lines = "".join(f"    {k!r}: {v!r},\n" for k, v in value.items())
+    return "{\n" + lines + "}"
@@ -0,0 +1,104 @@
+"""Exact-match lookups on normalized email and phone number.
+
+Integrations asking "does this email or phone already exist?" used
+``search=``: an ``ILIKE`` across five columns plus a count, with no
+normalization.  A lookup instead compares ``email_lower`` /
+``phone_digits`` (maintained from ``email`` / ``phone_number``, see
+:mod:`app.models` and migration 008) for equality, so each value is one
+probe of a partial B-tree index, and every requested value is resolved
+in a single statement.
+
+On PostgreSQL the values are bound as one array per key
+(``email_lower = ANY($1)``), so batches of any size share one
+statement shape and asyncpg prepares it once per connection.
+"""
+
+from collections import defaultdict
+from typing import Literal
+
+from fastapi import HTTPException
+from sqlalchemy import ColumnElement, Select, String, any_, literal, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Candidate, normalize_email, normalize_phone
+from app.schemas import CandidateOut, LookupMatch
+from app.search import NOT_DELETED
+
+# Values per request, across both keys
+MAX_LOOKUP_VALUES = 500
+
+LookupKey = Literal["email", "phone"]
+
+_COLUMNS = {"email": Candidate.email_lower, "phone": Candidate.phone_digits}
+_NORMALIZE = {"email": normalize_email, "phone": normalize_phone}
+
+
+def _equals_any(col, values: list[str], postgres: bool) -> ColumnElement[bool]:
+    if postgres:
+        return col == any_(literal(values, ARRAY(String)))
+    return col.in_(values)
+
+
+def lookup_stmt(emails: list[str], phones: list[str], postgres: bool = True) -> Select:
+    """Live candidates whose normalized email or phone is in the lists.
+
+    The lists must already be normalized and non-empty values only.
+    """
+    clauses = [
+        _equals_any(_COLUMNS[by], values, postgres)
+        for by, values in (("email", emails), ("phone", phones))
+        if values
+    ]
+    return select(Candidate).where(NOT_DELETED, or_(*clauses)).order_by(Candidate.id)
+
+
+async def lookup_candidates(
+    db: AsyncSession, emails: list[str], phones: list[str]
+) -> list[LookupMatch]:
+    """One :class:`LookupMatch` per requested value, in request order.
+
+    Values that normalize to nothing (``"n/a"`` as a phone) match no
+    one rather than every candidate with an empty column.
+
+    Raises:
+        HTTPException: 422 when no values or more than
+            ``MAX_LOOKUP_VALUES`` are given.
+    """
+    requested: list[tuple[LookupKey, str]] = [
+        *(("email", value) for value in emails),
+        *(("phone", value) for value in phones),
+    ]
+    if not requested:
+        raise HTTPException(status_code=422, detail="Give at least one email or phone")
+    if len(requested) > MAX_LOOKUP_VALUES:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {MAX_LOOKUP_VALUES} values per lookup",
+        )
+
+    normalized = [(by, value, _NORMALIZE[by](value)) for by, value in requested]
+    wanted: dict[LookupKey, list[str]] = {"email": [], "phone": []}
+    for by, _, key in normalized:
+        if key and key not in wanted[by]:
+            wanted[by].append(key)
+
+    found: dict[tuple[LookupKey, str], list[Candidate]] = defaultdict(list)
+    if wanted["email"] or wanted["phone"]:
+        postgres = db.get_bind().dialect.name == "postgresql"
+        stmt = lookup_stmt(wanted["email"], wanted["phone"], postgres)
+        for candidate in (await db.execute(stmt)).scalars():
+            found["email", candidate.email_lower].append(candidate)
+            found["phone", candidate.phone_digits].append(candidate)
+
+    return [
+        LookupMatch(
+            by=by,
+            value=value,
+            normalized=key,
+            data=[CandidateOut.model_validate(c) for c in found[by, key]]
+            if key
+            else [],
+        )
+        for by, value, key in normalized
+    ]
@@ -1,37 +1,132 @@
 """FastAPI application entrypoint."""
 
-from fastapi import FastAPI
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
+from app import IMPORT_STARTED
 from app.config import settings
+from app.database import async_session, engine, warmup
+from app.entity_cache import entity_cache
+from app.memory_engine import memory_engine
+from app.page_anchors import page_anchors
+from app.partitions import ensure_future_partitions
+from app.profiling import ProfilingMiddleware
+from app.queries import warmup_statements
 from app.routes import router
+from app.routes_admin import admin_router
 from app.routes_internal import internal_router
 
-app = FastAPI(
-    title="Candidate Management API",
-    description=(
-        "FastAPI service implementing the "
-        "/external/candidates contract with PostgreSQL."
-    ),
-    version="1.0.0",
-)
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=[
-        settings.frontend_url,
-        "http://localhost:3000",
-    ],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-app.include_router(router)
-app.include_router(internal_router)
-
-
-@app.get("/health")
-async def health():
-    """Return basic service health status."""
-    return {"status": "ok", "service": "fastapi-candidates"}
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm the connection pool and caches on startup; dispose on shutdown.
+
+    ``DB_WARMUP_CONNECTIONS`` connections are opened and primed with the
+    default list/count/detail statements so the first requests after a
+    task restart skip connection setup and statement compilation.  A
+    failed warmup is logged, not fatal: the pool connects lazily anyway.
+    Missing ``create_time`` partitions for the next
+    ``PARTITION_PREMAKE_MONTHS`` are created the same way, and so is the
+    ``SEARCH_ENGINE=memory`` snapshot load (searches use SQL).  The page
+    anchor builder starts here, so deep page jumps never build anchors
+    inside a request.
+    """
+    started = time.perf_counter()
+    warmed = 0
+    if settings.db_warmup_connections > 0:
+        try:
+            warmed = await warmup(
+                async_session,
+                min(settings.db_warmup_connections, settings.db_pool_size),
+                warmup_statements(),
+            )
+        except Exception:
+            logger.exception("database warmup failed")
+    if settings.partition_premake_months > 0:
+        try:
+            async with async_session() as session:
+                created = await ensure_future_partitions(
+                    session, settings.partition_premake_months
+                )
+            if created:
+                logger.info("created partitions: %s", ", ".join(created))
+        except Exception:
+            logger.exception("partition maintenance failed")
+    if settings.search_engine == "memory":
+        try:
+            await memory_engine.start(async_session)
+        except Exception:
+            # Unloaded, the engine declines every query and SQL serves them
+            logger.exception("memory engine failed to start; serving from SQL")
+    if entity_cache.enabled:
+        await entity_cache.start(async_session)
+    await page_anchors.start(async_session)
+
+    app.state.startup["boot_seconds"] = round(time.perf_counter() - started, 4)
+    app.state.startup["warmed_connections"] = warmed
+    logger.info("startup timings: %s", app.state.startup)
+    try:
+        yield
+    finally:
+        await page_anchors.stop()
+        await entity_cache.stop()
+        await memory_engine.stop()
+        await engine.dispose()
+
+
+def create_app() -> FastAPI:
+    """Build the FastAPI application.
+
+    ``app.state.startup`` records how long the package took to import
+    (``import_seconds``) and, once the lifespan has run, how long warmup
+    took (``boot_seconds``); both are reported by ``GET /health``.
+    """
+    app = FastAPI(
+        title="Candidate Management API",
+        description=(
+            "FastAPI service implementing the "
+            "/external/candidates contract with PostgreSQL."
+        ),
+        version="1.0.0",
+        lifespan=lifespan,
+    )
+    app.state.startup = {
+        "import_seconds": round(time.perf_counter() - IMPORT_STARTED, 4),
+    }
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[
+            settings.frontend_url,
+            "http://localhost:3000",
+        ],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    # Outermost, so a profile covers the whole middleware stack
+    app.add_middleware(ProfilingMiddleware)
+
+    app.include_router(router)
+    app.include_router(internal_router)
+    app.include_router(admin_router)
+
+    @app.get("/health")
+    async def health(request: Request):
+        """Return basic service health status."""
+        return {
+            "status": "ok",
+            "service": "fastapi-candidates",
+            "startup": request.app.state.startup,
+        }
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,486 @@
+"""Optional in-process columnar engine for candidate search.
+
+When ``SEARCH_ENGINE=memory`` the searchable columns are loaded at
+startup into compact per-column arrays with:
+
+- a trigram inverted index (trigram -> sorted row positions) used to
+  narrow candidate rows for terms of three or more characters, and
+- one presorted permutation per ``SortField`` so an unfiltered page is
+  a slice and a filtered page is a partial walk of the permutation.
+
+``GET /external/candidates`` is then answered without touching
+Postgres.  Semantics mirror the SQL path exactly: case-insensitive
+substring match of every parsed term (:mod:`app.query_parser`) against
+any of ``SEARCH_COLUMNS`` or its scoped column (a prefix match for
+prefix terms), negated terms excluding matches, exact equality for
+``state``/``favourite``, and ``ORDER BY col, id`` with NULLs last for
+ascending order.  Text is ordered by code point, so the engine only
+starts against a database whose default collation does the same
+(``C`` / ``POSIX``); anything else keeps ``/external/candidates`` on
+SQL.  Terms containing LIKE metacharacters (``%``, ``_``
+and backslash) are not handled here and fall back to SQL.
+
+Rows are append-only with tombstones.  A refresh reads the change feed
+(rows whose ``(updated_at, id)`` is past the snapshot's cursor): edited
+rows tombstone their old position and are appended again (inserted into
+each permutation with ``bisect``), soft-deleted rows are tombstoned.  A
+periodic full reload compacts the arrays.
+"""
+
+import asyncio
+import bisect
+import logging
+import sys
+import time
+from array import array
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.changes import CursorKey, change_filters
+from app.config import settings
+from app.models import Candidate
+from app.query_parser import Term, estimated_selectivity
+from app.search import NOT_DELETED, SEARCH_COLUMNS
+from app.sorting import SortField
+
+logger = logging.getLogger(__name__)
+
+# Columns held in memory (everything CandidateOut and the filters need)
+TEXT_FIELDS = (
+    "first_name",
+    "last_name",
+    "email",
+    "phone_number",
+    "state",
+    "favourite",
+)
+SORT_FIELDS = tuple(f.value for f in SortField)
+SEARCH_FIELDS = tuple(col.key for col in SEARCH_COLUMNS)
+
+# Low-cardinality columns whose strings are interned to share storage
+_INTERNED = {"state", "favourite"}
+
+# LIKE metacharacters the engine does not emulate
+_LIKE_SPECIALS = frozenset("%_\\")
+
+_LOAD_COLUMNS = (
+    Candidate.id,
+    *(getattr(Candidate, f) for f in TEXT_FIELDS),
+    Candidate.create_time,
+    Candidate.updated_at,
+    Candidate.deleted_at,
+)
+
+
+# libc locales that compare strings by code point, like Python
+_CODE_POINT_LOCALES = {"C", "POSIX", "C.UTF-8", "C.utf8"}
+
+# Rows past the cursor beyond which a refresh skips the hard-delete check
+MAX_PENDING_CHECK = 10_000
+
+
+async def orders_by_code_point(session: AsyncSession) -> bool:
+    """Whether the database sorts text the way the engine does.
+
+    Postgres sorts by its default collation; under an ICU or a libc
+    language locale (``en_US.utf8``, the postgres image default)
+    ``'ann' < 'Bob'``, while code-point order puts ``'Bob'`` first.
+    The builtin provider (PostgreSQL 17+) compares by code point.
+    SQLite's default ``BINARY`` collation does as well.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return True
+    stmt = text(
+        "SELECT datcollate, to_jsonb(d) ->> 'datlocprovider' "
+        "FROM pg_database d WHERE datname = current_database()"
+    )
+    collate, provider = (await session.execute(stmt)).one()
+    if provider == "b":
+        return True
+    return provider in (None, "c") and collate in _CODE_POINT_LOCALES
+
+
+def trigrams(value: str) -> set[str]:
+    """Return the set of 3-character substrings of ``value``."""
+    return {value[i : i + 3] for i in range(len(value) - 2)}
+
+
+@dataclass
+class MemoryResult:
+    """One page of results answered from memory."""
+
+    total: int
+    rows: list[dict[str, Any]]
+    facets: dict[str, dict[str, int]] = field(default_factory=dict)
+
+
+class _Snapshot:
+    """Append-only columnar store with tombstones for deleted rows."""
+
+    def __init__(self) -> None:
+        self.ids = array("q")
+        self.text: dict[str, list[str | None]] = {f: [] for f in TEXT_FIELDS}
+        self.create_time: list[datetime | None] = []
+        # Lower-cased SEARCH_FIELDS values per row (None stored as "")
+        self.lowered: list[tuple[str, ...]] = []
+        self.alive = bytearray()
+        self.position: dict[int, int] = {}
+        self.grams: dict[str, array] = {}
+        self.perms: dict[str, array] = {}
+        self.dead = 0
+        # Highest (updated_at, id) applied; the change-feed resume point
+        self.cursor: CursorKey | None = None
+        self.unfiltered_facets: dict[str, Counter] = {}
+
+    def __len__(self) -> int:
+        return len(self.ids) - self.dead
+
+    def append(self, row: Any) -> int:
+        """Append one ``_LOAD_COLUMNS`` row and index it; return its position."""
+        pos = len(self.ids)
+        cid = row[0]
+        previous = self.position.get(cid)
+        if previous is not None:
+            self.kill(previous)
+        self.ids.append(cid)
+        for i, name in enumerate(TEXT_FIELDS, start=1):
+            value = row[i]
+            if value is not None and name in _INTERNED:
+                value = sys.intern(value)
+            self.text[name].append(value)
+        self.create_time.append(row[len(TEXT_FIELDS) + 1])
+        lowered = tuple((self.text[f][pos] or "").lower() for f in SEARCH_FIELDS)
+        self.lowered.append(lowered)
+        self.alive.append(1)
+        self.position[cid] = pos
+        self.advance(row)
+        for gram in set().union(*(trigrams(v) for v in lowered)):
+            postings = self.grams.get(gram)
+            if postings is None:
+                postings = self.grams[gram] = array("I")
+            postings.append(pos)
+        self.unfiltered_facets.clear()
+        return pos
+
+    def advance(self, row: Any) -> None:
+        """Move the change cursor past ``row`` if it is newer."""
+        key = (row[-2], row[0])
+        if row[-2] is not None and (self.cursor is None or key > self.cursor):
+            self.cursor = key
+
+    def kill(self, pos: int) -> None:
+        """Tombstone the row at ``pos``; it stays in the arrays until reload."""
+        if self.alive[pos]:
+            self.alive[pos] = 0
+            self.dead += 1
+            self.position.pop(self.ids[pos], None)
+            self.unfiltered_facets.clear()
+
+    def sort_key(self, name: str) -> Callable[[int], tuple]:
+        """Key matching ``ORDER BY col ASC NULLS LAST, id ASC``."""
+        ids = self.ids
+        if name == "id":
+            return lambda p: (False, ids[p], ids[p])
+        values = self.create_time if name == "create_time" else self.text[name]
+        return lambda p: (values[p] is None, values[p], ids[p])
+
+    def build_perms(self) -> None:
+        """Sort every position once per sort field."""
+        positions = range(len(self.ids))
+        for name in SORT_FIELDS:
+            self.perms[name] = array("I", sorted(positions, key=self.sort_key(name)))
+
+    def insert_sorted(self, pos: int) -> None:
+        """Insert a freshly appended position into every permutation."""
+        for name, perm in self.perms.items():
+            bisect.insort(perm, pos, key=self.sort_key(name))
+
+
+class MemoryEngine:
+    """Process-wide in-memory search engine with background refresh."""
+
+    def __init__(self) -> None:
+        """Create an engine with no snapshot loaded."""
+        self._snap: _Snapshot | None = None
+        self._task: asyncio.Task | None = None
+        self.loaded_at: float | None = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether a snapshot is loaded and queries can be served."""
+        return self._snap is not None
+
+    def __len__(self) -> int:
+        """Return the number of live rows in the current snapshot."""
+        return len(self._snap) if self._snap is not None else 0
+
+    # ── Loading / refresh ────────────────────────────────────────────
+
+    async def load(self, session: AsyncSession) -> None:
+        """Build a fresh snapshot from the database and swap it in."""
+        started = time.perf_counter()
+        snap = _Snapshot()
+        stmt = select(*_LOAD_COLUMNS).where(NOT_DELETED).order_by(Candidate.id)
+        for row in await session.execute(stmt):
+            snap.append(row)
+        snap.build_perms()
+        self._snap = snap
+        self.loaded_at = time.time()
+        logger.info(
+            "memory engine loaded %d candidates in %.3fs",
+            len(snap),
+            time.perf_counter() - started,
+        )
+
+    async def refresh(self, session: AsyncSession) -> int:
+        """Apply rows changed since the snapshot's cursor; return rows applied.
+
+        Falls back to a full reload if the live row count no longer
+        matches the database (rows were hard-deleted).  Rows changed past
+        the cursor (held back by the change feed's horizon) are left out
+        of both counts, so steady writes do not force reloads.
+        """
+        snap = self._snap
+        if snap is None:
+            await self.load(session)
+            return len(self)
+        postgres = session.get_bind().dialect.name == "postgresql"
+        stmt = (
+            select(*_LOAD_COLUMNS)
+            .where(*change_filters(snap.cursor, postgres))
+            .order_by(Candidate.updated_at, Candidate.id)
+        )
+        applied = 0
+        for row in await session.execute(stmt):
+            if row.deleted_at is not None:
+                pos = snap.position.get(row.id)
+                if pos is not None:
+                    snap.kill(pos)
+                snap.advance(row)
+            else:
+                snap.insert_sorted(snap.append(row))
+            applied += 1
+        if snap.cursor is not None and await self._lost_rows(session, snap):
+            await self.load(session)
+        return applied
+
+    @staticmethod
+    async def _lost_rows(session: AsyncSession, snap: _Snapshot) -> bool:
+        """Whether live rows up to the cursor differ from the snapshot's."""
+        settled = tuple_(Candidate.updated_at, Candidate.id) <= tuple_(*snap.cursor)
+        pending_stmt = select(Candidate.id).where(~settled).limit(MAX_PENDING_CHECK + 1)
+        pending = (await session.execute(pending_stmt)).scalars().all()
+        if len(pending) > MAX_PENDING_CHECK:
+            # A bulk write in flight; check once it has been applied
+            return False
+        # Snapshot rows whose newer version is still pending
+        expected = len(snap) - sum(cid in snap.position for cid in pending)
+        count_stmt = (
+            select(func.count()).select_from(Candidate).where(NOT_DELETED, settled)
+        )
+        return (await session.execute(count_stmt)).scalar_one() != expected
+
+    async def start(self, session_factory: async_sessionmaker) -> None:
+        """Load the initial snapshot and start the background refresh loop.
+
+        Against a database that does not sort text by code point the
+        engine stays unloaded, and every query is answered by SQL.
+        """
+        async with session_factory() as session:
+            if not await orders_by_code_point(session):
+                logger.error(
+                    "SEARCH_ENGINE=memory needs a C/POSIX database collation "
+                    "to match SQL ordering; serving searches from SQL"
+                )
+                return
+            await self.load(session)
+        self._task = asyncio.create_task(self._refresh_loop(session_factory))
+
+    async def stop(self) -> None:
+        """Cancel the refresh loop and drop the snapshot."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._snap = None
+
+    async def _refresh_loop(self, session_factory: async_sessionmaker) -> None:
+        tick = 0
+        while True:
+            await asyncio.sleep(settings.memory_engine_refresh_seconds)
+            tick += 1
+            try:
+                async with session_factory() as session:
+                    if tick % settings.memory_engine_full_reload_every == 0:
+                        await self.load(session)
+                    else:
+                        await self.refresh(session)
+            except Exception:
+                logger.exception("memory engine refresh failed")
+
+    # ── Querying ─────────────────────────────────────────────────────
+
+    def supports(self, terms: Iterable[Term]) -> bool:
+        """Whether the engine can answer a query with these search terms."""
+        return self.ready and not any(
+            _LIKE_SPECIALS.intersection(t.text) for t in terms
+        )
+
+    def query(
+        self,
+        terms: list[Term],
+        sort: str,
+        descending: bool,
+        offset: int,
+        limit: int,
+        state: str | None = None,
+        favourite: str | None = None,
+        facet_fields: Iterable[str] = (),
+    ) -> MemoryResult:
+        """Answer a list query (search + filters + sort + page) from memory."""
+        snap = self._snap
+        if snap is None:
+            raise RuntimeError("memory engine is not loaded")
+
+        matched = self._match(snap, terms, state, favourite)
+        total = len(snap) if matched is None else len(matched)
+        page = self._page(snap, matched, sort, descending, offset, limit)
+        text = snap.text
+        rows = [
+            {
+                "id": snap.ids[p],
+                **{name: text[name][p] for name in TEXT_FIELDS},
+                "create_time": snap.create_time[p],
+            }
+            for p in page
+        ]
+        facets = {f: dict(self._facet(snap, matched, f)) for f in facet_fields}
+        return MemoryResult(total=total, rows=rows, facets=facets)
+
+    @staticmethod
+    def _match(
+        snap: _Snapshot,
+        terms: list[Term],
+        state: str | None,
+        favourite: str | None,
+    ) -> list[int] | None:
+        """Return matching positions, or None when nothing filters."""
+        if not terms and state is None and favourite is None:
+            return None
+
+        # The most selective positive term long enough to have trigrams
+        # drives the index probe
+        probe = min(
+            (t for t in terms if not t.negated and len(t.text) >= 3),
+            key=estimated_selectivity,
+            default=None,
+        )
+        candidates: Iterable[int]
+        if probe is not None:
+            postings = [snap.grams.get(g) for g in trigrams(probe.text)]
+            if not all(postings):
+                return []
+            candidates = min(postings, key=len)
+        else:
+            candidates = range(len(snap.ids))
+
+        # (needle, lowered-tuple index or None for any field, prefix, negated)
+        checks = [
+            (
+                t.text,
+                None if t.field is None else SEARCH_FIELDS.index(t.field),
+                t.prefix,
+                t.negated,
+            )
+            for t in terms
+        ]
+        alive, lowered = snap.alive, snap.lowered
+        states, favourites = snap.text["state"], snap.text["favourite"]
+        matched = []
+        for p in candidates:
+            if not alive[p]:
+                continue
+            if state is not None and states[p] != state:
+                continue
+            if favourite is not None and favourites[p] != favourite:
+                continue
+            values = lowered[p]
+            for needle, index, prefix, negated in checks:
+                scope = values if index is None else (values[index],)
+                if prefix:
+                    found = any(v.startswith(needle) for v in scope)
+                else:
+                    found = any(needle in v for v in scope)
+                if found == negated:
+                    break
+            else:
+                matched.append(p)
+        return matched
+
+    @staticmethod
+    def _page(
+        snap: _Snapshot,
+        matched: list[int] | None,
+        sort: str,
+        descending: bool,
+        offset: int,
+        limit: int,
+    ) -> list[int]:
+        """Select the positions of one page in sort order."""
+        perm = snap.perms[sort]
+        if matched is None and not snap.dead:
+            if not descending:
+                return list(perm[offset : offset + limit])
+            end = len(perm) - offset
+            return list(reversed(perm[max(0, end - limit) : max(0, end)]))
+
+        if matched is not None and len(matched) * 8 < len(perm):
+            # Small result set: sorting it beats walking the permutation
+            ordered = sorted(matched, key=snap.sort_key(sort), reverse=descending)
+            return ordered[offset : offset + limit]
+
+        keep = snap.alive if matched is None else _membership(matched, len(perm))
+        walk: Iterator[int] = reversed(perm) if descending else iter(perm)
+        page: list[int] = []
+        skipped = 0
+        for p in walk:
+            if not keep[p]:
+                continue
+            if skipped < offset:
+                skipped += 1
+                continue
+            page.append(p)
+            if len(page) == limit:
+                break
+        return page
+
+    @staticmethod
+    def _facet(snap: _Snapshot, matched: list[int] | None, name: str) -> Counter:
+        values = snap.text[name]
+        if matched is not None:
+            return Counter(values[p] or "" for p in matched)
+        cached = snap.unfiltered_facets.get(name)
+        if cached is None:
+            alive = snap.alive
+            cached = Counter(v or "" for p, v in enumerate(values) if alive[p])
+            snap.unfiltered_facets[name] = cached
+        return cached
+
+
+def _membership(positions: list[int], size: int) -> bytearray:
+    flags = bytearray(size)
+    for p in positions:
+        flags[p] = 1
+    return flags
+
+
+memory_engine = MemoryEngine()
@@ -1,9 +1,37 @@
 """SQLAlchemy ORM models for the candidates table."""
 
+import re
 from datetime import UTC, datetime
 
-from sqlalchemy import DateTime, Index, String, Text
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy import DateTime, Index, String, Text, desc, text
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, validates
+
+_NON_DIGITS = re.compile(r"[^0-9]")
+
+
+def utcnow() -> datetime:
+    """Current UTC time as a naive value, like the ``DateTime`` columns hold.
+
+    asyncpg rejects aware values for ``timestamp without time zone``.
+    """
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def normalize_email(value: str | None) -> str:
+    """Lookup form of an email: trimmed and lower-cased.
+
+    Mirrors ``lower(btrim(email))`` in the migration 008 trigger.
+    """
+    return (value or "").strip(" ").lower()
+
+
+def normalize_phone(value: str | None) -> str:
+    """Lookup form of a phone number: its ASCII digits only.
+
+    Mirrors ``regexp_replace(phone_number, '[^0-9]', '', 'g')`` in the
+    migration 008 trigger.
+    """
+    return _NON_DIGITS.sub("", value or "")
 
 
 class Base(DeclarativeBase):
@@ -15,6 +43,10 @@ class Candidate(Base):
 
     __tablename__ = "candidates"
 
+    # On PostgreSQL the table is range-partitioned by month of create_time
+    # (migration 006, app.partitions) and its primary key is
+    # (id, create_time).  ids still come from one sequence and are unique,
+    # so the ORM keeps id as the identity.
     id: Mapped[int] = mapped_column(primary_key=True)
     first_name: Mapped[str] = mapped_column(String(255), default="")
     last_name: Mapped[str] = mapped_column(String(255), default="")
@@ -22,13 +54,35 @@ class Candidate(Base):
     phone_number: Mapped[str] = mapped_column(String(50), default="")
     state: Mapped[str] = mapped_column(String(100), default="")
     favourite: Mapped[str] = mapped_column(String(255), default="")
-    create_time: Mapped[datetime] = mapped_column(
-        DateTime, default=lambda: datetime.now(UTC)
-    )
+    create_time: Mapped[datetime] = mapped_column(DateTime, default=utcnow)
     notes: Mapped[str] = mapped_column(Text, default="")
     upload_file: Mapped[str] = mapped_column(String(500), default="")
     upload_photo: Mapped[str] = mapped_column(String(500), default="")
 
+    # Change tracking for the delta feed.  A database trigger also sets
+    # updated_at on every write so imports that bypass the ORM are seen.
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=utcnow,
+        onupdate=utcnow,
+    )
+    # Soft-delete marker: rows stay visible to the change feed as deletions
+    deleted_at: Mapped[datetime | None] = mapped_column(DateTime, default=None)
+
+    # Normalized exact-lookup keys, set whenever email / phone_number are.
+    # A database trigger (migration 008) keeps them in step with writes
+    # that bypass the ORM.
+    email_lower: Mapped[str] = mapped_column(String(255), default="")
+    phone_digits: Mapped[str] = mapped_column(String(50), default="")
+
+    @validates("email", "phone_number")
+    def _normalize_lookup_keys(self, key: str, value: str | None) -> str | None:
+        if key == "email":
+            self.email_lower = normalize_email(value)
+        else:
+            self.phone_digits = normalize_phone(value)
+        return value
+
     # ------------------------------------------------------------------
     # Query optimization: indexes for search + sort + pagination
     #
@@ -36,16 +90,50 @@ class Candidate(Base):
     #    searches without full table scans.  These are created in the
     #    Alembic migration via raw SQL (pg_trgm extension) because
     #    SQLAlchemy doesn't natively support GIN/trigram indexes.
+    #    Short (1–2 character) prefix terms use lower(col)
+    #    text_pattern_ops B-tree indexes, also created in raw SQL
+    #    (migration 007).
     #
     # 2. B-tree indexes on sortable columns let ORDER BY … LIMIT/OFFSET
     #    use an index scan instead of sorting the whole table in memory.
+    #    Every sort ends with id as a tiebreaker (app.sorting), so each
+    #    index ends in id too; a backward scan serves the reverse order.
     # ------------------------------------------------------------------
     __table_args__ = (
-        # B-tree indexes for ORDER BY / pagination on common sort columns
-        Index("ix_candidates_first_name", "first_name"),
-        Index("ix_candidates_last_name", "last_name"),
-        Index("ix_candidates_email", "email"),
-        Index("ix_candidates_state", "state"),
-        Index("ix_candidates_favourite", "favourite"),
-        Index("ix_candidates_create_time", "create_time"),
+        # B-tree indexes for ORDER BY / pagination on single sort columns
+        Index("ix_candidates_first_name_id", "first_name", "id"),
+        Index("ix_candidates_last_name_id", "last_name", "id"),
+        Index("ix_candidates_email_id", "email", "id"),
+        Index("ix_candidates_state_id", "state", "id"),
+        Index("ix_candidates_favourite_id", "favourite", "id"),
+        Index("ix_candidates_create_time_id", "create_time", "id"),
+        # Composite indexes for the COMPOSITE_SORTS allowlist
+        Index("ix_candidates_state_create_time", "state", "create_time", "id"),
+        Index(
+            "ix_candidates_state_create_time_desc",
+            "state",
+            desc("create_time"),
+            desc("id"),
+        ),
+        Index("ix_candidates_favourite_create_time", "favourite", "create_time", "id"),
+        Index(
+            "ix_candidates_favourite_create_time_desc",
+            "favourite",
+            desc("create_time"),
+            desc("id"),
+        ),
+        Index("ix_candidates_last_name_first_name", "last_name", "first_name", "id"),
+        # Keyset cursor for GET /external/candidates/changes
+        Index("ix_candidates_updated_at_id", "updated_at", "id"),
+        # Exact lookups for GET /external/candidates/lookup (live rows only)
+        Index(
+            "ix_candidates_email_lower",
+            "email_lower",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index(
+            "ix_candidates_phone_digits",
+            "phone_digits",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
     )
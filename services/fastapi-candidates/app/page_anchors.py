@@ -0,0 +1,478 @@
+"""Sparse page anchors: deep page jumps on the unfiltered listing without OFFSET.
+
+``?page=N`` is served with ``OFFSET (N-1)*limit``, which makes Postgres
+walk and discard every row before the page: page 5000 of the default
+``create_time`` listing reads 500k index entries.  For the *unfiltered*
+listing on a single sort key, this module keeps a per-process sparse
+rank index instead:
+
+- **Anchors** are the ``(key, id)`` of every ``PAGE_ANCHOR_SPACING``-th
+  live row in ascending ``(key, id)`` order.  They split the table into
+  segments with a known row count, so the ascending rank where each
+  segment starts is a prefix sum.
+- **Seek**: a page's first row has a known rank (descending pages are
+  the mirror image of an ascending range).  The query seeks to the
+  anchor of the segment holding that rank, ``(key, id) >= anchor``, and
+  skips at most one segment: an index range scan of ``spacing + limit``
+  rows wherever the page is.
+- **Incremental refresh**: rows changed since the last sync are read
+  from the change feed and placed among the anchors by the database
+  itself (``ORDER BY key, id`` over the changed rows and the anchor
+  rows), so placement follows the database collation.  Only the
+  segments they fall in are recounted, and segments that grew past
+  twice the spacing are split.  This runs inside the request and is
+  bounded by ``MAX_INCREMENTAL_CHANGES`` and the segment size.
+- **Background builds**: building a key's anchors ranks every live row
+  in one scan, so it never runs in a request.  The first deep jump for
+  a sort key, a moved or deleted anchor row, a large burst of changes,
+  and every ``REBUILD_AFTER_SYNCS``-th sync queue a build for the task
+  :meth:`PageAnchors.start` runs (from the app lifespan).  Requests
+  meanwhile fall back to OFFSET, or keep using the current anchors
+  while they are still exact.
+- **Staleness check**: the anchors' row count must equal the page's
+  ``total``.  Inserts and deletes change the total and force a sync.
+  A row that moved out of a segment the sync did not recount leaves
+  the sum one too high; like a write landing in between, the request
+  then falls back to OFFSET and a rebuild is queued.  An update that
+  moves a row keeps the table total, so until the next sync (at most
+  ``PAGE_ANCHOR_REFRESH_SECONDS``) ranks can be off by a row, no more
+  than consecutive OFFSET pages drift under concurrent writes.
+
+Anchors are per process, so each worker builds its own, and they are
+only used from ``PAGE_ANCHOR_MIN_OFFSET`` rows on.  ``page`` /
+``pages`` and the returned rows are exactly those of the OFFSET query.
+Filtered listings, multi-key sorts and sort columns holding NULLs keep
+using OFFSET.
+"""
+
+import asyncio
+import bisect
+import itertools
+import logging
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import ColumnElement, func, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.models import Candidate
+from app.queries import page_stmt
+from app.search import NOT_DELETED
+from app.sorting import SortKey, order_by
+
+logger = logging.getLogger(__name__)
+
+# Bounds drift from changes a sync cannot see (hard deletes offset by
+# inserts elsewhere)
+REBUILD_AFTER_SYNCS = 100
+# More changed rows than this in one sync rebuild instead
+MAX_INCREMENTAL_CHANGES = 1000
+
+Anchor = tuple[Any, ...]
+
+
+@dataclass
+class _Anchors:
+    """Anchors for one sort key: segment ``i + 1`` starts at ``fences[i]``."""
+
+    fences: list[Anchor]
+    counts: list[int]
+    cursor: datetime | None
+    starts: list[int] = field(default_factory=list)
+    synced_at: float = field(default_factory=time.monotonic)
+    syncs: int = 0
+    # False when the sort column holds NULLs, which row comparisons skip
+    usable: bool = True
+
+    def __post_init__(self) -> None:
+        self.reindex()
+
+    @property
+    def total(self) -> int:
+        return self.starts[-1] + self.counts[-1]
+
+    def reindex(self) -> None:
+        """Recompute segment start ranks after counts changed."""
+        self.starts = [0, *itertools.accumulate(self.counts[:-1])]
+
+
+@dataclass
+class PageAnchorStats:
+    """Counters for the stats endpoint."""
+
+    anchored: int = 0
+    fallbacks: int = 0
+    builds: int = 0
+    syncs: int = 0
+    splits: int = 0
+    rows_skipped: int = 0
+
+
+def _columns(name: str) -> tuple[ColumnElement, ...]:
+    """The ``(key, id)`` columns a sort key orders by."""
+    if name == "id":
+        return (Candidate.id,)
+    return (getattr(Candidate, name), Candidate.id)
+
+
+def _at_or_after(cols: tuple[ColumnElement, ...], anchor: Anchor):
+    values = [literal(v, c.type) for c, v in zip(cols, anchor, strict=True)]
+    if len(cols) == 1:
+        return cols[0] >= values[0]
+    return tuple_(*cols) >= tuple_(*values)
+
+
+def _before(cols: tuple[ColumnElement, ...], anchor: Anchor):
+    values = [literal(v, c.type) for c, v in zip(cols, anchor, strict=True)]
+    if len(cols) == 1:
+        return cols[0] < values[0]
+    return tuple_(*cols) < tuple_(*values)
+
+
+class PageAnchors:
+    """Process-wide sparse rank index per single-key sort."""
+
+    def __init__(self, spacing: int):
+        """Anchor every ``spacing``-th row (0 disables)."""
+        self.spacing = spacing
+        self.stats = PageAnchorStats()
+        self._anchors: dict[str, _Anchors] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        # Sort keys queued for, or in, a background build
+        self._queued: set[str] = set()
+        self._building: set[str] = set()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Whether deep pages are anchored at all."""
+        return self.spacing > 0
+
+    async def page(
+        self,
+        db: AsyncSession,
+        key: SortKey,
+        offset: int,
+        limit: int,
+        total: int,
+    ) -> list[Candidate] | None:
+        """The unfiltered page at ``offset``, or None to fall back to OFFSET.
+
+        ``total`` is the live row count the caller reports; the anchors
+        are synced until they agree with it.  Without anchors for the
+        key yet, a background build is queued and None returned.
+        """
+        name, descending = key
+        async with self._locks.setdefault(name, asyncio.Lock()):
+            anchors = await self._current(db, name, total)
+        if anchors is None or not anchors.usable or anchors.total != total:
+            self.stats.fallbacks += 1
+            return None
+
+        if descending:
+            end = total - offset
+            start = max(end - limit, 0)
+        else:
+            start = offset
+            end = min(offset + limit, total)
+        if start >= end:
+            self.stats.anchored += 1
+            return []
+        segment = bisect.bisect_right(anchors.starts, start) - 1
+        cols = _columns(name)
+        stmt = select(Candidate).where(NOT_DELETED)
+        if segment:
+            stmt = stmt.where(_at_or_after(cols, anchors.fences[segment - 1]))
+        skip = start - anchors.starts[segment]
+        stmt = stmt.order_by(*order_by([(name, False)])).offset(skip).limit(end - start)
+        rows = list((await db.execute(stmt)).scalars())
+        self.stats.anchored += 1
+        self.stats.rows_skipped += skip
+        return rows[::-1] if descending else rows
+
+    async def _current(
+        self, db: AsyncSession, name: str, total: int
+    ) -> _Anchors | None:
+        """The key's anchors after any sync due, or None while they build."""
+        anchors = self._anchors.get(name)
+        if anchors is None:
+            self._queue(name)
+            return None
+        due = (
+            time.monotonic() - anchors.synced_at >= settings.page_anchor_refresh_seconds
+        )
+        if not anchors.usable:
+            # Rebuilt now and then: the column may have lost its NULLs
+            if due:
+                anchors.synced_at = time.monotonic()
+                self._queue(name)
+            return anchors
+        if anchors.syncs >= REBUILD_AFTER_SYNCS:
+            # Still exact after a sync; served until the rebuild replaces them
+            self._queue(name)
+        if anchors.total != total or due:
+            if not await self._sync(db, name, anchors):
+                self._anchors.pop(name, None)
+                self._queue(name)
+                return None
+            if anchors.total != total:
+                # A row moved out of a segment that was not recounted, or
+                # a write landed after the caller's count
+                self._queue(name)
+        return anchors
+
+    # ── Background builds ────────────────────────────────────────────
+
+    def _queue(self, name: str) -> None:
+        if name not in self._queued and name not in self._building:
+            self._queued.add(name)
+            self._wake.set()
+
+    async def start(self, session_factory: async_sessionmaker) -> None:
+        """Start the task that builds queued keys' anchors."""
+        if self.enabled and self._task is None:
+            self._wake = asyncio.Event()
+            if self._queued:
+                self._wake.set()
+            self._task = asyncio.create_task(self._build_loop(session_factory))
+
+    async def stop(self) -> None:
+        """Cancel the build task and drop every key's anchors."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._queued.clear()
+        self.clear()
+
+    async def build_queued(self, session_factory: async_sessionmaker) -> None:
+        """Build every queued key's anchors, each in its own session."""
+        while self._queued:
+            name = self._queued.pop()
+            self._building.add(name)
+            try:
+                async with session_factory() as db:
+                    self._anchors[name] = await self._build(db, name)
+            except Exception:
+                logger.exception("page anchor build for %s failed", name)
+            finally:
+                self._building.discard(name)
+
+    async def _build_loop(self, session_factory: async_sessionmaker) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            await self.build_queued(session_factory)
+
+    # ── Maintenance ──────────────────────────────────────────────────
+
+    async def _build(self, db: AsyncSession, name: str) -> _Anchors:
+        """Rank every live row once and keep every ``spacing``-th key.
+
+        Writes that land while this runs are past the recorded change
+        feed position, so the next sync recounts their segments.
+        """
+        started = time.perf_counter()
+        cursor = (await db.execute(select(func.max(Candidate.updated_at)))).scalar()
+        cols = _columns(name)
+        has_nulls = select(cols[0]).where(NOT_DELETED, cols[0].is_(None)).exists()
+        if (await db.execute(select(has_nulls))).scalar():
+            return _Anchors([], [0], cursor, usable=False)
+
+        ranked = (
+            select(*cols, func.row_number().over(order_by=cols).label("rank"))
+            .where(NOT_DELETED)
+            .subquery()
+        )
+        rank = ranked.c["rank"]
+        stmt = (
+            select(ranked)
+            .where((rank > 1) & ((rank - 1) % self.spacing == 0))
+            .order_by(rank)
+        )
+        fences = [tuple(row[: len(cols)]) for row in await db.execute(stmt)]
+        anchors = _Anchors(fences, [self.spacing] * len(fences) + [0], cursor)
+        anchors.counts[-1] = await self._count(db, cols, anchors, len(fences))
+        anchors.reindex()
+        self.stats.builds += 1
+        logger.info(
+            "page anchors for %s: %d segments over %d rows in %.3fs",
+            name,
+            len(anchors.counts),
+            anchors.total,
+            time.perf_counter() - started,
+        )
+        return anchors
+
+    async def _sync(self, db: AsyncSession, name: str, anchors: _Anchors) -> bool:
+        """Recount the segments holding rows changed since the last sync.
+
+        Re-reads ``CHANGES_SAFETY_LAG_SECONDS`` before the previous
+        high-water mark, like the entity cache; recounting a segment
+        twice is harmless.  False, with ``anchors`` unchanged, when the
+        changes need a rebuild instead.
+        """
+        self.stats.syncs += 1
+        changes = select(Candidate.id, Candidate.updated_at)
+        if anchors.cursor is not None:
+            lag = timedelta(seconds=settings.changes_safety_lag_seconds)
+            changes = changes.where(Candidate.updated_at > anchors.cursor - lag)
+        changed = (await db.execute(changes.limit(MAX_INCREMENTAL_CHANGES + 1))).all()
+        if len(changed) > MAX_INCREMENTAL_CHANGES:
+            return False
+
+        cols = _columns(name)
+        dirty: set[int] = set()
+        if changed:
+            changed_ids = {row.id for row in changed}
+            fence_ids = {fence[-1]: fence for fence in anchors.fences}
+            # The database orders changed rows among the anchor rows, so
+            # each lands in the segment its collation puts it in
+            stmt = (
+                select(*cols)
+                .where(Candidate.id.in_(changed_ids | fence_ids.keys()))
+                .order_by(*cols)
+            )
+            segment = 0
+            seen = 0
+            for row in (await db.execute(stmt)).all():
+                row = tuple(row)
+                if None in row:
+                    return False
+                if row[-1] in fence_ids:
+                    if fence_ids[row[-1]] != row:
+                        return False
+                    segment += 1
+                    seen += 1
+                if row[-1] in changed_ids:
+                    dirty.add(segment)
+            if seen != len(fence_ids):
+                return False
+            if len(dirty) > max(len(anchors.counts) // 4, 1):
+                return False
+            anchors.cursor = max(
+                [anchors.cursor, *(row.updated_at for row in changed)],
+                key=lambda stamp: stamp or datetime.min,
+            )
+
+        # Highest first, so a split does not shift the segments still to do
+        for segment in sorted(dirty, reverse=True):
+            anchors.counts[segment] = await self._count(db, cols, anchors, segment)
+            if anchors.counts[segment] > 2 * self.spacing:
+                await self._split(db, cols, anchors, segment)
+        anchors.reindex()
+        anchors.synced_at = time.monotonic()
+        anchors.syncs += 1
+        return True
+
+    async def _split(
+        self,
+        db: AsyncSession,
+        cols: tuple[ColumnElement, ...],
+        anchors: _Anchors,
+        segment: int,
+    ) -> None:
+        """Re-anchor one oversized segment every ``spacing`` rows."""
+        ranked = (
+            select(*cols, func.row_number().over(order_by=cols).label("rank"))
+            .where(NOT_DELETED, *self._bounds(cols, anchors, segment))
+            .subquery()
+        )
+        rank = ranked.c["rank"]
+        stmt = (
+            select(ranked)
+            .where((rank > 1) & ((rank - 1) % self.spacing == 0))
+            .order_by(rank)
+        )
+        fences = [tuple(row[: len(cols)]) for row in await db.execute(stmt)]
+        count = anchors.counts[segment]
+        anchors.fences[segment:segment] = fences
+        anchors.counts[segment : segment + 1] = [self.spacing] * len(fences) + [
+            count - self.spacing * len(fences)
+        ]
+        self.stats.splits += 1
+
+    async def _count(
+        self,
+        db: AsyncSession,
+        cols: tuple[ColumnElement, ...],
+        anchors: _Anchors,
+        segment: int,
+    ) -> int:
+        stmt = (
+            select(func.count())
+            .select_from(Candidate)
+            .where(NOT_DELETED, *self._bounds(cols, anchors, segment))
+        )
+        return (await db.execute(stmt)).scalar_one()
+
+    @staticmethod
+    def _bounds(
+        cols: tuple[ColumnElement, ...], anchors: _Anchors, segment: int
+    ) -> list[ColumnElement[bool]]:
+        bounds = []
+        if segment > 0:
+            bounds.append(_at_or_after(cols, anchors.fences[segment - 1]))
+        if segment < len(anchors.fences):
+            bounds.append(_before(cols, anchors.fences[segment]))
+        return bounds
+
+    def clear(self) -> None:
+        """Drop every key's anchors (the next deep jump queues a build)."""
+        self._anchors.clear()
+
+    def as_dict(self) -> dict:
+        """Counters and per-key segment counts, for the stats endpoint."""
+        now = time.monotonic()
+        return {
+            "enabled": self.enabled,
+            "spacing": self.spacing,
+            "min_offset": settings.page_anchor_min_offset,
+            **vars(self.stats),
+            "building": sorted(self._queued | self._building),
+            "keys": {
+                name: {
+                    "segments": len(a.counts),
+                    "rows": a.total,
+                    "usable": a.usable,
+                    "synced_seconds_ago": round(now - a.synced_at, 1),
+                }
+                for name, a in sorted(self._anchors.items())
+            },
+        }
+
+
+page_anchors = PageAnchors(settings.page_anchor_spacing)
+
+
+async def fetch_page(
+    db: AsyncSession,
+    filters: list[ColumnElement[bool]],
+    sort_keys: list[SortKey],
+    offset: int,
+    limit: int,
+    total: int,
+) -> Sequence[Candidate]:
+    """One sorted page, anchored when it is a deep unfiltered jump.
+
+    Returns the same rows as :func:`app.queries.page_stmt`.
+    """
+    if (
+        page_anchors.enabled
+        and not filters
+        and len(sort_keys) == 1
+        and offset >= settings.page_anchor_min_offset
+    ):
+        rows = await page_anchors.page(db, sort_keys[0], offset, limit, total)
+        if rows is not None:
+            return rows
+    stmt = page_stmt(filters, order_by(sort_keys), offset=offset, limit=limit)
+    return (await db.execute(stmt)).scalars().all()
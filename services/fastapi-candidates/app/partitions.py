@@ -0,0 +1,166 @@
+"""Maintenance of the monthly ``create_time`` partitions of ``candidates``.
+
+Migration 006 turns ``candidates`` into a table range-partitioned by
+month (``candidates_pYYYY_MM``, ``[first of month, first of next)``)
+plus a ``candidates_default`` catch-all.  This module keeps that layout
+healthy:
+
+- :func:`ensure_future_partitions` creates the partitions for the next
+  few months ahead of time (run at startup and from
+  ``scripts/partitions.py``), moving any matching rows out of the
+  default partition first.
+- :func:`detach_partitions` detaches whole months older than a cutoff
+  and moves them to an archive schema (or drops them) — a metadata
+  change instead of a bulk ``DELETE`` and the vacuum that follows it.
+
+On other dialects, or before migration 006, every function is a no-op.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+PARENT = "candidates"
+DEFAULT_PARTITION = "candidates_default"
+
+# Serialises partition DDL across workers/tasks starting at the same time
+_LOCK_KEY = 0x63616E64  # "cand"
+
+_NAME = re.compile(r"^candidates_p(\d{4})_(\d{2})$")
+_SCHEMA = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+@dataclass(frozen=True)
+class Partition:
+    """One monthly partition covering ``[start, end)``."""
+
+    name: str
+    start: date
+    end: date
+
+
+def add_months(month: date, count: int) -> date:
+    """First day of the month ``count`` months after ``month``'s."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_for(day: date) -> Partition:
+    """The monthly partition that holds rows created on ``day``."""
+    start = day.replace(day=1)
+    return Partition(f"candidates_p{start:%Y_%m}", start, add_months(start, 1))
+
+
+async def is_partitioned(db: AsyncSession) -> bool:
+    """True once migration 006 has partitioned ``candidates``."""
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    stmt = text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table "
+        "WHERE partrelid = to_regclass(:parent))"
+    )
+    return (await db.execute(stmt, {"parent": PARENT})).scalar_one()
+
+
+async def list_partitions(db: AsyncSession) -> list[Partition]:
+    """Attached monthly partitions, oldest first (default excluded)."""
+    stmt = text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:parent)"
+    )
+    partitions = []
+    for name in (await db.execute(stmt, {"parent": PARENT})).scalars():
+        if match := _NAME.match(name):
+            year, month = map(int, match.groups())
+            partitions.append(partition_for(date(year, month, 1)))
+    return sorted(partitions, key=lambda p: p.start)
+
+
+async def _create_partition(db: AsyncSession, partition: Partition) -> None:
+    """Create and attach ``partition``, adopting its rows from the default.
+
+    Postgres refuses to add a partition while the default partition still
+    holds rows in its range, so the table is created standalone, those
+    rows are moved into it, and only then is it attached.
+    """
+    name, lo, hi = partition.name, partition.start, partition.end
+    await db.execute(
+        text(
+            f'CREATE TABLE "{name}" '
+            f"(LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+    )
+    await db.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            "WHERE create_time >= :lo AND create_time < :hi RETURNING *) "
+            f'INSERT INTO "{name}" SELECT * FROM moved'
+        ),
+        # create_time is a naive timestamp; asyncpg wants datetimes for it
+        {"lo": datetime.combine(lo, time()), "hi": datetime.combine(hi, time())},
+    )
+    # Bounds are formatted from dates, never from user input
+    await db.execute(
+        text(
+            f'ALTER TABLE {PARENT} ATTACH PARTITION "{name}" '
+            f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+        )
+    )
+
+
+async def ensure_future_partitions(
+    db: AsyncSession, months_ahead: int, today: date | None = None
+) -> list[str]:
+    """Create any missing partitions from this month to ``months_ahead``.
+
+    Returns the names of the partitions created.
+    """
+    if not await is_partitioned(db):
+        return []
+    await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+    existing = {p.name for p in await list_partitions(db)}
+    month = (today or datetime.now(UTC).date()).replace(day=1)
+    created = []
+    for offset in range(months_ahead + 1):
+        partition = partition_for(add_months(month, offset))
+        if partition.name not in existing:
+            await _create_partition(db, partition)
+            created.append(partition.name)
+    await db.commit()
+    return created
+
+
+async def detach_partitions(
+    db: AsyncSession, before: date, archive_schema: str | None = "archive"
+) -> list[str]:
+    """Detach every partition ending on or before ``before``.
+
+    Detached partitions are moved to ``archive_schema`` (kept queryable
+    for exports and audits) or dropped when it is ``None``.  Their rows
+    disappear from the API without a bulk ``DELETE``.  Returns the names
+    of the partitions detached.
+    """
+    if archive_schema is not None and not _SCHEMA.match(archive_schema):
+        raise ValueError(f"Invalid schema name: {archive_schema!r}")
+    if not await is_partitioned(db):
+        return []
+    await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+    old = [p for p in await list_partitions(db) if p.end <= before]
+    if old and archive_schema is not None:
+        await db.execute(text(f"CREATE SCHEMA IF NOT EXISTS {archive_schema}"))
+    for partition in old:
+        await db.execute(
+            text(f'ALTER TABLE {PARENT} DETACH PARTITION "{partition.name}"')
+        )
+        if archive_schema is None:
+            await db.execute(text(f'DROP TABLE "{partition.name}"'))
+        else:
+            await db.execute(
+                text(f'ALTER TABLE "{partition.name}" SET SCHEMA {archive_schema}')
+            )
+    await db.commit()
+    return [p.name for p in old]
@@ -0,0 +1,427 @@
+"""Opt-in per-request profiling with flamegraph output.
+
+A request sent with a valid ``X-Admin-Key`` and either an ``X-Profile: 1``
+header or a ``profile=1`` query flag is run under a sampling profiler:
+
+- A background thread samples the event-loop thread's Python stack every
+  ``PROFILE_SAMPLE_INTERVAL`` seconds.  Samples taken while the request's
+  own task is running are recorded as folded stacks (``a;b;c count``, the
+  format flamegraph tools read), trimmed to start at this middleware.
+  While the task is suspended the loop is either idle (``[awaiting I/O]``
+  — usually a database round-trip) or running another request
+  (``[other tasks]``).
+- Cursor events on the engine annotate the profile with every SQL
+  statement the request ran and its wall time.
+
+Profiles are written as JSON to a bounded directory (the oldest are
+pruned past ``PROFILE_MAX_STORED``) and served by the ``/admin/profiles``
+routes, including an SVG flamegraph.  The response carries the profile's
+id in ``X-Profile-Id``.  Requests without the flag pay one header lookup.
+"""
+
+import asyncio
+import hmac
+import html
+import json
+import os
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+IDLE = "[awaiting I/O]"
+OTHER = "[other tasks]"
+
+# Per-profile caps on the annotations kept
+MAX_QUERIES = 200
+MAX_SQL_LENGTH = 500
+
+# Leaf-most frame module prefix -> category for the time breakdown
+_CATEGORIES = (
+    ("asyncpg", "sql"),
+    ("aiosqlite", "sql"),
+    ("sqlalchemy.orm", "orm"),
+    ("sqlalchemy", "sql"),
+    ("pydantic", "serialization"),
+    ("fastapi.encoders", "serialization"),
+    ("json", "serialization"),
+    ("app.", "app"),
+)
+
+_ID = re.compile(r"^[0-9a-f]{16}-[0-9a-f]{8}$")
+_TRUE = {"1", "true", "yes"}
+
+_active: ContextVar["RequestProfile | None"] = ContextVar("profile", default=None)
+
+
+@dataclass
+class RequestProfile:
+    """Samples and SQL annotations collected for one request."""
+
+    samples: Counter = field(default_factory=Counter)
+    queries: list[dict] = field(default_factory=list)
+    db_seconds: float = 0.0
+    db_statements: int = 0
+
+
+class Sampler:
+    """Samples one thread's stack while a given asyncio task is running."""
+
+    def __init__(self, profile: RequestProfile, root, interval: float):
+        """Sample the calling thread's current task into ``profile``.
+
+        Stacks are trimmed to start at the frame running ``root`` (a code
+        object).  Must be constructed on the event-loop thread.
+        """
+        self.profile = profile
+        self.root = root
+        self.interval = interval
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    # The sampler thread only runs when the loop thread releases the GIL,
+    # by default every 5 ms; while any sampler runs, ask for a release
+    # every interval instead.
+    _running = 0
+    _saved_switch_interval = 0.0
+    _lock = threading.Lock()
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        with Sampler._lock:
+            if Sampler._running == 0:
+                Sampler._saved_switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(self.interval, sys.getswitchinterval()))
+            Sampler._running += 1
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the thread to finish."""
+        self._stop.set()
+        self._thread.join()
+        with Sampler._lock:
+            Sampler._running -= 1
+            if Sampler._running == 0:
+                sys.setswitchinterval(Sampler._saved_switch_interval)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            current = asyncio.current_task(self.loop)
+            if current is None:
+                stack = IDLE
+            elif current is not self.task:
+                stack = OTHER
+            else:
+                frame = sys._current_frames().get(self.thread_id)
+                stack = self._fold(frame)
+            self.profile.samples[stack] += 1
+
+    def _fold(self, frame) -> str:
+        labels = []
+        while frame is not None:
+            module = frame.f_globals.get("__name__", "?")
+            labels.append(f"{module}:{frame.f_code.co_qualname}")
+            if frame.f_code is self.root:
+                break
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+
+# ── SQL annotations ─────────────────────────────────────────────────
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's own execution context, so a statement that
+    # fails (no after_cursor_execute) leaves nothing behind on the connection
+    if _active.get() is not None and context is not None:
+        context._profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active.get()
+    started = getattr(context, "_profile_started", None)
+    if profile is None or started is None:
+        return
+    elapsed = time.perf_counter() - started
+    profile.db_seconds += elapsed
+    profile.db_statements += 1
+    if len(profile.queries) < MAX_QUERIES:
+        profile.queries.append(
+            {"sql": statement[:MAX_SQL_LENGTH], "ms": round(elapsed * 1000, 3)}
+        )
+
+
+def install(sync_engine: Engine) -> None:
+    """Attach the SQL-timing listeners to ``sync_engine`` (idempotent)."""
+    for name, fn in (
+        ("before_cursor_execute", _before_cursor_execute),
+        ("after_cursor_execute", _after_cursor_execute),
+    ):
+        if not event.contains(sync_engine, name, fn):
+            event.listen(sync_engine, name, fn)
+
+
+# ── Analysis and rendering ──────────────────────────────────────────
+
+
+def _frame_category(frame: str) -> str:
+    if frame == IDLE:
+        return "io_wait"
+    if frame == OTHER:
+        return "other_tasks"
+    for prefix, category in _CATEGORIES:
+        if frame.startswith(prefix):
+            return category
+    return "framework"
+
+
+def _category(stack: str) -> str:
+    for frame in reversed(stack.split(";")):
+        category = _frame_category(frame)
+        if category != "framework":
+            return category
+    return "framework"
+
+
+def breakdown(samples: dict[str, int]) -> dict[str, float]:
+    """Fraction of samples per category, judged by the leaf-most known frame.
+
+    ``sql`` covers the driver and SQLAlchemy Core, ``orm`` row hydration,
+    ``serialization`` Pydantic and JSON, ``app`` this package, and
+    ``framework`` everything else on the request's stack (Starlette,
+    FastAPI routing, the event loop).
+    """
+    total = sum(samples.values())
+    counts: Counter = Counter()
+    for stack, count in samples.items():
+        counts[_category(stack)] += count
+    return {k: round(v / total, 4) for k, v in counts.most_common()} if total else {}
+
+
+def folded(samples: dict[str, int]) -> str:
+    """Samples in the folded-stack text format (``a;b;c count`` per line)."""
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(samples.items()))
+
+
+_COLORS = {
+    "sql": "#4682c8",
+    "orm": "#6e5ac8",
+    "serialization": "#3caa6e",
+    "app": "#e68c28",
+    "io_wait": "#aaaaaa",
+    "other_tasks": "#c8c8c8",
+    "framework": "#dc5a3c",
+}
+
+_ROW = 16
+_HEADER = 24
+
+
+def render_flamegraph(samples: dict[str, int], title: str = "", width=1200) -> str:
+    """Render folded ``samples`` as a self-contained SVG flamegraph.
+
+    The root is at the bottom; hover a frame for its name and sample
+    count.  Frames are coloured by the categories of :func:`breakdown`.
+    """
+    tree: dict = {}
+    total = 0
+    for stack, count in samples.items():
+        total += count
+        children = tree
+        for frame in stack.split(";"):
+            node = children.setdefault(frame, [0, {}])
+            node[0] += count
+            children = node[1]
+
+    frames: list[tuple[str, int, float, float, int]] = []
+
+    def layout(children: dict, x: float, level: int) -> None:
+        for name, (count, grandchildren) in sorted(children.items()):
+            w = count / total * width
+            if w >= 0.5:
+                frames.append((name, count, x, w, level))
+                layout(grandchildren, x, level + 1)
+            x += w
+
+    if total:
+        layout(tree, 0.0, 0)
+    depth = max((level for *_, level in frames), default=-1) + 1
+    height = _HEADER + depth * _ROW
+    heading = html.escape(f"{title} ({total} samples)".strip())
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
+        f'height="{height}" font-family="monospace" font-size="11">',
+        f'<text x="4" y="16" font-size="13">{heading}</text>',
+    ]
+    for name, count, x, w, level in frames:
+        y = height - (level + 1) * _ROW
+        label = name.rsplit(":", 1)[-1]
+        chars = int(w / 7)
+        if len(label) > chars:
+            label = label[: chars - 2] + ".." if chars >= 3 else ""
+        tip = html.escape(f"{name} - {count} samples ({count / total:.1%})")
+        parts.append(
+            f"<g><title>{tip}</title>"
+            f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{_ROW - 1}" '
+            f'fill="{_COLORS[_frame_category(name)]}"/>'
+            f'<text x="{x + 3:.1f}" y="{y + _ROW - 4}">{html.escape(label)}</text>'
+            "</g>"
+        )
+    parts.append("</svg>")
+    return "\n".join(parts) + "\n"
+
+
+# ── Storage ─────────────────────────────────────────────────────────
+
+
+class ProfileStore:
+    """Profiles as JSON files in one directory, newest ``max_profiles`` kept."""
+
+    def __init__(self, directory: str | Path, max_profiles: int = 100):
+        """Store profiles under ``directory`` (created on first save)."""
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+
+    @staticmethod
+    def new_id() -> str:
+        """A time-ordered, unguessable profile id."""
+        return f"{time.time_ns():016x}-{secrets.token_hex(4)}"
+
+    def save(self, record: dict) -> None:
+        """Write ``record`` (which has an ``id``) and prune the oldest."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{record['id']}.json"
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(record))
+        os.replace(tmp, path)
+        for old in self._paths()[: -self.max_profiles or None]:
+            old.unlink(missing_ok=True)
+
+    def get(self, profile_id: str) -> dict | None:
+        """Load one profile, or ``None`` for an unknown or malformed id."""
+        if not _ID.match(profile_id):
+            return None
+        try:
+            return json.loads((self.directory / f"{profile_id}.json").read_text())
+        except FileNotFoundError:
+            return None
+
+    def summaries(self) -> list[dict]:
+        """Summaries of the stored profiles, newest first."""
+        summaries = []
+        for path in reversed(self._paths()):
+            try:
+                record = json.loads(path.read_text())
+            except (FileNotFoundError, ValueError):
+                continue
+            summaries.append(
+                {k: v for k, v in record.items() if k not in ("samples", "queries")}
+            )
+        return summaries
+
+    def _paths(self) -> list[Path]:
+        if not self.directory.is_dir():
+            return []
+        return sorted(p for p in self.directory.glob("*.json") if _ID.match(p.stem))
+
+
+profile_store = ProfileStore(
+    settings.profile_dir or Path(tempfile.gettempdir()) / "candidate-profiles",
+    settings.profile_max_stored,
+)
+
+
+# ── Middleware ──────────────────────────────────────────────────────
+
+
+def _requested(scope) -> bool:
+    headers = dict(scope["headers"])
+    key = headers.get(b"x-admin-key", b"").decode("latin-1")
+    if not key or not settings.admin_api_key:
+        return False
+    if not hmac.compare_digest(key, settings.admin_api_key):
+        return False
+    if headers.get(b"x-profile", b"").decode("latin-1").lower() in _TRUE:
+        return True
+    query = scope.get("query_string", b"")
+    if b"profile" not in query:
+        return False
+    flags = parse_qs(query.decode("latin-1")).get("profile", [])
+    return any(flag.lower() in _TRUE for flag in flags)
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles flagged requests from admins."""
+
+    def __init__(self, app):
+        """Wrap ``app``."""
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        """Run the request, under the profiler when it asks to be."""
+        if scope["type"] != "http" or not _requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = profile_store.new_id()
+        status = 500
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", profile_id.encode()),
+                ]
+            await send(message)
+
+        profile = RequestProfile()
+        token = _active.set(profile)
+        sampler = Sampler(
+            profile,
+            ProfilingMiddleware.__call__.__code__,
+            settings.profile_sample_interval,
+        )
+        started_at = datetime.now(UTC)
+        started = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            wall = time.perf_counter() - started
+            sampler.stop()
+            _active.reset(token)
+            record = {
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status,
+                "started_at": started_at.isoformat(),
+                "wall_ms": round(wall * 1000, 3),
+                "db_ms": round(profile.db_seconds * 1000, 3),
+                "db_statements": profile.db_statements,
+                "sample_interval_ms": settings.profile_sample_interval * 1000,
+                "sample_count": sum(profile.samples.values()),
+                "breakdown": breakdown(profile.samples),
+                "queries": profile.queries,
+                "samples": dict(profile.samples),
+            }
+            await asyncio.to_thread(profile_store.save, record)
@@ -0,0 +1,57 @@
+"""Statement builders shared by the list/detail routes and startup warmup.
+
+SQLAlchemy caches compiled SQL per statement *structure*, and asyncpg
+prepares each distinct SQL string once per connection.  Building the
+hot statements in one place means the warmup in ``app.main`` executes
+exactly the shapes the routes will, so the first real request finds
+both caches already populated.
+"""
+
+from sqlalchemy import ColumnElement, Select, UnaryExpression, func, select
+
+from app.models import Candidate
+from app.search import NOT_DELETED
+from app.sorting import order_by
+
+
+def count_stmt(filters: list[ColumnElement[bool]]) -> Select:
+    """``SELECT count(*)`` over the live, filtered candidate set."""
+    return select(func.count()).select_from(Candidate).where(NOT_DELETED, *filters)
+
+
+def page_stmt(
+    filters: list[ColumnElement[bool]],
+    order_by: tuple[UnaryExpression, ...],
+    offset: int,
+    limit: int,
+) -> Select:
+    """One sorted page of live, filtered candidates."""
+    return (
+        select(Candidate)
+        .where(NOT_DELETED, *filters)
+        .order_by(*order_by)
+        .offset(offset)
+        .limit(limit)
+    )
+
+
+def by_id_stmt(candidate_id: int) -> Select:
+    """Primary-key lookup of one live candidate.
+
+    The key is ``(id, create_time)`` and ``candidates`` is partitioned on
+    ``create_time``, so an id alone cannot prune: Postgres probes the
+    primary-key index of every partition (one index descent each).
+    """
+    return select(Candidate).where(Candidate.id == candidate_id, NOT_DELETED)
+
+
+def warmup_statements() -> list[Select]:
+    """The default listing, count and detail statements of both routers."""
+    return [
+        count_stmt([]),
+        # /external/candidates default: first_name ASC
+        page_stmt([], order_by([("first_name", False)]), 0, 100),
+        # /api/candidates default (React frontend): create_time DESC
+        page_stmt([], order_by([("create_time", True)]), 0, 100),
+        by_id_stmt(0),
+    ]
@@ -0,0 +1,93 @@
+"""Hit-rate accounting for SQLAlchemy's compiled cache and prepared statements.
+
+Two caches sit between a route and Postgres:
+
+- SQLAlchemy's compiled cache, keyed by statement structure.  Each
+  execution context records whether compilation was a hit or a miss.
+- asyncpg's prepared-statement cache, an LRU of SQL strings per
+  connection (``prepared_statement_cache_size``, default 100).  asyncpg
+  does not expose hit counts, so the same LRU is mirrored per pooled
+  connection from the SQL text about to be executed.
+
+``GET /external/stats/query-cache`` reports both, plus how many distinct
+SQL strings have been seen; with bucketed search shapes (``app.search``)
+that number should stay small and the hit rates near 100%.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import CacheStats
+
+# Mirrors asyncpg's default prepared_statement_cache_size
+PREPARED_CACHE_SIZE = 100
+# Upper bound on distinct SQL strings remembered for the "shapes" figure
+MAX_TRACKED_SHAPES = 10_000
+
+_INFO_KEY = "prepared_lru"
+
+
+@dataclass
+class QueryCacheStats:
+    """Process-wide counters for both caches."""
+
+    compiled_hits: int = 0
+    compiled_misses: int = 0
+    prepared_hits: int = 0
+    prepared_misses: int = 0
+    shapes: set[str] = field(default_factory=set)
+
+    def as_dict(self) -> dict:
+        """Counters plus hit rates, for the stats endpoint."""
+        return {
+            "compiled": _rate(self.compiled_hits, self.compiled_misses),
+            "prepared": _rate(self.prepared_hits, self.prepared_misses),
+            "distinct_statements": len(self.shapes),
+        }
+
+    def reset(self) -> None:
+        """Zero all counters."""
+        self.compiled_hits = self.compiled_misses = 0
+        self.prepared_hits = self.prepared_misses = 0
+        self.shapes.clear()
+
+
+def _rate(hits: int, misses: int) -> dict:
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else None,
+    }
+
+
+stats = QueryCacheStats()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and context.compiled is not None:
+        if context.cache_hit is CacheStats.CACHE_HIT:
+            stats.compiled_hits += 1
+        elif context.cache_hit is CacheStats.CACHE_MISS:
+            stats.compiled_misses += 1
+
+    lru: OrderedDict = conn.info.setdefault(_INFO_KEY, OrderedDict())
+    if statement in lru:
+        lru.move_to_end(statement)
+        stats.prepared_hits += 1
+    else:
+        lru[statement] = True
+        if len(lru) > PREPARED_CACHE_SIZE:
+            lru.popitem(last=False)
+        stats.prepared_misses += 1
+
+    if len(stats.shapes) < MAX_TRACKED_SHAPES:
+        stats.shapes.add(statement)
+
+
+def install(engine: Engine) -> None:
+    """Start counting cache hits for statements run on ``engine``."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
@@ -0,0 +1,131 @@
+"""Parser for the ``search`` query language.
+
+Whitespace-separated terms are ANDed, as before, with three additions:
+
+- ``field:value`` scopes a term to one column (``state:texas``,
+  ``email:@acme.com``; ``first:``/``last:`` abbreviate the name fields),
+  so it compiles to one ``ILIKE`` served by that column's trigram index
+  instead of an OR across all five.
+- ``"quoted phrases"`` match as a single substring, spaces included, and
+  work scoped too (``state:"new york"``).
+- ``-term`` excludes rows that contain the term.
+
+An unknown ``prefix:`` (``10:30``, ``http://``) is an ordinary term.
+Matching stays case-insensitive substring matching, except for short
+terms:
+
+- Terms shorter than ``MIN_TRIGRAM_LENGTH`` have no trigrams, so no
+  trigram index can find them.  Next to a longer positive term they are
+  only re-checked on the rows it narrows to (same substring semantics).
+- When every positive term is short (typeahead: ``jo``, ``jo sm``) they
+  become ``prefix`` terms.  A prefix term matches a column that *starts
+  with* it, answered by a B-tree range on ``lower(col)``, and its
+  characters are literal.
+
+The parsed terms are normalised before they are compiled: terms implied
+by another term are dropped (``ann`` is redundant next to ``anna``, and
+``-annabel`` next to ``-ann``), and the rest are put in a canonical
+order that depends only on each term's kind (plain, scoped, short,
+negated), never on its text.  Searches with the same kinds of terms
+compile to the same SQL string whatever the words or their order, so
+they keep sharing one cached, prepared statement (see "Stable statement
+shapes" in the README).  Postgres orders the predicates by cost itself.
+"""
+
+import re
+from dataclasses import dataclass, replace
+
+# Scopable fields (the SEARCH_COLUMNS) and their short aliases
+FIELDS = ("first_name", "last_name", "email", "state", "favourite")
+_ALIASES = {"first": "first_name", "last": "last_name"}
+
+# Optional "-", optional "field:", then a quoted phrase or a bare word.
+# An unterminated quote runs to the end of the input.
+_TOKEN = re.compile(r'(-?)(?:([A-Za-z_]+):)?(?:"([^"]*)"?|(\S+))')
+
+# Shorter terms have no trigrams for the GIN indexes to look up
+MIN_TRIGRAM_LENGTH = 3
+
+# Rough chance that a column contains a given one-character term; each
+# further character multiplies it again
+_CHAR_SELECTIVITY = 0.3
+
+
+@dataclass(frozen=True)
+class Term:
+    """One lower-cased search term, optionally field-scoped or negated.
+
+    ``prefix`` terms match columns starting with ``text`` rather than
+    containing it.
+    """
+
+    text: str
+    field: str | None = None
+    negated: bool = False
+    prefix: bool = False
+
+
+def _implied_by(term: Term, other: Term) -> bool:
+    """True if ``term`` filters nothing once ``other`` is applied."""
+    if term.negated != other.negated:
+        return False
+    if not term.negated:
+        # Rows containing other.text in its scope contain term.text there too
+        narrower, wider = term, other
+    else:
+        # Rows excluded by -term are already excluded by -other
+        narrower, wider = other, term
+    if narrower.field not in (None, wider.field):
+        return False
+    if wider.prefix:
+        return wider.text.startswith(narrower.text)
+    return narrower.text in wider.text
+
+
+def estimated_selectivity(term: Term) -> float:
+    """Estimate the fraction of rows ``term`` keeps (lower = more selective).
+
+    Longer terms and single-column terms match fewer rows; a negated
+    term keeps everything its positive form would not.
+    """
+    columns = 1 if term.field else len(FIELDS)
+    # Chance that at least one of the columns contains the term
+    hit = 1.0 - (1.0 - _CHAR_SELECTIVITY ** len(term.text)) ** columns
+    return 1.0 - hit if term.negated else hit
+
+
+def _canonical_key(term: Term) -> tuple[bool, int, bool]:
+    """Sort key for a term's kind: plain, then scoped, short after long."""
+    field = FIELDS.index(term.field) + 1 if term.field else 0
+    return term.negated, field, len(term.text) < MIN_TRIGRAM_LENGTH
+
+
+def parse_query(search: str) -> list[Term]:
+    """Parse ``search`` into de-duplicated terms in canonical order."""
+    terms: list[Term] = []
+    for match in _TOKEN.finditer(search):
+        sign, field, phrase, word = match.groups()
+        value = phrase if phrase is not None else word
+        field = _ALIASES.get(field.lower(), field.lower()) if field else None
+        if field is not None and field not in FIELDS:
+            # Not a scope: keep "prefix:value" as a plain term
+            value, field = f"{match.group(2)}:{value}", None
+        if value:
+            terms.append(Term(value.lower(), field, bool(sign)))
+
+    if not any(not t.negated and len(t.text) >= MIN_TRIGRAM_LENGTH for t in terms):
+        # Nothing for a trigram index to narrow by: short positive terms
+        # become prefix lookups
+        terms = [t if t.negated else replace(t, prefix=True) for t in terms]
+
+    kept = [
+        term
+        for i, term in enumerate(terms)
+        if not any(
+            _implied_by(term, other) and (other != term or j < i)
+            for j, other in enumerate(terms)
+            if j != i
+        )
+    ]
+    # Stable: terms of the same kind keep their input order
+    return sorted(kept, key=_canonical_key)
@@ -1,16 +1,40 @@
 """Candidate API routes with search, sort, and pagination."""
 
-from enum import Enum
+from datetime import datetime
 from typing import Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, or_, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app import query_cache
 from app.auth import require_api_key
+from app.changes import change_filters, decode_cursor, encode_cursor
+from app.config import settings
 from app.database import get_db
+from app.entity_cache import candidate_response, entity_cache
+from app.facets import compute_facets, parse_facets
+from app.lookup import lookup_candidates
+from app.memory_engine import memory_engine
 from app.models import Candidate
-from app.schemas import CandidateOut, PaginatedCandidates
+from app.page_anchors import fetch_page, page_anchors
+from app.queries import by_id_stmt, count_stmt
+from app.query_parser import parse_query
+from app.schemas import (
+    CandidateChange,
+    CandidateChanges,
+    CandidateOut,
+    DuplicatePairOut,
+    DuplicateReport,
+    LookupRequest,
+    LookupResults,
+    PaginatedCandidates,
+    SimilarCandidate,
+    SimilarCandidates,
+)
+from app.search import build_filters
+from app.similarity import find_duplicates, find_similar
+from app.sorting import SortField, parse_sort
 
 router = APIRouter(
     prefix="/external",
@@ -18,35 +42,35 @@ router = APIRouter(
 )
 
 
-class SortField(str, Enum):
-    """Allowed sort columns for candidate listing."""
-
-    first_name = "first_name"
-    last_name = "last_name"
-    email = "email"
-    state = "state"
-    id = "id"
-    favourite = "favourite"
-    create_time = "create_time"
-
-
-# Searchable columns — used for multi-word ILIKE filtering
-SEARCH_COLUMNS = [
-    Candidate.favourite,
-    Candidate.first_name,
-    Candidate.last_name,
-    Candidate.email,
-    Candidate.state,
-]
-
-
-@router.get("/candidates", response_model=PaginatedCandidates)
+@router.get(
+    "/candidates",
+    response_model=PaginatedCandidates,
+    response_model_exclude_none=True,
+)
 async def list_candidates(
     search: str = Query(
         "",
-        description="Space-separated search terms (matches across all text fields)",
+        description=(
+            "Space-separated search terms (matches across all text fields); "
+            'supports `field:term`, `"phrases"` and `-term`'
+        ),
+    ),
+    state: str | None = Query(None, description="Exact match on state"),
+    favourite: str | None = Query(None, description="Exact match on favourite"),
+    created_from: datetime | None = Query(
+        None, description="Only candidates created at or after this time"
+    ),
+    created_before: datetime | None = Query(
+        None, description="Only candidates created before this time"
+    ),
+    facets: str = Query(
+        "",
+        description="Comma-separated fields to count values for (state, favourite)",
+    ),
+    sort: str = Query(
+        SortField.first_name.value,
+        description="Sort key(s), e.g. `state,-create_time` (`-` = descending)",
     ),
-    sort: SortField = Query(SortField.first_name, description="Column to sort by"),
     order: Literal["ASC", "DESC"] = Query("ASC"),
     page: int = Query(1, ge=1),
     limit: int = Query(100, ge=1, le=500),
@@ -60,49 +84,76 @@ async def list_candidates(
     - Each term can match ANY of: first_name, last_name,
       email, state (OR within a term).
     - Matching is case-insensitive and supports partial/substring matches.
+    - ``field:term`` scopes a term to one column (``state:texas``),
+      ``"quoted phrases"`` match as one substring and ``-term`` excludes.
+    - ``state`` / ``favourite`` are exact-match filters ANDed with the terms.
+    - ``created_from`` / ``created_before`` bound ``create_time`` and let
+      Postgres prune the table's monthly partitions.
+
+    **Facets:** ``facets=state,favourite`` adds per-value counts for the
+    filtered set (all pages), computed in one grouped query.
+
+    **Sorting:** one key or an allowlisted combination such as
+    ``state,-create_time``; ``id`` is always the final tiebreaker.
 
     **Query optimization:**
     - GIN trigram indexes on text columns accelerate ILIKE '%term%' searches.
-    - B-tree indexes on sort columns support efficient ORDER BY + LIMIT/OFFSET.
+    - B-tree indexes on every allowed sort (ending in ``id``) support
+      efficient ORDER BY + LIMIT/OFFSET without an in-memory sort.
+    - Deep pages of the unfiltered listing seek from sparse page anchors
+      (``app.page_anchors``) instead of scanning past ``OFFSET`` rows.
     - The count query and the data query share the same WHERE clause; Postgres
       can reuse the filtered set when both run in the same transaction.
+    - With ``SEARCH_ENGINE=memory`` the whole query is answered by the
+      in-process engine (see ``app.memory_engine``) with identical results.
     """
-    # Build WHERE clause: each search term must appear in at least one column
-    terms = search.strip().split() if search.strip() else []
-    filters = []
-    for term in terms:
-        pattern = f"%{term}%"
-        term_filter = or_(*(col.ilike(pattern) for col in SEARCH_COLUMNS))
-        filters.append(term_filter)
+    facet_fields = parse_facets(facets)
+    sort_keys = parse_sort(sort, descending=order == "DESC")
 
-    # Total count (filtered)
-    count_stmt = select(func.count()).select_from(Candidate)
-    if filters:
-        count_stmt = count_stmt.where(*filters)
-    total = (await db.execute(count_stmt)).scalar_one()
-
-    # Data query with sort + pagination
-    sort_col = getattr(Candidate, sort.value)
-    order_clause = sort_col.desc() if order == "DESC" else sort_col.asc()
-
-    data_stmt = (
-        (
-            select(Candidate)
-            .where(*filters)
-            .order_by(order_clause)
-            .offset((page - 1) * limit)
-            .limit(limit)
+    terms = parse_query(search)
+    if (
+        settings.search_engine == "memory"
+        and len(sort_keys) == 1
+        and created_from is None
+        and created_before is None
+        and memory_engine.supports(terms)
+    ):
+        result = memory_engine.query(
+            terms,
+            sort=sort_keys[0][0],
+            descending=sort_keys[0][1],
+            offset=(page - 1) * limit,
+            limit=limit,
+            state=state,
+            favourite=favourite,
+            facet_fields=facet_fields,
         )
-        if filters
-        else (
-            select(Candidate)
-            .order_by(order_clause)
-            .offset((page - 1) * limit)
-            .limit(limit)
+        return PaginatedCandidates(
+            data=[CandidateOut.model_validate(r) for r in result.rows],
+            total=result.total,
+            page=page,
+            limit=limit,
+            pages=max(1, -(-result.total // limit)),
+            facets=result.facets or None,
         )
+
+    # Build WHERE clause: each search term must appear in at least one column
+    filters = build_filters(
+        search,
+        state=state,
+        favourite=favourite,
+        created_from=created_from,
+        created_before=created_before,
     )
 
-    rows = (await db.execute(data_stmt)).scalars().all()
+    # Total count (filtered)
+    total = (await db.execute(count_stmt(filters))).scalar_one()
+
+    # Data query with sort + pagination; id breaks ties so pages are stable.
+    # Deep unfiltered jumps seek from a page anchor instead of OFFSET.
+    rows = await fetch_page(
+        db, filters, sort_keys, offset=(page - 1) * limit, limit=limit, total=total
+    )
 
     return PaginatedCandidates(
         data=[CandidateOut.model_validate(r) for r in rows],
@@ -110,17 +161,158 @@ async def list_candidates(
         page=page,
         limit=limit,
         pages=max(1, -(-total // limit)),  # ceil division
+        facets=await compute_facets(db, filters, facet_fields) or None,
+    )
+
+
+@router.get("/candidates/changes", response_model=CandidateChanges)
+async def list_candidate_changes(
+    since: str | None = Query(
+        None,
+        description="Cursor from a previous next_cursor; omit for a full sync",
+    ),
+    limit: int = Query(1000, ge=1, le=5000),
+    db: AsyncSession = Depends(get_db),
+):
+    """Return candidates inserted, updated or soft-deleted after a cursor.
+
+    Rows come back in ``(updated_at, id)`` order, served by the
+    ``ix_candidates_updated_at_id`` index, so each batch is a keyset
+    range scan rather than a full export.  Deleted rows are included
+    with ``deleted_at`` set.  Keep calling with ``since=next_cursor``
+    until ``has_more`` is false, then store ``next_cursor`` for the next
+    sync.
+
+    A row appears only once no open transaction could still commit a
+    row behind it (see :mod:`app.changes`), so a long import delays the
+    feed instead of slipping past consumers' cursors.
+    """
+    after = decode_cursor(since) if since else None
+    postgres = db.get_bind().dialect.name == "postgresql"
+    stmt = (
+        select(Candidate)
+        .where(*change_filters(after, postgres))
+        .order_by(Candidate.updated_at, Candidate.id)
+        .limit(limit + 1)
+    )
+    rows = (await db.execute(stmt)).scalars().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = encode_cursor((rows[-1].updated_at, rows[-1].id)) if rows else since
+
+    return CandidateChanges(
+        data=[CandidateChange.model_validate(r) for r in rows],
+        next_cursor=next_cursor,
+        has_more=has_more,
     )
 
 
+@router.get("/candidates/duplicates", response_model=DuplicateReport)
+async def list_duplicate_candidates(
+    by: Literal["name", "email"] = Query("name", description="Key to compare"),
+    threshold: float = Query(0.5, ge=0, le=1, description="Minimum similarity"),
+    after_id: int = Query(0, ge=0, description="Resume after this candidate id"),
+    batch: int = Query(500, ge=1, le=5000, description="Candidates per batch"),
+    neighbours: int = Query(5, ge=1, le=50, description="Neighbours per candidate"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Batch dedupe report: likely duplicate pairs for one id range.
+
+    Each candidate in the batch is compared with its ``neighbours``
+    nearest higher-id candidates via a GiST-backed trigram KNN lookup,
+    so the report costs ``batch`` index probes rather than a pairwise
+    scan.  Pass ``next_after_id`` back as ``after_id`` until it is null.
+    """
+    pairs, last_id = await find_duplicates(
+        db,
+        by=by,
+        after_id=after_id,
+        batch=batch,
+        neighbours=neighbours,
+        threshold=threshold,
+    )
+    return DuplicateReport(
+        pairs=[DuplicatePairOut(**vars(p)) for p in pairs],
+        next_after_id=last_id,
+    )
+
+
+@router.get("/candidates/lookup", response_model=LookupResults)
+async def lookup_candidates_by_key(
+    email: list[str] = Query([], description="Email(s) to look up (repeatable)"),
+    phone: list[str] = Query([], description="Phone number(s) (repeatable)"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Exact-match lookup by normalized email and/or phone number.
+
+    Emails match case-insensitively and phones on their digits only
+    (``(555) 000-1234`` equals ``555.000.1234``).  Each value is one
+    index probe on ``email_lower`` / ``phone_digits``; all values are
+    resolved in a single query, and soft-deleted candidates never
+    match.  Use ``POST /external/candidates/lookup`` for long lists.
+    """
+    return LookupResults(results=await lookup_candidates(db, email, phone))
+
+
+@router.post("/candidates/lookup", response_model=LookupResults)
+async def lookup_candidates_batch(
+    body: LookupRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """Batch form of ``GET /external/candidates/lookup`` (JSON body)."""
+    return LookupResults(results=await lookup_candidates(db, body.email, body.phone))
+
+
+@router.get("/stats/query-cache")
+async def query_cache_stats():
+    """Hit rates of the compiled-statement and prepared-statement caches."""
+    return query_cache.stats.as_dict()
+
+
+@router.get("/stats/entity-cache")
+async def entity_cache_stats():
+    """Size, hit rate and invalidation counters of the entity cache."""
+    return entity_cache.as_dict()
+
+
+@router.get("/stats/page-anchors")
+async def page_anchor_stats():
+    """Anchored vs OFFSET page counts and per-sort-key anchor segments."""
+    return page_anchors.as_dict()
+
+
 @router.get("/candidates/{candidate_id}", response_model=CandidateOut)
 async def get_candidate(
     candidate_id: int,
     db: AsyncSession = Depends(get_db),
 ):
-    """Get a single candidate by ID."""
-    result = await db.execute(select(Candidate).where(Candidate.id == candidate_id))
+    """Get a single candidate by ID (through the entity cache when enabled)."""
+    return await candidate_response(db, candidate_id, CandidateOut)
+
+
+@router.get("/candidates/{candidate_id}/similar", response_model=SimilarCandidates)
+async def get_similar_candidates(
+    candidate_id: int,
+    by: Literal["name", "email"] = Query("name", description="Key to compare"),
+    threshold: float = Query(0.3, ge=0, le=1, description="Minimum similarity"),
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    """Nearest candidates by trigram similarity of name or email.
+
+    Ordered by ``pg_trgm`` distance (``<->``) so the GiST index returns
+    the closest rows first and stops after ``limit``; results below
+    ``threshold`` are dropped.
+    """
+    result = await db.execute(by_id_stmt(candidate_id))
     candidate = result.scalar_one_or_none()
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
-    return CandidateOut.model_validate(candidate)
+
+    matches = await find_similar(db, candidate, by=by, limit=limit, threshold=threshold)
+    return SimilarCandidates(
+        data=[
+            SimilarCandidate(**CandidateOut.model_validate(c).model_dump(), score=s)
+            for c, s in matches
+        ]
+    )
@@ -0,0 +1,63 @@
+"""Admin routes, guarded by ``X-Admin-Key``.
+
+Profiles recorded by :mod:`app.profiling` are listed and served here,
+as JSON, as folded stacks (for speedscope or ``flamegraph.pl``) and as
+an SVG flamegraph.  ``/admin/indexes`` reports index usage
+(:mod:`app.index_report`).
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.auth import require_admin_key
+from app.database import get_db
+from app.index_report import index_report
+from app.profiling import folded, profile_store, render_flamegraph
+
+admin_router = APIRouter(prefix="/admin", dependencies=[Depends(require_admin_key)])
+
+
+def _load(profile_id: str) -> dict:
+    record = profile_store.get(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return record
+
+
+@admin_router.get("/profiles")
+async def list_profiles():
+    """Summaries of the stored profiles, newest first."""
+    return {"data": profile_store.summaries()}
+
+
+@admin_router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    """One profile: timings, SQL statements, breakdown and raw samples."""
+    return _load(profile_id)
+
+
+@admin_router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+async def get_profile_folded(profile_id: str):
+    """The profile's samples as folded stacks, one ``a;b;c count`` per line."""
+    return folded(_load(profile_id)["samples"])
+
+
+@admin_router.get("/profiles/{profile_id}/flamegraph")
+async def get_profile_flamegraph(profile_id: str):
+    """The profile rendered as an SVG flamegraph."""
+    record = _load(profile_id)
+    title = f"{record['method']} {record['path']} {record['wall_ms']} ms"
+    svg = render_flamegraph(record["samples"], title)
+    return Response(svg, media_type="image/svg+xml")
+
+
+@admin_router.get("/indexes")
+async def get_index_report(
+    plans: bool = Query(True, description="Run the EXPLAIN plan checks"),
+    db: AsyncSession = Depends(get_db),
+):
+    """Usage, size, bloat and drop verdict of every index on candidates."""
+    if db.get_bind().dialect.name != "postgresql":
+        raise HTTPException(status_code=400, detail="Index report requires PostgreSQL")
+    return (await index_report(db, check_plans=plans)).as_dict()
@@ -5,27 +5,25 @@ Node.js backend handles Google OAuth sessions; here we provide a
 dev-mode bypass so the frontend can render without a real OAuth flow.
 """
 
+from datetime import datetime
 from typing import Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
+from app.entity_cache import candidate_response
+from app.facets import compute_facets, parse_facets
 from app.models import Candidate
+from app.page_anchors import fetch_page
+from app.queries import by_id_stmt, count_stmt
 from app.schemas import CandidateFull, PaginatedCandidatesFull
+from app.search import build_filters
+from app.signing import object_key, presigned_urls
+from app.sorting import parse_sort
 
 internal_router = APIRouter()
 
-# Columns searched by the multi-word ILIKE filter (matches Node.js)
-_SEARCH_COLS = [
-    Candidate.favourite,
-    Candidate.first_name,
-    Candidate.last_name,
-    Candidate.email,
-    Candidate.state,
-]
-
 
 # ── Auth stubs (dev mode) ───────────────────────────────────────────
 
@@ -67,74 +65,131 @@ async def me():
 # ── Candidates (internal, all fields) ───────────────────────────────
 
 
+def _file_keys(candidate: Candidate | CandidateFull) -> tuple[str, str]:
+    """Bucket keys of ``candidate``'s CV and photo (``""`` when unset)."""
+    return (
+        object_key(candidate.upload_file) if candidate.upload_file else "",
+        object_key(candidate.upload_photo, photo=True)
+        if candidate.upload_photo
+        else "",
+    )
+
+
+def _sign_files(candidates: list[CandidateFull]) -> list[CandidateFull]:
+    """Fill ``upload_*_url`` for a whole page in one batched signing pass."""
+    keys = [_file_keys(c) for c in candidates]
+    urls = presigned_urls.urls(key for pair in keys for key in pair)
+    for c, (file_key, photo_key) in zip(candidates, keys, strict=True):
+        c.upload_file_url = urls.get(file_key)
+        c.upload_photo_url = urls.get(photo_key)
+    return candidates
+
+
 @internal_router.get(
     "/api/candidates",
     response_model=PaginatedCandidatesFull,
+    response_model_exclude_none=True,
 )
 async def list_candidates_internal(
     search: str = Query(""),
+    state: str | None = Query(None),
+    favourite: str | None = Query(None),
+    created_from: datetime | None = Query(None),
+    created_before: datetime | None = Query(None),
+    facets: str = Query(""),
     sort: str = Query("create_time"),
     order: Literal["asc", "desc", "ASC", "DESC"] = Query("desc"),
     page: int = Query(1, ge=1),
     limit: int = Query(100, ge=1, le=500),
+    signed_urls: bool = Query(False),
     db: AsyncSession = Depends(get_db),
 ):
     """List all candidate fields with search, sort, and pagination.
 
     Mirrors the Node.js GET /api/candidates endpoint used by the
-    React frontend.
+    React frontend.  ``state``/``favourite``, ``created_from`` /
+    ``created_before``, ``facets`` and multi-key ``sort`` behave as on
+    ``/external/candidates``.  With
+    ``signed_urls=true`` each row carries presigned ``upload_file_url``
+    and ``upload_photo_url``, so the page needs no per-file requests.
     """
-    terms = search.strip().split() if search.strip() else []
-    filters = []
-    for term in terms:
-        pattern = f"%{term}%"
-        term_filter = or_(*(col.ilike(pattern) for col in _SEARCH_COLS))
-        filters.append(term_filter)
-
-    count_stmt = select(func.count()).select_from(Candidate)
-    if filters:
-        count_stmt = count_stmt.where(*filters)
-    total = (await db.execute(count_stmt)).scalar_one()
-
-    sort_col = getattr(Candidate, sort, Candidate.create_time)
-    order_clause = sort_col.desc() if order.upper() == "DESC" else sort_col.asc()
+    facet_fields = parse_facets(facets)
+    sort_keys = parse_sort(sort, descending=order.upper() == "DESC")
+    filters = build_filters(
+        search,
+        state=state,
+        favourite=favourite,
+        created_from=created_from,
+        created_before=created_before,
+    )
 
-    base = select(Candidate)
-    if filters:
-        base = base.where(*filters)
-    data_stmt = base.order_by(order_clause).offset((page - 1) * limit).limit(limit)
+    total = (await db.execute(count_stmt(filters))).scalar_one()
 
-    rows = (await db.execute(data_stmt)).scalars().all()
+    # Deep unfiltered jumps seek from a page anchor instead of OFFSET
+    rows = await fetch_page(
+        db, filters, sort_keys, offset=(page - 1) * limit, limit=limit, total=total
+    )
+    data = [CandidateFull.model_validate(r) for r in rows]
 
     return PaginatedCandidatesFull(
-        data=[CandidateFull.model_validate(r) for r in rows],
+        data=_sign_files(data) if signed_urls else data,
         total=total,
+        facets=await compute_facets(db, filters, facet_fields) or None,
     )
 
 
 @internal_router.get(
     "/api/candidates/{candidate_id}",
     response_model=CandidateFull,
+    response_model_exclude_none=True,
 )
 async def get_candidate_internal(
     candidate_id: int,
+    signed_urls: bool = Query(False),
     db: AsyncSession = Depends(get_db),
 ):
-    """Get a single candidate with all fields."""
-    result = await db.execute(select(Candidate).where(Candidate.id == candidate_id))
+    """Get a single candidate with all fields.
+
+    Served from the entity cache when it is enabled, except with
+    ``signed_urls=true``: URLs are signed per request.
+    """
+    if not signed_urls:
+        return await candidate_response(
+            db, candidate_id, CandidateFull, exclude_none=True
+        )
+    result = await db.execute(by_id_stmt(candidate_id))
     candidate = result.scalar_one_or_none()
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found")
-    return CandidateFull.model_validate(candidate)
+    return _sign_files([CandidateFull.model_validate(candidate)])[0]
 
 
-# ── File stub ────────────────────────────────────────────────────────
+# ── Files ────────────────────────────────────────────────────────────
 
 
 @internal_router.get("/api/files/presigned-url")
-async def presigned_url(key: str = Query(...)):
-    """Stub: return a placeholder URL (no real S3 in dev)."""
-    return {"url": f"https://placeholder.example.com/{key}"}
+async def presigned_url(
+    key: str = Query(""),
+    candidate_id: int | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Return a presigned download URL for one of a candidate's files.
+
+    ``key`` must be the candidate's stored ``upload_file`` /
+    ``upload_photo`` value or its bucket key; anything else is a 404, so
+    the route signs only what ``/api/candidates/{id}?signed_urls=true``
+    would.  The check reads that one row by id.  URLs are cached until
+    near expiry.
+    """
+    if not key or candidate_id is None:
+        raise HTTPException(status_code=400, detail="Key and candidate_id required")
+    candidate = (await db.execute(by_id_stmt(candidate_id))).scalar_one_or_none()
+    if candidate is not None:
+        stored = (candidate.upload_file, candidate.upload_photo)
+        for value, bucket_key in zip(stored, _file_keys(candidate), strict=True):
+            if value and key in (value, bucket_key):
+                return {"url": presigned_urls.url(bucket_key)}
+    raise HTTPException(status_code=404, detail="File not found")
 
 
 # ── Health (matches Node.js path) ────────────────────────────────────
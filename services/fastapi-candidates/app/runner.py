@@ -0,0 +1,129 @@
+"""Production server entrypoint: ``python -m app.runner``.
+
+Runs uvicorn with one worker process per available CPU (``WEB_WORKERS``
+overrides), uvloop and httptools when installed, and a graceful shutdown
+timeout.  Each worker has its own SQLAlchemy pool, so the
+``DB_MAX_CONNECTIONS`` budget is divided between workers and passed to
+them as ``DB_POOL_SIZE`` / ``DB_MAX_OVERFLOW``.  That way
+``workers × (pool_size + max_overflow)`` never exceeds what PostgreSQL's
+``max_connections`` leaves for this service.
+
+The uvicorn supervisor restarts workers one at a time on ``SIGHUP``
+(e.g. after a config change) and adds or removes a worker on
+``SIGTTIN`` / ``SIGTTOU``.  ``SIGTERM`` drains in-flight requests before
+exiting.
+"""
+
+import argparse
+import importlib.util
+import logging
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import uvicorn
+
+from app.config import Settings, settings
+
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring affinity and cgroup quotas."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        cpus = os.cpu_count() or 1
+    # Containers (ECS, Kubernetes) usually cap CPU with a CFS quota
+    # rather than affinity, so "8 CPUs" may really be half a core.
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(cpus, 1)
+
+
+@dataclass(frozen=True)
+class WorkerPlan:
+    """Worker count and the per-worker pool sizing derived from settings."""
+
+    workers: int
+    pool_size: int
+    max_overflow: int
+
+    @property
+    def max_connections(self) -> int:
+        """Most connections all workers together can open."""
+        return self.workers * (self.pool_size + self.max_overflow)
+
+
+def plan_workers(config: Settings, cpus: int | None = None) -> WorkerPlan:
+    """Choose the worker count and split the connection budget across it.
+
+    With ``DB_MAX_CONNECTIONS`` unset (0) every worker keeps the
+    configured ``DB_POOL_SIZE`` / ``DB_MAX_OVERFLOW``.  Otherwise each
+    worker gets ``budget // workers`` connections, steady-state pool first
+    and the remainder as overflow; workers are reduced if the budget
+    cannot give each at least one connection.
+    """
+    workers = config.web_workers or (cpus or available_cpus())
+    budget = config.db_max_connections
+    if not budget:
+        return WorkerPlan(workers, config.db_pool_size, config.db_max_overflow)
+
+    workers = max(1, min(workers, budget))
+    per_worker = budget // workers
+    pool_size = min(config.db_pool_size, per_worker)
+    return WorkerPlan(workers, pool_size, per_worker - pool_size)
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Start uvicorn with the planned workers and pool sizing."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, help="override WEB_WORKERS")
+    args = parser.parse_args(argv)
+
+    if args.workers:
+        settings.web_workers = args.workers
+    plan = plan_workers(settings)
+    # Workers are fresh processes that build Settings from the environment
+    os.environ["DB_POOL_SIZE"] = str(plan.pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(plan.max_overflow)
+    logging.basicConfig(level=logging.INFO)
+    logger.info(
+        "starting %d worker(s), pool %d + overflow %d each (max %d connections)",
+        plan.workers,
+        plan.pool_size,
+        plan.max_overflow,
+        plan.max_connections,
+    )
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=plan.workers,
+        loop="uvloop" if _installed("uvloop") else "auto",
+        http="httptools" if _installed("httptools") else "auto",
+        timeout_graceful_shutdown=settings.web_graceful_timeout,
+        # Recycle workers periodically; jitter (uvicorn >= 0.41) avoids
+        # restarting them all at once
+        limit_max_requests=settings.web_max_requests or None,
+        limit_max_requests_jitter=settings.web_max_requests // 10,
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
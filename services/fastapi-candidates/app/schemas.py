@@ -1,6 +1,7 @@
 """Pydantic response schemas for candidate endpoints."""
 
 from datetime import datetime
+from typing import Literal
 
 from pydantic import BaseModel
 
@@ -26,6 +27,71 @@ class PaginatedCandidates(BaseModel):
     page: int
     limit: int
     pages: int
+    facets: dict[str, dict[str, int]] | None = None
+
+
+class CandidateChange(CandidateOut):
+    """Changed candidate row in the delta feed (``deleted_at`` set if removed)."""
+
+    updated_at: datetime
+    deleted_at: datetime | None
+
+
+class CandidateChanges(BaseModel):
+    """One batch of the change feed plus the cursor to resume from."""
+
+    data: list[CandidateChange]
+    next_cursor: str | None
+    has_more: bool
+
+
+class SimilarCandidate(CandidateOut):
+    """Candidate with its trigram similarity to the requested one."""
+
+    score: float
+
+
+class SimilarCandidates(BaseModel):
+    """Nearest candidates, most similar first."""
+
+    data: list[SimilarCandidate]
+
+
+class DuplicatePairOut(BaseModel):
+    """Likely duplicate pair (``id`` < ``duplicate_id``) and its score."""
+
+    id: int
+    duplicate_id: int
+    score: float
+
+
+class DuplicateReport(BaseModel):
+    """One batch of the dedupe report and where to resume."""
+
+    pairs: list[DuplicatePairOut]
+    next_after_id: int | None
+
+
+class LookupRequest(BaseModel):
+    """Batch lookup: emails and/or phone numbers to resolve."""
+
+    email: list[str] = []
+    phone: list[str] = []
+
+
+class LookupMatch(BaseModel):
+    """Live candidates whose normalized email or phone equals one value."""
+
+    by: Literal["email", "phone"]
+    value: str
+    normalized: str
+    data: list[CandidateOut]
+
+
+class LookupResults(BaseModel):
+    """One match list per requested value, in request order."""
+
+    results: list[LookupMatch]
 
 
 class CandidateFull(BaseModel):
@@ -42,6 +108,9 @@ class CandidateFull(BaseModel):
     notes: str
     upload_file: str
     upload_photo: str
+    # Presigned download URLs, present only when ``signed_urls=true``
+    upload_file_url: str | None = None
+    upload_photo_url: str | None = None
 
     model_config = {"from_attributes": True}
 
@@ -51,3 +120,4 @@ class PaginatedCandidatesFull(BaseModel):
 
     data: list[CandidateFull]
     total: int
+    facets: dict[str, dict[str, int]] | None = None
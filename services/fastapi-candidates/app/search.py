@@ -0,0 +1,237 @@
+"""Shared WHERE-clause construction for the candidate list endpoints.
+
+``search`` is parsed by :mod:`app.query_parser`.  A plain term is an OR
+of ``ILIKE`` across ``SEARCH_COLUMNS``.  A field-scoped term
+(``state:texas``) is one ``ILIKE`` on its column, so Postgres probes a
+single trigram index.  A negated term (``-term``) excludes matches.
+
+Search filters are built in a small, fixed set of statement *shapes*
+with no duplicated predicates.  The most selective indexable plain term
+keeps its own predicate, which Postgres drives the scan from.  Every
+other plain term is bound into one array parameter, ``:terms``, checked
+by a single :class:`ContainsAll` predicate.  ``"ann"`` and ``"ann smith
+lee"`` therefore compile to two shapes, whatever the number of terms.
+SQLAlchemy's compiled cache and asyncpg's per-connection prepared
+statement cache reuse those shapes instead of seeing a new SQL string
+per term count.  The planner sees each array element once, so its
+estimate is not skewed by repeated patterns.
+
+Short terms (see :mod:`app.query_parser`) avoid the trigram indexes,
+which cannot serve them.  A short term next to a longer one goes into
+``:terms``, and ``ILIKE ALL`` matches no index, so Postgres drives the
+scan from the longer term's index and only re-checks the short term on
+the rows found.  A prefix term is a range on ``lower(col)`` served by
+the ``text_pattern_ops`` indexes from migration 007.  Terms that contain
+``LIKE`` wildcards keep their own predicate, since their characters are
+not literal inside the joined columns.
+"""
+
+import json
+from datetime import UTC, datetime
+
+from sqlalchemy import Boolean, ColumnElement, String, and_, bindparam, func, or_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import TypeDecorator
+
+from app.models import Candidate
+from app.query_parser import (
+    MIN_TRIGRAM_LENGTH,
+    Term,
+    estimated_selectivity,
+    parse_query,
+)
+
+# Searchable columns — used for multi-word ILIKE filtering (matches Node.js)
+SEARCH_COLUMNS = [
+    Candidate.favourite,
+    Candidate.first_name,
+    Candidate.last_name,
+    Candidate.email,
+    Candidate.state,
+]
+
+# Soft-deleted rows are only visible through the change feed
+NOT_DELETED = Candidate.deleted_at.is_(None)
+
+
+# Joins the columns in the text ContainsAll matches.  No array term
+# contains it, so a term can only match inside one column.
+SEPARATOR = "\x1f"
+
+# Characters that LIKE would not take literally; terms containing them
+# (or SEPARATOR) keep their own predicate
+_UNSAFE = frozenset("%_\\" + SEPARATOR)
+
+
+class LowerPrefix(FunctionElement):
+    """``lower(col)`` starts with a prefix, as a ``[start, end)`` range.
+
+    On Postgres this uses the ``~>=~`` / ``~<~`` pattern operators that a
+    ``text_pattern_ops`` index serves.  Unlike ``LIKE 'jo%'``, they keep
+    using the index when the prefix is a bound parameter in a generic
+    prepared plan.  Other dialects compare with ``>=`` / ``<``.
+    """
+
+    type = Boolean()
+    inherit_cache = True
+    name = "lower_prefix"
+
+
+@compiles(LowerPrefix)
+def _compile_lower_prefix(element, compiler, **kw):
+    col, start, end = (compiler.process(c, **kw) for c in element.clauses)
+    ge, lt = ("~>=~", "~<~") if compiler.dialect.name == "postgresql" else (">=", "<")
+    return f"(lower({col}) {ge} {start} AND lower({col}) {lt} {end})"
+
+
+class _PatternList(TypeDecorator):
+    """A list of ``LIKE`` patterns: ``text[]`` on Postgres, JSON elsewhere."""
+
+    impl = String
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(ARRAY(String))
+        return dialect.type_descriptor(String())
+
+    def process_bind_param(self, value, dialect):
+        return value if dialect.name == "postgresql" else json.dumps(value)
+
+
+class ContainsAll(FunctionElement):
+    """Every pattern in ``patterns`` matches the row's search columns.
+
+    The columns are joined with ``SEPARATOR`` behind a leading one, so
+    ``%ann%`` matches when any column contains ``ann`` and ``%<SEP>jo%``
+    when any column starts with ``jo``.  On Postgres this is ``ILIKE
+    ALL`` over a ``text[]`` parameter; other dialects (SQLite, in the
+    tests) iterate a JSON array with ``json_each``.
+    """
+
+    type = Boolean()
+    inherit_cache = True
+    name = "contains_all"
+
+
+@compiles(ContainsAll)
+def _compile_contains_all(element, compiler, **kw):
+    patterns, *columns = (compiler.process(c, **kw) for c in element.clauses)
+    if compiler.dialect.name == "postgresql":
+        return f"concat_ws(chr(31), '', {', '.join(columns)}) ILIKE ALL ({patterns})"
+    document = " || ".join(
+        ["char(31)"] + [f"coalesce({col}, '') || char(31)" for col in columns]
+    )
+    return (
+        f"(NOT EXISTS (SELECT 1 FROM json_each({patterns}) AS search_pattern "
+        f"WHERE lower({document}) NOT LIKE search_pattern.value))"
+    )
+
+
+def _prefix_end(prefix: str) -> str:
+    """Smallest string greater than every string starting with ``prefix``."""
+    return prefix[:-1] + chr(min(ord(prefix[-1]) + 1, 0x10FFFF))
+
+
+def _term_filter(term: Term, name: str) -> ColumnElement[bool]:
+    columns = [getattr(Candidate, term.field)] if term.field else SEARCH_COLUMNS
+    if term.prefix:
+        start = bindparam(name, term.text, type_=String)
+        end = bindparam(f"{name}_end", _prefix_end(term.text), type_=String)
+        return or_(*(LowerPrefix(col, start, end) for col in columns))
+    pattern = bindparam(name, f"%{term.text}%", type_=String)
+    if term.negated:
+        # NULL never contains the term, so it must not hide the row either
+        return and_(*(or_(col.is_(None), col.not_ilike(pattern)) for col in columns))
+    if len(term.text) < MIN_TRIGRAM_LENGTH:
+        # Re-check only: lower(col) matches no index, so the planner cannot
+        # pick a full trigram-index scan for a term with no trigrams
+        return or_(*(func.lower(col).like(pattern) for col in columns))
+    return or_(*(col.ilike(pattern) for col in columns))
+
+
+def _driver(terms: list[Term]) -> int | None:
+    """Index of the plain term Postgres should drive the scan from.
+
+    That is the most selective one an index can find: a prefix term, or a
+    term long enough for the trigram indexes.
+    """
+    indexable = [
+        i
+        for i, t in enumerate(terms)
+        if t.field is None
+        and not t.negated
+        and (t.prefix or len(t.text) >= MIN_TRIGRAM_LENGTH)
+    ]
+    return min(indexable, key=lambda i: estimated_selectivity(terms[i]), default=None)
+
+
+def _array_pattern(term: Term) -> str | None:
+    """``term`` as a :class:`ContainsAll` pattern, if it can be one."""
+    if term.field or term.negated or _UNSAFE.intersection(term.text):
+        return None
+    return f"%{SEPARATOR}{term.text}%" if term.prefix else f"%{term.text}%"
+
+
+def term_filters(terms: list[Term]) -> list[ColumnElement[bool]]:
+    """One predicate per parsed term, other plain terms bound as one array."""
+    filters: list[ColumnElement[bool]] = []
+    patterns: list[str] = []
+    driver = _driver(terms)
+    for i, term in enumerate(terms):
+        pattern = _array_pattern(term) if i != driver else None
+        if pattern is not None:
+            patterns.append(pattern)
+            continue
+        # Scoped names can't collide with anonymous binds like "state_1";
+        # the driver's is fixed, so word order doesn't change the SQL
+        name = f"{term.field}_term_{i}" if term.field else f"term_{i}"
+        name = "term" if i == driver else name
+        filters.append(_term_filter(term, f"not_{name}" if term.negated else name))
+    if patterns:
+        terms_param = bindparam("terms", patterns, type_=_PatternList)
+        filters.append(ContainsAll(terms_param, *SEARCH_COLUMNS))
+    return filters
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """``create_time`` is stored as naive UTC; normalise aware inputs."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
+
+
+def build_filters(
+    search: str = "",
+    state: str | None = None,
+    favourite: str | None = None,
+    created_from: datetime | None = None,
+    created_before: datetime | None = None,
+) -> list[ColumnElement[bool]]:
+    """Build the user-supplied WHERE clauses for list, count and facet queries.
+
+    Each plain search term must appear in at least one of
+    ``SEARCH_COLUMNS`` (AND across terms, OR across columns); scoped and
+    negated terms are described in :mod:`app.query_parser`.  ``state`` and ``favourite``
+    are exact equality filters so Postgres can use the B-tree indexes
+    ``ix_candidates_state_id`` / ``ix_candidates_favourite_id`` instead of
+    the trigram indexes.  ``created_from`` (inclusive) and
+    ``created_before`` (exclusive) bound ``create_time``; on the
+    partitioned table they let Postgres prune every monthly partition
+    outside the range.
+
+    The soft-delete predicate ``NOT_DELETED`` is not included; callers
+    add it alongside these filters.
+    """
+    filters = term_filters(parse_query(search))
+    if state is not None:
+        filters.append(Candidate.state == state)
+    if favourite is not None:
+        filters.append(Candidate.favourite == favourite)
+    if created_from is not None:
+        filters.append(Candidate.create_time >= _naive_utc(created_from))
+    if created_before is not None:
+        filters.append(Candidate.create_time < _naive_utc(created_before))
+    return filters
@@ -0,0 +1,224 @@
+"""Presigned download URLs for candidate files.
+
+URLs are signed locally with HMAC, so no request leaves the process:
+:class:`S3Signer` produces S3-compatible SigV4 query-string URLs (AWS or
+any endpoint such as MinIO), and :class:`LocalSigner` is a stand-in for
+development that signs ``FILE_URL_BASE/<key>`` with a shared secret.
+
+:class:`PresignedURLCache` keeps each URL until shortly before it
+expires, so listing a page with ``signed_urls=true`` signs only keys it
+has not seen recently and costs no extra requests from the frontend.
+"""
+
+import hashlib
+import hmac
+import secrets
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from typing import Protocol
+from urllib.parse import quote, urlencode, urlsplit
+
+from app.config import Settings, settings
+
+
+class Signer(Protocol):
+    """Signs a URL for ``key`` that stays valid for ``ttl`` seconds."""
+
+    ttl: int
+
+    def presign(self, key: str, now: float) -> str:
+        """Return a URL for ``key`` signed at epoch time ``now``."""
+        ...
+
+
+def object_key(stored: str, photo: bool = False) -> str:
+    """Bucket key of a stored ``upload_file`` / ``upload_photo`` value.
+
+    CVs live under ``candidates/`` and photos under ``candidates/photos/``;
+    stored values may omit either prefix (the same mapping the frontend
+    applied before asking for a URL).
+    """
+    key = stored if stored.startswith("candidates/") else f"candidates/{stored}"
+    if photo and "/photos/" not in key:
+        head, _, name = key.rpartition("/")
+        key = f"{head}/photos/{name}"
+    return key
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+
+class S3Signer:
+    """AWS Signature Version 4 query-string presigner for S3 ``GET``.
+
+    ``base_url`` is the bucket URL keys are appended to, e.g.
+    ``https://bucket.s3.eu-west-1.amazonaws.com`` (virtual-hosted) or
+    ``http://minio:9000/bucket`` (path-style).  Temporary credentials
+    (STS, an ECS task role) need their ``session_token``: S3 rejects URLs
+    signed with them that lack ``X-Amz-Security-Token``.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        region: str,
+        access_key: str,
+        secret_key: str,
+        ttl: int = 3600,
+        session_token: str = "",
+    ):
+        """Configure the bucket URL, credentials, and URL lifetime."""
+        parts = urlsplit(base_url.rstrip("/"))
+        self.scheme = parts.scheme
+        self.host = parts.netloc
+        self.prefix = parts.path
+        self.region = region
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.session_token = session_token
+        self.ttl = ttl
+        # The derived signing key only changes once a day
+        self._signing_key: tuple[str, bytes] = ("", b"")
+
+    def _key_for(self, day: str) -> bytes:
+        if self._signing_key[0] != day:
+            k = _hmac(f"AWS4{self.secret_key}".encode(), day)
+            for part in (self.region, "s3", "aws4_request"):
+                k = _hmac(k, part)
+            self._signing_key = (day, k)
+        return self._signing_key[1]
+
+    def presign(self, key: str, now: float) -> str:
+        """Return a SigV4-presigned ``GET`` URL for ``key``."""
+        stamp = datetime.fromtimestamp(int(now), UTC).strftime("%Y%m%dT%H%M%SZ")
+        day = stamp[:8]
+        scope = f"{day}/{self.region}/s3/aws4_request"
+        path = quote(f"{self.prefix}/{key}", safe="/-_.~")
+        params = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self.access_key}/{scope}",
+            "X-Amz-Date": stamp,
+            "X-Amz-Expires": str(self.ttl),
+            "X-Amz-SignedHeaders": "host",
+        }
+        if self.session_token:
+            params["X-Amz-Security-Token"] = self.session_token
+        query = urlencode(sorted(params.items()), quote_via=quote, safe="-_.~")
+        canonical = f"GET\n{path}\n{query}\nhost:{self.host}\n\nhost\nUNSIGNED-PAYLOAD"
+        to_sign = "\n".join(
+            [
+                "AWS4-HMAC-SHA256",
+                stamp,
+                scope,
+                hashlib.sha256(canonical.encode()).hexdigest(),
+            ]
+        )
+        signature = hmac.new(
+            self._key_for(day), to_sign.encode(), hashlib.sha256
+        ).hexdigest()
+        return f"{self.scheme}://{self.host}{path}?{query}&X-Amz-Signature={signature}"
+
+
+class LocalSigner:
+    """Development stand-in: ``<base_url>/<key>?expires=…&signature=…``."""
+
+    def __init__(self, base_url: str, secret: str, ttl: int = 3600):
+        """Configure the file URL prefix, HMAC secret, and URL lifetime."""
+        self.base_url = base_url.rstrip("/")
+        self.secret = secret.encode()
+        self.ttl = ttl
+
+    def _signature(self, key: str, expires: int) -> str:
+        return hmac.new(
+            self.secret, f"{key}\n{expires}".encode(), hashlib.sha256
+        ).hexdigest()
+
+    def presign(self, key: str, now: float) -> str:
+        """Return a URL for ``key`` that expires ``ttl`` seconds after ``now``."""
+        expires = int(now) + self.ttl
+        signature = self._signature(key, expires)
+        path = quote(key, safe="/-_.~")
+        return f"{self.base_url}/{path}?expires={expires}&signature={signature}"
+
+    def verify(self, key: str, expires: int, signature: str, now: float) -> bool:
+        """Check a signature produced by :meth:`presign` and its expiry."""
+        expected = self._signature(key, expires)
+        return now < expires and hmac.compare_digest(expected, signature)
+
+
+class PresignedURLCache:
+    """Bounded LRU of signed URLs, reused until ``margin`` seconds before expiry."""
+
+    def __init__(self, signer: Signer, margin: float = 60.0, max_entries: int = 10000):
+        """Wrap ``signer``; cached URLs are re-signed ``margin`` s early."""
+        self.signer = signer
+        # Never hand out a URL with less than this much validity left
+        self.margin = min(margin, signer.ttl / 2)
+        self.max_entries = max_entries
+        # key -> (reuse_until, url)
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Number of cached URLs."""
+        return len(self._entries)
+
+    def url(self, key: str, now: float | None = None) -> str:
+        """Return a signed URL for ``key``, signing only on a cache miss."""
+        now = time.time() if now is None else now
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        url = self.signer.presign(key, now)
+        self._entries[key] = (now + self.signer.ttl - self.margin, url)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return url
+
+    def urls(self, keys: Iterable[str], now: float | None = None) -> dict[str, str]:
+        """Sign every distinct non-empty key in one pass; ``{key: url}``."""
+        now = time.time() if now is None else now
+        return {key: self.url(key, now) for key in dict.fromkeys(keys) if key}
+
+    def clear(self) -> None:
+        """Drop every cached URL."""
+        self._entries.clear()
+
+
+def build_signer(config: Settings) -> Signer:
+    """Signer selected by ``FILE_SIGNER`` (``local`` or ``s3``)."""
+    if config.file_signer == "s3":
+        base_url = (
+            f"{config.s3_endpoint_url.rstrip('/')}/{config.s3_bucket}"
+            if config.s3_endpoint_url
+            else f"https://{config.s3_bucket}.s3.{config.s3_region}.amazonaws.com"
+        )
+        return S3Signer(
+            base_url,
+            config.s3_region,
+            config.aws_access_key_id,
+            config.aws_secret_access_key,
+            ttl=config.presigned_url_ttl,
+            session_token=config.aws_session_token,
+        )
+    # Without a configured secret, URLs are only valid for this process
+    return LocalSigner(
+        config.file_url_base,
+        config.file_signing_secret or secrets.token_hex(32),
+        ttl=config.presigned_url_ttl,
+    )
+
+
+presigned_urls = PresignedURLCache(
+    build_signer(settings),
+    margin=settings.presigned_url_refresh_margin,
+    max_entries=settings.presigned_url_cache_size,
+)
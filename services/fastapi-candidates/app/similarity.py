@@ -0,0 +1,164 @@
+"""Trigram-similarity lookups for likely duplicate candidates.
+
+On PostgreSQL these use ``pg_trgm``: ``similarity()`` for the score and
+the ``<->`` distance operator for ordering, which the GiST indexes from
+migration 004 serve as a nearest-neighbour (KNN) index scan that stops
+after ``k`` rows.  Other dialects (SQLite in tests) fall back to a
+Python port of ``pg_trgm``'s similarity over a full scan.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Literal
+
+from sqlalchemy import ColumnElement, func, literal_column, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models import Candidate
+from app.search import NOT_DELETED
+
+SimilarityKey = Literal["name", "email"]
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def key_expression(model=Candidate, by: SimilarityKey = "name") -> ColumnElement:
+    """SQL expression compared for ``by``; must match migration 004's indexes."""
+    if by == "email":
+        return model.email
+    # A literal ' ' (not a bound parameter) so the expression index matches
+    return model.first_name + literal_column("' '") + model.last_name
+
+
+def key_value(candidate: Candidate, by: SimilarityKey = "name") -> str:
+    """Python value of :func:`key_expression` for a loaded candidate."""
+    if by == "email":
+        return candidate.email or ""
+    return f"{candidate.first_name or ''} {candidate.last_name or ''}"
+
+
+def trigram_set(value: str) -> set[str]:
+    """Trigrams as ``pg_trgm`` extracts them (lower-cased, per padded word)."""
+    grams: set[str] = set()
+    for word in _WORD.findall(value.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def trigram_similarity(a: str, b: str) -> float:
+    """Port of ``pg_trgm``'s ``similarity(a, b)``."""
+    ga, gb = trigram_set(a), trigram_set(b)
+    if not ga or not gb:
+        return 0.0
+    shared = len(ga & gb)
+    return shared / (len(ga) + len(gb) - shared)
+
+
+@dataclass
+class DuplicatePair:
+    """Two candidates whose keys are at least ``threshold`` similar."""
+
+    id: int
+    duplicate_id: int
+    score: float
+
+
+async def find_similar(
+    db: AsyncSession,
+    candidate: Candidate,
+    by: SimilarityKey,
+    limit: int,
+    threshold: float,
+) -> list[tuple[Candidate, float]]:
+    """Return up to ``limit`` nearest candidates scoring >= ``threshold``."""
+    target = key_value(candidate, by)
+    if db.get_bind().dialect.name != "postgresql":
+        rows = (
+            await db.execute(
+                select(Candidate).where(Candidate.id != candidate.id, NOT_DELETED)
+            )
+        ).scalars()
+        scored = [(c, trigram_similarity(target, key_value(c, by))) for c in rows]
+        scored.sort(key=lambda pair: (-pair[1], pair[0].id))
+        return [(c, s) for c, s in scored[:limit] if s >= threshold]
+
+    key = key_expression(Candidate, by)
+    score = func.similarity(key, target)
+    stmt = (
+        select(Candidate, score)
+        .where(Candidate.id != candidate.id, NOT_DELETED)
+        .order_by(key.op("<->")(target))
+        .limit(limit)
+    )
+    return [(c, s) for c, s in (await db.execute(stmt)).all() if s >= threshold]
+
+
+async def find_duplicates(
+    db: AsyncSession,
+    by: SimilarityKey,
+    after_id: int,
+    batch: int,
+    neighbours: int,
+    threshold: float,
+) -> tuple[list[DuplicatePair], int | None]:
+    """Scan one id-ordered batch for likely duplicates.
+
+    For each candidate ``a`` in the batch, its ``neighbours`` nearest
+    candidates with a larger id are probed (a ``LATERAL`` KNN subquery),
+    so every pair is reported once, by its smaller id.  Returns the
+    pairs and the last id in the batch (``None`` once the table is
+    exhausted) to pass as the next ``after_id``.
+    """
+    ids = (
+        (
+            await db.execute(
+                select(Candidate.id)
+                .where(Candidate.id > after_id, NOT_DELETED)
+                .order_by(Candidate.id)
+                .limit(batch)
+            )
+        )
+        .scalars()
+        .all()
+    )
+    if not ids:
+        return [], None
+
+    if db.get_bind().dialect.name != "postgresql":
+        rows = (await db.execute(select(Candidate).where(NOT_DELETED))).scalars().all()
+        keys = {c.id: key_value(c, by) for c in rows}
+        pairs = []
+        for a in ids:
+            scored = sorted(
+                ((trigram_similarity(keys[a], keys[b]), b) for b in keys if b > a),
+                key=lambda pair: (-pair[0], pair[1]),
+            )[:neighbours]
+            pairs += [DuplicatePair(a, b, s) for s, b in scored if s >= threshold]
+        return pairs, ids[-1]
+
+    a_key = key_expression(Candidate, by)
+    outer = (
+        select(Candidate.id, a_key.label("key"))
+        .where(Candidate.id.between(ids[0], ids[-1]), NOT_DELETED)
+        .subquery("a")
+    )
+    other = aliased(Candidate)
+    b_key = key_expression(other, by)
+    nearest = (
+        select(other.id, b_key.label("key"))
+        .where(other.id > outer.c.id, other.deleted_at.is_(None))
+        .order_by(b_key.op("<->")(outer.c.key))
+        .limit(neighbours)
+        .lateral("b")
+    )
+    score = func.similarity(outer.c.key, nearest.c.key)
+    stmt = (
+        select(outer.c.id, nearest.c.id, score)
+        .select_from(outer.join(nearest, true()))
+        .where(score >= threshold)
+        .order_by(outer.c.id, score.desc())
+    )
+    pairs = [DuplicatePair(a, b, s) for a, b, s in (await db.execute(stmt)).all()]
+    return pairs, ids[-1]
@@ -0,0 +1,99 @@
+"""Sort-key parsing and ORDER BY construction for candidate listings.
+
+``sort`` accepts one key or a comma-separated list, each optionally
+prefixed with ``-`` for descending (``sort=state,-create_time``).  Keys
+without a prefix use the request's ``order`` direction, so the classic
+``sort=first_name&order=DESC`` keeps working.
+
+Only combinations backed by a B-tree index are accepted, so a sorted
+page is always an index scan rather than an in-memory sort of the
+filtered set.  ``id`` is appended as a final tiebreaker in the direction
+of the last key; the matching indexes (migration 005) end in ``id`` too.
+"""
+
+from enum import Enum
+
+from fastapi import HTTPException
+from sqlalchemy import UnaryExpression
+
+from app.models import Candidate
+
+
+class SortField(str, Enum):
+    """Allowed sort columns for candidate listing."""
+
+    first_name = "first_name"
+    last_name = "last_name"
+    email = "email"
+    state = "state"
+    id = "id"
+    favourite = "favourite"
+    create_time = "create_time"
+
+
+# (column name, descending)
+SortKey = tuple[str, bool]
+
+# Multi-key sorts with a composite index, written with the first key
+# ascending ("-" marks a descending key).  The fully reversed direction
+# is served by scanning the same index backwards.
+COMPOSITE_SORTS = {
+    ("state", "create_time"),
+    ("state", "-create_time"),
+    ("favourite", "create_time"),
+    ("favourite", "-create_time"),
+    ("last_name", "first_name"),
+}
+
+
+def parse_sort(sort: str, descending: bool = False) -> list[SortKey]:
+    """Parse and validate a ``sort`` parameter against the allowlist.
+
+    Args:
+        sort: Comma-separated keys, each optionally prefixed with ``-``.
+        descending: Direction for keys given without a prefix.
+
+    Raises:
+        HTTPException: 422 for unknown keys, repeated keys, or a
+            combination without a supporting index.
+    """
+    keys: list[SortKey] = []
+    for raw in (part.strip() for part in sort.split(",")):
+        name = raw.removeprefix("-")
+        if name not in SortField.__members__:
+            allowed = ", ".join(SortField.__members__)
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unknown sort key '{raw}' (allowed: {allowed})",
+            )
+        if any(name == k for k, _ in keys):
+            raise HTTPException(status_code=422, detail=f"Duplicate sort key '{name}'")
+        keys.append((name, True if raw.startswith("-") else descending))
+
+    # Sorting by id already is the tiebreaker; anything after it is moot
+    if len(keys) > 1 and keys[-1][0] == "id":
+        keys.pop()
+    if len(keys) > 1 and _signature(keys) not in COMPOSITE_SORTS:
+        allowed = ", ".join(",".join(combo) for combo in sorted(COMPOSITE_SORTS))
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unsupported sort combination (allowed: {allowed})",
+        )
+    return keys
+
+
+def _signature(keys: list[SortKey]) -> tuple[str, ...]:
+    """Keys normalised so the first is ascending, ``-`` marking descending."""
+    flip = keys[0][1]
+    return tuple(("-" if desc != flip else "") + name for name, desc in keys)
+
+
+def order_by(keys: list[SortKey]) -> tuple[UnaryExpression, ...]:
+    """ORDER BY clauses for ``keys`` plus the ``id`` tiebreaker."""
+    clauses = []
+    for name, desc in keys:
+        col = getattr(Candidate, name)
+        clauses.append(col.desc() if desc else col.asc())
+    if keys[-1][0] != "id":
+        clauses.append(Candidate.id.desc() if keys[-1][1] else Candidate.id.asc())
+    return tuple(clauses)
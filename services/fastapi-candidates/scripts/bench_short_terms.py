@@ -0,0 +1,90 @@
+"""Benchmark short search terms: legacy substring vs the short-term strategy.
+
+For each search string, times the list page + count statements as the
+service used to build them (every term an ``ILIKE '%term%'`` across all
+columns) and as :func:`app.search.build_filters` builds them now, then
+prints the median latency and match count of each.  Point
+``DATABASE_URL`` at a database migrated to head and seeded with a
+realistic number of rows.
+
+    uv run python -m scripts.bench_short_terms --runs 20 --explain
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import ColumnElement, or_, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.queries import count_stmt, page_stmt
+from app.search import SEARCH_COLUMNS, build_filters
+from app.sorting import order_by
+
+SEARCHES = ["j", "jo", "jo sm", "a b", "jo anderson", "an smith"]
+
+
+def legacy_filters(search: str) -> list[ColumnElement[bool]]:
+    """Filters as built before the short-term strategy (substring only)."""
+    return [
+        or_(*(col.ilike(f"%{term}%") for col in SEARCH_COLUMNS))
+        for term in dict.fromkeys(search.split())
+    ]
+
+
+async def _time(db: AsyncSession, filters, runs: int) -> tuple[float, int]:
+    order = order_by([("first_name", False)])
+    timings = []
+    total = 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        total = (await db.execute(count_stmt(filters))).scalar_one()
+        (await db.execute(page_stmt(filters, order, 0, 20))).all()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000, total
+
+
+async def _explain(db: AsyncSession, filters) -> str:
+    stmt = page_stmt(filters, order_by([("first_name", False)]), 0, 20)
+    sql = stmt.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    rows = await db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"))
+    return "\n".join(f"    {line}" for (line,) in rows)
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Time every search both ways and print a comparison table."""
+    engine = create_async_engine(settings.database_url, echo=False)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession)
+    async with session_factory() as db:
+        rows = (await db.execute(count_stmt([]))).scalar_one()
+        print(f"{rows} candidates, median of {args.runs} runs (count + page)")
+        print(f"{'search':<14}{'legacy ms':>11}{'rows':>9}{'now ms':>10}{'rows':>9}")
+        for search in args.searches:
+            # The legacy builder had no query syntax; compare plain words only
+            legacy = await _time(db, legacy_filters(search), args.runs)
+            current = await _time(db, build_filters(search), args.runs)
+            print(
+                f"{search!r:<14}{legacy[0]:>11.1f}{legacy[1]:>9}"
+                f"{current[0]:>10.1f}{current[1]:>9}"
+            )
+            if args.explain and engine.dialect.name == "postgresql":
+                print(await _explain(db, build_filters(search)))
+    await engine.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("searches", nargs="*", default=SEARCHES)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--explain", action="store_true", help="print plans")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
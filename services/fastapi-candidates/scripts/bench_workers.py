@@ -0,0 +1,86 @@
+"""Compare request throughput of the runner at different worker counts.
+
+Starts ``python -m app.runner --workers N`` for each ``N`` in turn, drives
+it with concurrent keep-alive requests for a fixed duration, and prints
+one line per run.  Point ``DATABASE_URL`` at a seeded database first.
+
+    uv run python -m scripts.bench_workers --workers 1 4 --seconds 30
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+from scripts.loadtest import wait_ready
+
+
+async def _drive(base_url: str, path: str, concurrency: int, seconds: float):
+    headers = {"X-API-Key": os.environ.get("EXTERNAL_API_KEY", "")}
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limits
+    ) as client:
+        await wait_ready(client)
+        latencies: list[float] = []
+        errors = 0
+        stop = time.monotonic() + seconds
+
+        async def loop() -> None:
+            nonlocal errors
+            while time.monotonic() < stop:
+                started = time.perf_counter()
+                try:
+                    ok = (await client.get(path)).status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                errors += not ok
+
+        await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def main() -> None:
+    """Run the comparison and print throughput per worker count."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 0])
+    parser.add_argument("--path", default="/external/candidates?limit=20")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        cmd = [sys.executable, "-m", "app.runner", "--port", str(args.port)]
+        if workers:
+            cmd += ["--workers", str(workers)]
+        server = subprocess.Popen(cmd, stderr=subprocess.DEVNULL)
+        try:
+            latencies, errors = asyncio.run(
+                _drive(
+                    f"http://127.0.0.1:{args.port}",
+                    args.path,
+                    args.concurrency,
+                    args.seconds,
+                )
+            )
+        finally:
+            server.terminate()
+            server.wait()
+        cuts = statistics.quantiles(latencies, n=100)
+        print(
+            f"workers={workers or 'auto'}: "
+            f"{len(latencies) / args.seconds:.0f} req/s, "
+            f"p50 {cuts[49] * 1000:.1f} ms, p99 {cuts[98] * 1000:.1f} ms, "
+            f"errors {errors}"
+        )
+
+
+if __name__ == "__main__":
+    main()
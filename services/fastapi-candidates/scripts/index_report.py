@@ -0,0 +1,126 @@
+"""Report index usage on candidates and generate a guarded drop migration.
+
+Prints every index with its size, scans since the statistics were reset,
+estimated bloat, the API paths that need it and its verdict (``unused``,
+``redundant:<other>``, ``no_known_use``).  See :mod:`app.index_report`.
+Point ``DATABASE_URL`` at the production database (or a replica with
+the same statistics) after a representative period of traffic.
+
+    uv run python -m scripts.index_report
+    uv run python -m scripts.index_report --json > indexes.json
+    uv run python -m scripts.index_report --generate-migration
+    uv run python -m scripts.index_report --generate-migration --drop NAME
+"""
+
+import argparse
+import asyncio
+import json
+import re
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.index_report import IndexReport, index_report, render_drop_migration
+
+VERSIONS = Path(__file__).resolve().parent.parent / "alembic" / "versions"
+
+
+def _mb(size: int) -> str:
+    return f"{size / 1024 / 1024:.1f}"
+
+
+def _print(report: IndexReport) -> None:
+    summary = report.as_dict()
+    print(
+        f"{summary['rows']} rows, table {_mb(summary['table_bytes'])} MB, "
+        f"{summary['indexes_per_write']} indexes "
+        f"{_mb(summary['index_bytes'])} MB; stats since {summary['stats_reset']}"
+    )
+    print(f"{'index':<42}{'type':<6}{'MB':>8}{'scans':>11}{'bloat':>7}  verdict")
+    for i in report.indexes:
+        bloat = f"{i.bloat:.0%}" if i.bloat is not None else "-"
+        verdict = ", ".join(i.flags) or "ok"
+        if i.droppable:
+            verdict += " -> droppable"
+        elif "no_known_use" in i.flags and not (i.is_primary or i.is_unique):
+            verdict += " -> unguarded, drop only with --drop"
+        print(
+            f"{i.name:<42}{i.method:<6}{_mb(i.bytes):>8}{i.scans:>11}"
+            f"{bloat:>7}  {verdict}"
+        )
+        for path in i.used_by:
+            chosen = "planner picks it" if path in i.chosen_by else "not picked"
+            print(f"{'':<4}{path} ({chosen})")
+    print(
+        f"droppable: {', '.join(summary['droppable']) or 'none'} "
+        f"({_mb(summary['droppable_bytes'])} MB)"
+    )
+
+
+def _write_migration(report: IndexReport, names: list[str] | None) -> Path | None:
+    by_name = {i.name: i for i in report.indexes}
+    unknown = [n for n in names or [] if n not in by_name]
+    if unknown:
+        raise SystemExit(f"unknown index: {', '.join(unknown)}")
+    chosen = (
+        [by_name[n] for n in names]
+        if names
+        else [i for i in report.indexes if i.droppable]
+    )
+    if not chosen:
+        print("nothing to drop")
+        return None
+    head = max(
+        int(m.group(1))
+        for p in VERSIONS.glob("*.py")
+        if (m := re.match(r"(\d{3})_", p.name))
+    )
+    revision, down = f"{head + 1:03d}", f"{head:03d}"
+    path = VERSIONS / f"{revision}_drop_unused_indexes.py"
+    path.write_text(render_drop_migration(chosen, revision, down))
+    print(f"wrote {path} dropping {', '.join(i.name for i in chosen)}")
+    return path
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Build the report, then print it and/or write the migration."""
+    engine = create_async_engine(settings.database_url, echo=False)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession)
+    async with session_factory() as db:
+        if db.get_bind().dialect.name != "postgresql":
+            raise SystemExit("the index report requires PostgreSQL")
+        report = await index_report(db, check_plans=not args.no_plans)
+    await engine.dispose()
+
+    if args.json:
+        print(json.dumps(report.as_dict(), indent=2, default=str))
+    else:
+        _print(report)
+    if args.generate_migration:
+        _write_migration(report, args.drop)
+
+
+def main() -> None:
+    """Parse arguments and run the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    parser.add_argument(
+        "--no-plans", action="store_true", help="skip the EXPLAIN plan checks"
+    )
+    parser.add_argument(
+        "--generate-migration",
+        action="store_true",
+        help="write an Alembic migration dropping the droppable indexes",
+    )
+    parser.add_argument(
+        "--drop",
+        nargs="+",
+        metavar="INDEX",
+        help="drop these indexes instead (the only way to drop no_known_use ones)",
+    )
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""End-to-end HTTP load test with latency percentiles.
+
+Drives the real ASGI app with a weighted mix of request scenarios from
+``--concurrency`` closed-loop clients, then reports throughput, p50 /
+p95 / p99 latency and error rate per scenario and overall.  Three
+targets:
+
+- in-process (default): the app is called through ``httpx.ASGITransport``
+  with its lifespan run, so no server or network is involved — it
+  measures the app and database, not uvicorn;
+- ``--serve``: starts ``python -m app.runner`` on ``--port`` (with
+  ``--workers``) and drives it over HTTP;
+- ``--url``: an already running server.
+
+The database is whatever ``DATABASE_URL`` points at; seed it first.
+``--output`` stores the run (with the git commit) as JSON, and
+``--compare`` prints the change against an earlier run::
+
+    uv run python -m scripts.loadtest --seconds 30 --output runs/main.json
+    uv run python -m scripts.loadtest --serve --compare runs/main.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable
+from datetime import UTC, datetime
+
+import httpx
+
+from scripts.seed import FIRST_NAMES, LAST_NAMES, STATES
+
+PAGE_SIZE = 20
+
+# Seconds to wait for /health before giving up on the target
+READY_TIMEOUT = 30.0
+
+
+class Corpus:
+    """What the scenarios draw from: id range, page count, search words."""
+
+    def __init__(self, max_id: int, total: int, rng: random.Random):
+        """Describe a dataset of ``total`` rows with ids up to ``max_id``."""
+        self.max_id = max(max_id, 1)
+        self.pages = max(total // PAGE_SIZE, 1)
+        self.rng = rng
+
+    def word(self) -> str:
+        """A name or state, or a 2-4 character prefix of one."""
+        word = self.rng.choice(FIRST_NAMES + LAST_NAMES + STATES).lower()
+        return word if self.rng.random() < 0.7 else word[: self.rng.randint(2, 4)]
+
+    def candidate_id(self) -> int:
+        """A random id in range (deleted or missing ids are valid 404s)."""
+        return self.rng.randint(1, self.max_id)
+
+    def deep_page(self) -> int:
+        """A page from the last half of the listing."""
+        return self.rng.randint(max(self.pages // 2, 1), self.pages)
+
+
+SCENARIOS: dict[str, Callable[[Corpus], str]] = {
+    "list": lambda c: f"/external/candidates?limit={PAGE_SIZE}",
+    "search": lambda c: (
+        f"/external/candidates?limit={PAGE_SIZE}&search={c.word()}+{c.word()}"
+    ),
+    "deep": lambda c: f"/external/candidates?limit={PAGE_SIZE}&page={c.deep_page()}",
+    "detail": lambda c: f"/external/candidates/{c.candidate_id()}",
+    "api_list": lambda c: f"/api/candidates?limit={PAGE_SIZE}",
+    "api_search": lambda c: f"/api/candidates?limit={PAGE_SIZE}&search={c.word()}",
+    "api_detail": lambda c: f"/api/candidates/{c.candidate_id()}",
+}
+
+DEFAULT_MIX = "list=3,search=3,deep=1,detail=2,api_list=1,api_search=1,api_detail=1"
+
+
+def parse_mix(spec: str) -> dict[str, int]:
+    """Parse ``name=weight,...`` into scenario weights."""
+    mix = {}
+    for part in filter(None, spec.split(",")):
+        name, _, weight = part.partition("=")
+        if name not in SCENARIOS:
+            raise ValueError(
+                f"Unknown scenario {name!r}; choose from {list(SCENARIOS)}"
+            )
+        mix[name] = int(weight or 1)
+    if not mix or not any(mix.values()):
+        raise ValueError("The mix needs at least one scenario with a weight")
+    return mix
+
+
+def summarize(latencies: list[float], errors: int, statuses: Counter, seconds):
+    """Throughput, percentiles (ms) and error rate for one set of requests."""
+    count = len(latencies)
+    if count >= 2:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+    else:
+        p50 = p95 = p99 = latencies[0] if latencies else 0.0
+    return {
+        "requests": count,
+        "rps": round(count / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(p50 * 1000, 2),
+        "p95_ms": round(p95 * 1000, 2),
+        "p99_ms": round(p99 * 1000, 2),
+        "max_ms": round(max(latencies, default=0.0) * 1000, 2),
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+    }
+
+
+async def _corpus(client: httpx.AsyncClient, rng: random.Random) -> Corpus:
+    resp = await client.get("/external/candidates?limit=1&sort=-id")
+    resp.raise_for_status()
+    body = resp.json()
+    max_id = body["data"][0]["id"] if body["data"] else 1
+    return Corpus(max_id, body["total"], rng)
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    mix: dict[str, int],
+    concurrency: int,
+    seconds: float,
+    warmup: float = 0.0,
+    seed: int = 0,
+) -> dict:
+    """Drive ``client`` with the scenario ``mix`` and summarise the results.
+
+    Each of ``concurrency`` clients sends its next request as soon as the
+    previous one completes.  Requests started during the first ``warmup``
+    seconds are not measured.  A 404 is a valid answer (random detail ids
+    can be missing); other 4xx/5xx responses and transport errors count
+    as errors.
+    """
+    rng = random.Random(seed)
+    corpus = await _corpus(client, rng)
+    names, weights = list(mix), list(mix.values())
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: Counter = Counter()
+    statuses: dict[str, Counter] = defaultdict(Counter)
+    measure_from = time.monotonic() + warmup
+    stop = measure_from + seconds
+
+    async def worker() -> None:
+        while (now := time.monotonic()) < stop:
+            name = rng.choices(names, weights)[0]
+            path = SCENARIOS[name](corpus)
+            started = time.perf_counter()
+            try:
+                status = (await client.get(path)).status_code
+            except httpx.HTTPError:
+                status = 0
+            elapsed = time.perf_counter() - started
+            if now < measure_from:
+                continue
+            latencies[name].append(elapsed)
+            statuses[name][status] += 1
+            if status == 0 or (status >= 400 and status != 404):
+                errors[name] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    scenarios = {
+        name: summarize(latencies[name], errors[name], statuses[name], seconds)
+        for name in names
+    }
+    overall = summarize(
+        [x for name in names for x in latencies[name]],
+        sum(errors.values()),
+        sum(statuses.values(), Counter()),
+        seconds,
+    )
+    return {"overall": overall, "scenarios": scenarios}
+
+
+# ── Targets ─────────────────────────────────────────────────────────
+
+
+async def _in_process(args: argparse.Namespace, mix: dict[str, int]) -> dict:
+    from app.config import settings
+    from app.main import app
+
+    # The key is only checked inside this process
+    settings.external_api_key = settings.external_api_key or "loadtest"
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://loadtest",
+            headers={"X-API-Key": settings.external_api_key},
+        ) as client:
+            return await _drive(client, args, mix)
+
+
+async def _over_http(base_url: str, args: argparse.Namespace, mix) -> dict:
+    headers = {"X-API-Key": os.environ.get("EXTERNAL_API_KEY", "")}
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limits, timeout=30.0
+    ) as client:
+        await wait_ready(client)
+        return await _drive(client, args, mix)
+
+
+async def wait_ready(client: httpx.AsyncClient, timeout: float = READY_TIMEOUT) -> None:
+    """Poll ``/health`` until it returns 200, or raise after ``timeout``.
+
+    Shared by the scripts that start or target a server over HTTP.
+    """
+    deadline = time.monotonic() + timeout
+    status: int | str = "no response"
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise RuntimeError(
+                f"{client.base_url} did not become ready in {timeout:g}s "
+                f"(last status: {status})"
+            )
+        try:
+            status = (await client.get("/health", timeout=remaining)).status_code
+            if status == 200:
+                return
+        except httpx.TransportError as exc:
+            status = type(exc).__name__
+        await asyncio.sleep(min(0.2, max(deadline - time.monotonic(), 0)))
+
+
+async def _drive(client: httpx.AsyncClient, args: argparse.Namespace, mix) -> dict:
+    return await run_load(
+        client, mix, args.concurrency, args.seconds, args.warmup, args.seed
+    )
+
+
+def _git_revision() -> str | None:
+    try:
+        rev = subprocess.run(
+            ["git", "describe", "--always", "--dirty"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return rev.stdout.strip()
+
+
+# ── Reporting ───────────────────────────────────────────────────────
+
+
+def _table(results: dict, baseline: dict | None) -> str:
+    header = f"{'scenario':<12}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'err%':>8}"
+    lines = [header, "-" * len(header)]
+    rows = [*results["scenarios"].items(), ("overall", results["overall"])]
+    for name, r in rows:
+        lines.append(
+            f"{name:<12}{r['rps']:>9.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+            f"{r['p99_ms']:>9.1f}{r['error_rate'] * 100:>8.2f}"
+        )
+        if baseline is None:
+            continue
+        old = (
+            baseline["overall"]
+            if name == "overall"
+            else baseline["scenarios"].get(name)
+        )
+        if old:
+            lines.append(
+                f"{'  vs base':<12}{_delta(r['rps'], old['rps']):>9}"
+                + "".join(
+                    f"{_delta(r[k], old[k]):>9}" for k in ("p50_ms", "p95_ms", "p99_ms")
+                )
+            )
+    return "\n".join(lines)
+
+
+def _delta(new: float, old: float) -> str:
+    return f"{(new - old) / old:+.0%}" if old else "n/a"
+
+
+def main() -> None:
+    """Parse arguments, run the load test and report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="drive a running server at this base URL")
+    target.add_argument("--serve", action="store_true", help="start app.runner")
+    parser.add_argument("--workers", type=int, default=0, help="with --serve")
+    parser.add_argument("--port", type=int, default=8099, help="with --serve")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,...")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=15.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the results as JSON here")
+    parser.add_argument("--compare", help="earlier JSON results to compare with")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    if args.url:
+        mode = "url"
+        results = asyncio.run(_over_http(args.url.rstrip("/"), args, mix))
+    elif args.serve:
+        mode = "serve"
+        cmd = [sys.executable, "-m", "app.runner", "--port", str(args.port)]
+        if args.workers:
+            cmd += ["--workers", str(args.workers)]
+        server = subprocess.Popen(cmd, stderr=subprocess.DEVNULL)
+        try:
+            results = asyncio.run(
+                _over_http(f"http://127.0.0.1:{args.port}", args, mix)
+            )
+        finally:
+            server.terminate()
+            server.wait()
+    else:
+        mode = "in-process"
+        results = asyncio.run(_in_process(args, mix))
+
+    run = {
+        "started_at": datetime.now(UTC).isoformat(),
+        "git": _git_revision(),
+        "python": platform.python_version(),
+        "target": args.url or mode,
+        "workers": args.workers if args.serve else None,
+        "mix": mix,
+        "concurrency": args.concurrency,
+        "seconds": args.seconds,
+        "warmup": args.warmup,
+        "seed": args.seed,
+        **results,
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"baseline: {baseline.get('git')} ({baseline.get('target')})")
+    print(f"{run['git']} · {run['target']} · concurrency {args.concurrency}")
+    print(_table(run, baseline))
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
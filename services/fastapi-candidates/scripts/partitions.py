@@ -0,0 +1,58 @@
+"""Create upcoming candidate partitions or archive old ones.
+
+Run from cron / a scheduled task, e.g.:
+
+    uv run python -m scripts.partitions ensure --months 3
+    uv run python -m scripts.partitions detach --before 2023-01-01
+    uv run python -m scripts.partitions detach --before 2023-01-01 --drop
+"""
+
+import argparse
+import asyncio
+from datetime import date
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.config import settings
+from app.partitions import detach_partitions, ensure_future_partitions
+
+
+async def run(args: argparse.Namespace) -> None:
+    """Execute the requested partition operation."""
+    engine = create_async_engine(settings.database_url, echo=False)
+    session_factory = async_sessionmaker(
+        engine, class_=AsyncSession, expire_on_commit=False
+    )
+
+    async with session_factory() as session:
+        if args.command == "ensure":
+            names = await ensure_future_partitions(session, args.months)
+            print(f"Created {len(names)} partition(s): {', '.join(names)}")
+        else:
+            names = await detach_partitions(
+                session, args.before, None if args.drop else args.schema
+            )
+            action = "Dropped" if args.drop else f"Archived to {args.schema}"
+            print(f"{action} {len(names)} partition(s): {', '.join(names)}")
+
+    await engine.dispose()
+
+
+def main() -> None:
+    """Parse arguments and run."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ensure = commands.add_parser("ensure", help="create partitions ahead of time")
+    ensure.add_argument("--months", type=int, default=settings.partition_premake_months)
+
+    detach = commands.add_parser("detach", help="detach partitions before a date")
+    detach.add_argument("--before", type=date.fromisoformat, required=True)
+    detach.add_argument("--schema", default="archive")
+    detach.add_argument("--drop", action="store_true", help="drop instead of archive")
+
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+from datetime import datetime
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.changes import change_filters
+from app.config import settings
+from app.models import Candidate
+from tests.test_candidates import seed_candidates
+
+
+@pytest.fixture(autouse=True)
+def no_safety_lag(monkeypatch):
+    monkeypatch.setattr(settings, "changes_safety_lag_seconds", 0)
+
+
+async def drain(client: AsyncClient, since: str | None, limit: int = 2):
+    seen, cursor = [], since
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["since"] = cursor
+        body = (await client.get("/external/candidates/changes", params=params)).json()
+        seen.extend(body["data"])
+        cursor = body["next_cursor"]
+        if not body["has_more"]:
+            return seen, cursor
+
+
+@pytest.mark.asyncio
+async def test_changes_full_sync_in_batches(
+    client: AsyncClient, db_session: AsyncSession
+):
+    await seed_candidates(db_session, 5)
+    seen, cursor = await drain(client, None)
+    assert sorted(c["id"] for c in seen) == [1, 2, 3, 4, 5]
+    assert cursor is not None
+    assert all(c["deleted_at"] is None for c in seen)
+
+
+@pytest.mark.asyncio
+async def test_changes_returns_only_delta(
+    client: AsyncClient, db_session: AsyncSession
+):
+    candidates = await seed_candidates(db_session, 5)
+    _, cursor = await drain(client, None)
+
+    candidates[1].first_name = "Changed"
+    candidates[3].deleted_at = datetime(2025, 6, 1)
+    await db_session.commit()
+
+    seen, new_cursor = await drain(client, cursor)
+    assert [c["id"] for c in seen] == [2, 4]
+    assert seen[0]["first_name"] == "Changed"
+    assert seen[1]["deleted_at"] is not None
+
+    # Nothing new: cursor is echoed back unchanged
+    again, same_cursor = await drain(client, new_cursor)
+    assert again == []
+    assert same_cursor == new_cursor
+
+
+@pytest.mark.asyncio
+async def test_soft_deleted_hidden_from_reads(
+    client: AsyncClient, db_session: AsyncSession
+):
+    candidates = await seed_candidates(db_session, 3)
+    candidates[0].deleted_at = datetime(2025, 6, 1)
+    await db_session.commit()
+
+    body = (await client.get("/external/candidates")).json()
+    assert body["total"] == 2
+    assert 1 not in {c["id"] for c in body["data"]}
+    assert (await client.get("/external/candidates/1")).status_code == 404
+    assert (await client.get("/api/candidates/1")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_changes_invalid_cursor(client: AsyncClient):
+    resp = await client.get("/external/candidates/changes", params={"since": "!!"})
+    assert resp.status_code == 400
+    assert resp.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.asyncio
+async def test_orm_timestamps_are_naive_utc(db_session: AsyncSession):
+    # asyncpg rejects aware values for the naive DateTime columns
+    (candidate,) = await seed_candidates(db_session, 1)
+    assert candidate.create_time.tzinfo is None
+    assert candidate.updated_at.tzinfo is None
+    candidate.first_name = "Renamed"
+    await db_session.flush()
+    assert candidate.updated_at.tzinfo is None
+
+
+def test_open_transactions_hold_the_feed_back_on_postgres():
+    def sql(postgres: bool) -> str:
+        stmt = select(Candidate.id).where(*change_filters(None, postgres))
+        return str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert "pg_stat_activity" in sql(postgres=True)
+    assert "backend_xid IS NOT NULL" in sql(postgres=True)
+    assert "pg_stat_activity" not in sql(postgres=False)
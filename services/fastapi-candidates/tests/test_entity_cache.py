@@ -0,0 +1,143 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import entity_cache as entity_cache_module
+from app.entity_cache import ENTRY_OVERHEAD, EntityCache
+from app.models import Candidate
+from tests.test_candidates import seed_candidates
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = EntityCache(ttl=60, negative_ttl=60)
+    monkeypatch.setattr(entity_cache_module, "entity_cache", cache)
+    return cache
+
+
+def _loader(calls: list, body=b"{}", delay=0.0):
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return body, None
+
+    return load
+
+
+# ── Cache mechanics ─────────────────────────────────────────────────
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_load():
+    cache = EntityCache(ttl=60)
+    calls: list = []
+    bodies = await asyncio.gather(
+        *(cache.get_or_load(1, "out", _loader(calls, delay=0.01)) for _ in range(20))
+    )
+    assert bodies == [b"{}"] * 20
+    assert len(calls) == 1
+    assert (cache.stats.misses, cache.stats.coalesced) == (1, 19)
+    assert not cache._locks
+
+
+@pytest.mark.asyncio
+async def test_memory_cap_evicts_least_recently_used():
+    cache = EntityCache(ttl=60, max_bytes=3 * (ENTRY_OVERHEAD + 100))
+    for i in range(3):
+        await cache.get_or_load(i, "out", _loader([], b"x" * 100))
+    await cache.get_or_load(0, "out", _loader([]))  # touch 0
+    await cache.get_or_load(3, "out", _loader([], b"x" * 100))
+    assert sorted(k for k, _ in cache._entries) == [0, 2, 3]
+    assert cache.stats.evictions == 1
+    assert cache.as_dict()["bytes"] <= cache.max_bytes
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_disabled_cache():
+    cache = EntityCache(ttl=0.01)
+    calls: list = []
+    await cache.get_or_load(1, "out", _loader(calls))
+    await asyncio.sleep(0.02)
+    await cache.get_or_load(1, "out", _loader(calls))
+    assert len(calls) == 2
+
+    disabled = EntityCache(ttl=0)
+    await disabled.get_or_load(1, "out", _loader(calls))
+    assert len(disabled) == 0
+
+
+@pytest.mark.asyncio
+async def test_load_racing_an_invalidation_is_not_stored():
+    cache = EntityCache(ttl=60)
+
+    async def load():
+        cache.invalidate(1)  # a change lands while the row is being read
+        return b"stale", None
+
+    assert await cache.get_or_load(1, "out", load) == b"stale"
+    assert len(cache) == 0
+
+
+# ── Routes ──────────────────────────────────────────────────────────
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("path", ["/external/candidates/1", "/api/candidates/1"])
+async def test_cached_response_matches_uncached(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch, path: str
+):
+    await seed_candidates(db_session, 1)
+    uncached = await client.get(path)
+    cache = EntityCache(ttl=60)
+    monkeypatch.setattr(entity_cache_module, "entity_cache", cache)
+    first = await client.get(path)
+    second = await client.get(path)
+    assert uncached.json() == first.json() == second.json()
+    assert second.headers["content-type"] == "application/json"
+    assert (cache.stats.misses, cache.stats.hits) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_change_feed_poll_invalidates(
+    client: AsyncClient, db_session: AsyncSession, cache: EntityCache
+):
+    async def name() -> str:
+        return (await client.get("/external/candidates/1")).json()["first_name"]
+
+    (candidate,) = await seed_candidates(db_session, 1)
+    await cache.poll_changes(db_session)
+    assert await name() == "First1"
+
+    candidate.first_name = "Renamed"
+    await db_session.commit()
+    # Served from the cache until the change feed is polled
+    assert await name() == "First1"
+    assert await cache.poll_changes(db_session) >= 1
+    assert await name() == "Renamed"
+
+
+@pytest.mark.asyncio
+async def test_404s_are_negatively_cached(
+    client: AsyncClient, db_session: AsyncSession, cache: EntityCache
+):
+    await cache.poll_changes(db_session)
+    assert (await client.get("/external/candidates/7")).status_code == 404
+    db_session.add(Candidate(id=7, first_name="Late"))
+    await db_session.commit()
+    assert (await client.get("/external/candidates/7")).status_code == 404
+    assert cache.stats.negative_hits == 1
+
+    await cache.poll_changes(db_session)
+    assert (await client.get("/external/candidates/7")).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_signed_urls_bypass_the_cache(
+    client: AsyncClient, db_session: AsyncSession, cache: EntityCache
+):
+    await seed_candidates(db_session, 1)
+    resp = await client.get("/api/candidates/1", params={"signed_urls": "true"})
+    assert resp.status_code == 200
+    assert len(cache) == 0
@@ -0,0 +1,90 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.facets import FACET_COLUMNS
+from app.models import Candidate
+
+
+async def seed_facet_candidates(db: AsyncSession) -> None:
+    rows = [
+        ("Alice", "Texas", "Engineering"),
+        ("Bob", "Texas", "Design"),
+        ("Carol", "Ohio", "Engineering"),
+        ("Dave", "Ohio", "Engineering"),
+        ("Erin", "Texas", "Engineering"),
+    ]
+    db.add_all(
+        Candidate(
+            id=i,
+            first_name=first,
+            last_name="Smith",
+            email=f"{first.lower()}@example.com",
+            phone_number="555-0000",
+            state=state,
+            favourite=fav,
+        )
+        for i, (first, state, fav) in enumerate(rows, start=1)
+    )
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_facets_unfiltered(client: AsyncClient, db_session: AsyncSession):
+    await seed_facet_candidates(db_session)
+    resp = await client.get(
+        "/external/candidates", params={"facets": "state,favourite", "limit": 1}
+    )
+    body = resp.json()
+    assert len(body["data"]) == 1
+    assert body["facets"] == {
+        "state": {"Texas": 3, "Ohio": 2},
+        "favourite": {"Engineering": 4, "Design": 1},
+    }
+
+
+@pytest.mark.asyncio
+async def test_facets_follow_filters(client: AsyncClient, db_session: AsyncSession):
+    await seed_facet_candidates(db_session)
+    resp = await client.get(
+        "/api/candidates", params={"facets": "favourite", "state": "Texas"}
+    )
+    body = resp.json()
+    assert body["total"] == 3
+    assert body["facets"] == {"favourite": {"Engineering": 2, "Design": 1}}
+
+
+@pytest.mark.asyncio
+async def test_facets_omitted_by_default(client: AsyncClient):
+    resp = await client.get("/external/candidates")
+    assert "facets" not in resp.json()
+
+
+@pytest.mark.asyncio
+async def test_unknown_facet_rejected(client: AsyncClient):
+    resp = await client.get("/external/candidates", params={"facets": "notes"})
+    assert resp.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_equality_filters(client: AsyncClient, db_session: AsyncSession):
+    await seed_facet_candidates(db_session)
+    resp = await client.get(
+        "/external/candidates",
+        params={"state": "Ohio", "favourite": "Engineering"},
+    )
+    body = resp.json()
+    assert body["total"] == 2
+    assert {c["first_name"] for c in body["data"]} == {"Carol", "Dave"}
+    # Exact match, not substring
+    resp = await client.get("/external/candidates", params={"state": "Tex"})
+    assert resp.json()["total"] == 0
+
+
+def test_grouping_sets_sql_shape():
+    cols = list(FACET_COLUMNS.values())
+    stmt = select(*cols, func.count()).group_by(func.grouping_sets(*cols))
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "GROUP BY GROUPING SETS(candidates.state, candidates.favourite)" in sql
@@ -0,0 +1,127 @@
+import ast
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app.config import settings
+from app.index_report import (
+    IndexInfo,
+    compile_sql,
+    estimate_btree_bloat,
+    flag_redundant,
+    index_uses,
+    plan_index_names,
+    render_drop_migration,
+)
+from app.models import Candidate
+
+
+def _btree(name: str, *keys: str, **kw) -> IndexInfo:
+    return IndexInfo(name, "btree", f"CREATE INDEX {name} ...", list(keys), **kw)
+
+
+def test_every_migrated_index_has_a_known_use():
+    uses = index_uses()
+    orm_names = {ix.name for ix in Candidate.__table__.indexes}
+    raw_sql = {
+        f"ix_candidates_{col}_{kind}"
+        for col in ("first_name", "last_name", "email", "state", "favourite")
+        for kind in ("trgm", "lower_prefix")
+    } | {"ix_candidates_full_name_gist", "ix_candidates_email_gist"}
+    assert set(uses) == orm_names | raw_sql | {"candidates_pkey"}
+    for name_uses in uses.values():
+        for use in name_uses:
+            sql = compile_sql(use.stmt)
+            assert sql.startswith("SELECT") and "%%" not in sql
+
+
+def test_flag_redundant_leading_prefix_and_duplicates():
+    indexes = [
+        _btree("ix_a", "state"),
+        _btree("ix_b", "state", "create_time", "id"),
+        _btree("ix_c", "state", "create_time", "id"),
+        _btree("ix_d", "create_time", "id"),
+        _btree("pkey", "id", is_primary=True),
+        _btree("ix_e", "id"),
+    ]
+    flag_redundant(indexes)
+    assert {i.name: i.flags for i in indexes} == {
+        "ix_a": ["redundant:ix_b"],
+        "ix_b": [],
+        "ix_c": ["redundant:ix_b"],
+        "ix_d": [],
+        "pkey": [],
+        "ix_e": ["redundant:pkey"],
+    }
+
+
+def test_droppable_needs_a_flag_a_plan_check_and_no_plan():
+    used = {"used_by": ["sort=a"]}
+    assert _btree("ix", "a", flags=["unused"], **used).droppable
+    assert not _btree("ix", "a", **used).droppable
+    assert not _btree(
+        "ix", "a", flags=["unused"], chosen_by=["sort=a"], **used
+    ).droppable
+    assert not _btree("ix", "a", flags=["unused"], is_unique=True, **used).droppable
+    # Nothing would guard the drop: only an explicit --drop removes it
+    assert not _btree("ix", "a", flags=["unused", "no_known_use"]).droppable
+
+
+def test_bloat_estimate():
+    assert estimate_btree_bloat(8192, 10, 8) is None
+    assert estimate_btree_bloat(8192, 0, 8) is None
+    # 20-byte tuples, 366 per 90%-full leaf page: 670 leaves + the metapage
+    assert estimate_btree_bloat(671 * 8192, 245_000, 8) == 0.0
+    assert estimate_btree_bloat(1342 * 8192, 245_000, 8) == 0.5
+    assert estimate_btree_bloat(500 * 8192, 245_000, 8) == 0.0
+
+
+def test_plan_index_names():
+    plan = [
+        {
+            "Plan": {
+                "Node Type": "Limit",
+                "Plans": [
+                    {"Node Type": "Index Scan", "Index Name": "ix_a"},
+                    {"Node Type": "Bitmap Index Scan", "Index Name": "ix_b_p2025"},
+                ],
+            }
+        }
+    ]
+    assert plan_index_names(plan) == plan_index_names(json.dumps(plan))
+    assert plan_index_names(plan) == {"ix_a", "ix_b_p2025"}
+
+
+def test_rendered_migration_embeds_guard_and_restore():
+    gin = IndexInfo(
+        "ix_candidates_state_trgm",
+        "gin",
+        "CREATE INDEX ix_candidates_state_trgm ON ONLY public.candidates "
+        "USING gin (state gin_trgm_ops)",
+        ["state gin_trgm_ops"],
+        flags=["unused"],
+    )
+    tree = ast.parse(render_drop_migration([gin], "008", "007"))
+    module = {
+        target.id: ast.literal_eval(node.value)
+        for node in tree.body
+        if isinstance(node, ast.Assign | ast.AnnAssign)
+        for target in getattr(node, "targets", [getattr(node, "target", None)])
+    }
+    assert (module["revision"], module["down_revision"]) == ("008", "007")
+    # The downgrade recreates the index on the partitions too
+    restore = gin.definition.replace("ON ONLY", "ON")
+    assert module["INDEXES"] == {gin.name: (restore, "unused")}
+    (check,) = module["PLAN_CHECKS"][gin.name]
+    assert "candidates.state ILIKE '%abcd%'" in check
+    functions = {n.name for n in tree.body if isinstance(n, ast.FunctionDef)}
+    assert {"_guard", "upgrade", "downgrade"} <= functions
+
+
+@pytest.mark.asyncio
+async def test_admin_index_report_needs_postgres(client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(settings, "admin_api_key", "admin")
+    assert (await client.get("/admin/indexes")).status_code == 401
+    resp = await client.get("/admin/indexes", headers={"X-Admin-Key": "admin"})
+    assert resp.status_code == 400
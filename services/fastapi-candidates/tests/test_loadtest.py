@@ -0,0 +1,91 @@
+from collections import Counter
+
+import httpx
+import pytest
+
+from scripts.loadtest import DEFAULT_MIX, SCENARIOS, parse_mix, summarize, wait_ready
+
+# ── parse_mix ───────────────────────────────────────────────────────
+
+
+def test_parse_mix_weights():
+    assert parse_mix("list=3,search,deep=0") == {"list": 3, "search": 1, "deep": 0}
+    # Empty parts are skipped; a repeated scenario keeps its last weight
+    assert parse_mix(",list=2,,list=5,") == {"list": 5}
+    assert set(parse_mix(DEFAULT_MIX)) == set(SCENARIOS)
+
+
+@pytest.mark.parametrize(
+    ("spec", "message"),
+    [
+        ("bogus=1", "Unknown scenario 'bogus'"),
+        ("list=3,Search=1", "Unknown scenario 'Search'"),
+        ("", "at least one scenario"),
+        ("list=0,search=0", "at least one scenario"),
+        ("list=x", "invalid literal"),
+        ("list=1.5", "invalid literal"),
+    ],
+)
+def test_parse_mix_rejects_malformed_input(spec: str, message: str):
+    with pytest.raises(ValueError, match=message):
+        parse_mix(spec)
+
+
+# ── summarize ───────────────────────────────────────────────────────
+
+
+def test_summarize_percentiles():
+    latencies = [ms / 1000 for ms in range(100, 0, -1)]  # 1..100 ms, unsorted
+    result = summarize(latencies, 3, Counter({200: 95, 500: 3, 404: 2}), 2.0)
+    assert result == {
+        "requests": 100,
+        "rps": 50.0,
+        # Linear interpolation between closest ranks
+        "p50_ms": 50.5,
+        "p95_ms": 95.05,
+        "p99_ms": 99.01,
+        "max_ms": 100.0,
+        "errors": 3,
+        "error_rate": 0.03,
+        "statuses": {"200": 95, "404": 2, "500": 3},
+    }
+
+
+def test_summarize_small_samples():
+    one = summarize([0.25], 0, Counter({200: 1}), 1.0)
+    assert (one["p50_ms"], one["p99_ms"], one["max_ms"]) == (250.0, 250.0, 250.0)
+
+    empty = summarize([], 0, Counter(), 0)
+    assert (empty["requests"], empty["rps"], empty["p95_ms"]) == (0, 0.0, 0.0)
+    assert empty["error_rate"] == 0.0
+
+
+# ── wait_ready ──────────────────────────────────────────────────────
+
+
+def _client(statuses: list[int]) -> httpx.AsyncClient:
+    def respond(request: httpx.Request) -> httpx.Response:
+        if not statuses:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(statuses.pop(0))
+
+    transport = httpx.MockTransport(respond)
+    return httpx.AsyncClient(transport=transport, base_url="http://target")
+
+
+@pytest.mark.asyncio
+async def test_wait_ready_polls_until_healthy():
+    statuses = [503, 503, 200]
+    async with _client(statuses) as client:
+        await wait_ready(client, timeout=5)
+    assert statuses == []
+
+
+@pytest.mark.asyncio
+async def test_wait_ready_reports_the_last_status():
+    async with _client([503] * 100) as client:
+        with pytest.raises(RuntimeError, match=r"http://target.*last status: 503"):
+            await wait_ready(client, timeout=0.3)
+    async with _client([]) as client:
+        with pytest.raises(RuntimeError, match="last status: ConnectError"):
+            await wait_ready(client, timeout=0.3)
@@ -0,0 +1,94 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.lookup import MAX_LOOKUP_VALUES
+from app.models import Candidate, normalize_email, normalize_phone
+
+
+async def _seed(db: AsyncSession) -> list[Candidate]:
+    candidates = [
+        Candidate(id=1, email=" Ann.Lee@Example.COM", phone_number="(555) 000-1234"),
+        Candidate(id=2, email="bob@example.com", phone_number="555.000.1234"),
+        Candidate(id=3, email="ann.lee@example.com", phone_number="n/a"),
+        Candidate(id=4, email="gone@example.com", phone_number="555-999-0000"),
+    ]
+    db.add_all(candidates)
+    await db.commit()
+    return candidates
+
+
+def test_normalizers():
+    assert normalize_email("  Ann@Example.COM ") == "ann@example.com"
+    assert normalize_email(None) == ""
+    assert normalize_phone("+1 (555) 000-1234") == "15550001234"
+    assert normalize_phone("n/a") == ""
+
+
+@pytest.mark.asyncio
+async def test_orm_keeps_lookup_columns_current(db_session: AsyncSession):
+    (ann, *_) = await _seed(db_session)
+    assert (ann.email_lower, ann.phone_digits) == ("ann.lee@example.com", "5550001234")
+    ann.email = "ANN@NEW.ORG"
+    await db_session.commit()
+    await db_session.refresh(ann)
+    assert ann.email_lower == "ann@new.org"
+
+
+@pytest.mark.asyncio
+async def test_lookup_single_email_and_phone(
+    client: AsyncClient, db_session: AsyncSession
+):
+    await _seed(db_session)
+    resp = await client.get(
+        "/external/candidates/lookup", params={"email": "ANN.LEE@example.com"}
+    )
+    assert resp.status_code == 200
+    (match,) = resp.json()["results"]
+    assert match["by"] == "email"
+    assert match["normalized"] == "ann.lee@example.com"
+    assert [c["id"] for c in match["data"]] == [1, 3]
+
+    resp = await client.get(
+        "/external/candidates/lookup", params={"phone": "555 000 1234"}
+    )
+    (match,) = resp.json()["results"]
+    assert [c["id"] for c in match["data"]] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_batch_lookup_keeps_request_order(
+    client: AsyncClient, db_session: AsyncSession
+):
+    *_, gone = await _seed(db_session)
+    gone.deleted_at = gone.create_time
+    await db_session.commit()
+
+    resp = await client.post(
+        "/external/candidates/lookup",
+        json={
+            "email": ["nobody@example.com", "Bob@Example.com", "gone@example.com"],
+            "phone": ["n/a", "5550001234"],
+        },
+    )
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+    assert [(r["by"], r["value"]) for r in results] == [
+        ("email", "nobody@example.com"),
+        ("email", "Bob@Example.com"),
+        ("email", "gone@example.com"),
+        ("phone", "n/a"),
+        ("phone", "5550001234"),
+    ]
+    # Unknown, soft-deleted and empty-normalizing values match no one
+    assert [[c["id"] for c in r["data"]] for r in results] == [[], [2], [], [], [1, 2]]
+
+
+@pytest.mark.asyncio
+async def test_lookup_needs_values_within_the_cap(client: AsyncClient):
+    assert (await client.get("/external/candidates/lookup")).status_code == 422
+    resp = await client.post(
+        "/external/candidates/lookup",
+        json={"email": ["a@example.com"] * (MAX_LOOKUP_VALUES + 1)},
+    )
+    assert resp.status_code == 422
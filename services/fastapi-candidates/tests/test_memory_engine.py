@@ -0,0 +1,254 @@
+"""Differential tests: the in-memory engine must match the SQL path."""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import memory_engine as memory_engine_module
+from app import routes
+from app.config import settings
+from app.memory_engine import MemoryEngine
+from app.models import Candidate
+from app.query_parser import parse_query
+from tests.conftest import engine
+
+SYLLABLES = ["an", "bo", "ca", "de", "el", "fi", "jo", "ka", "li", "mo", "ne", "ra"]
+STATES = ["Texas", "Ohio", "New York", "California", "Utah"]
+FAVOURITES = ["Engineering", "Design", "Sales", ""]
+SORTS = [f.value for f in routes.SortField]
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3))).title()
+
+
+async def seed_random(db: AsyncSession, count: int, seed: int = 7) -> list[Candidate]:
+    rng = random.Random(seed)
+    base = datetime(2025, 1, 1)
+    rows = []
+    for i in range(1, count + 1):
+        first, last = _word(rng), _word(rng)
+        domain = rng.choice(["acme", "ex"])
+        rows.append(
+            Candidate(
+                id=i,
+                first_name=first,
+                last_name=last,
+                email=f"{first.lower()}.{last.lower()}@{domain}.com",
+                phone_number=f"555-{rng.randint(1000, 9999)}",
+                state=rng.choice(STATES),
+                favourite=rng.choice(FAVOURITES),
+                # Coarse timestamps so create_time has plenty of ties
+                create_time=base + timedelta(days=rng.randint(0, 20)),
+            )
+        )
+    db.add_all(rows)
+    await db.commit()
+    return rows
+
+
+def _random_params(rng: random.Random, rows: list[Candidate]) -> dict:
+    params: dict = {
+        "sort": rng.choice(SORTS),
+        "order": rng.choice(["ASC", "DESC"]),
+        "limit": rng.choice([1, 3, 10, 50]),
+        "page": rng.randint(1, 4),
+    }
+    terms = []
+    for _ in range(rng.randint(0, 3)):
+        source = rng.choice(rows)
+        field = rng.choice(["first_name", "last_name", "email", "state"])
+        value = getattr(source, field)
+        start = rng.randint(0, len(value) - 1)
+        term = value[start : start + rng.randint(1, 5)]
+        term = term.upper() if rng.random() < 0.3 else term
+        if " " in term or rng.random() < 0.1:
+            term = f'"{term}"'
+        if rng.random() < 0.3:
+            term = f"{field}:{term}"
+        if rng.random() < 0.2:
+            term = f"-{term}"
+        terms.append(term)
+    if terms:
+        params["search"] = " ".join(terms)
+    if rng.random() < 0.2:
+        params["state"] = rng.choice(STATES)
+    if rng.random() < 0.2:
+        params["favourite"] = rng.choice(FAVOURITES[:-1])
+    if rng.random() < 0.3:
+        params["facets"] = "state,favourite"
+    return params
+
+
+@pytest.fixture
+def use_engine(monkeypatch):
+    engine = MemoryEngine()
+    monkeypatch.setattr(routes, "memory_engine", engine)
+    monkeypatch.setattr(settings, "search_engine", "sql")
+    monkeypatch.setattr(settings, "changes_safety_lag_seconds", 0)
+    return engine
+
+
+async def _both(client: AsyncClient, monkeypatch, params: dict) -> tuple[dict, dict]:
+    monkeypatch.setattr(settings, "search_engine", "sql")
+    sql = (await client.get("/external/candidates", params=params)).json()
+    monkeypatch.setattr(settings, "search_engine", "memory")
+    mem = (await client.get("/external/candidates", params=params)).json()
+    return sql, mem
+
+
+@pytest.mark.asyncio
+async def test_engine_matches_sql_randomized(
+    client: AsyncClient, db_session: AsyncSession, use_engine, monkeypatch
+):
+    rows = await seed_random(db_session, 120)
+    await use_engine.load(db_session)
+    assert len(use_engine) == 120
+
+    rng = random.Random(42)
+    for _ in range(300):
+        params = _random_params(rng, rows)
+        sql, mem = await _both(client, monkeypatch, params)
+        assert mem == sql, params
+
+
+@pytest.mark.asyncio
+async def test_engine_unfiltered_pages_match_sql(
+    client: AsyncClient, db_session: AsyncSession, use_engine, monkeypatch
+):
+    await seed_random(db_session, 40)
+    await use_engine.load(db_session)
+    for sort in SORTS:
+        for order in ("ASC", "DESC"):
+            for page in (1, 2, 5):
+                params = {"sort": sort, "order": order, "page": page, "limit": 9}
+                sql, mem = await _both(client, monkeypatch, params)
+                assert mem == sql, params
+
+
+@pytest.mark.asyncio
+async def test_engine_refresh_appends_new_rows(
+    client: AsyncClient, db_session: AsyncSession, use_engine, monkeypatch
+):
+    await seed_random(db_session, 30)
+    await use_engine.load(db_session)
+    db_session.add(
+        Candidate(
+            id=31,
+            first_name="Zebedee",
+            last_name="Anstruther",
+            email="zeb@acme.com",
+            phone_number="555-1234",
+            state="Utah",
+            favourite="Design",
+        )
+    )
+    await db_session.commit()
+
+    assert await use_engine.refresh(db_session) == 1
+    for params in (
+        {"search": "zebedee"},
+        {"sort": "last_name", "limit": 5},
+        {"sort": "first_name", "order": "DESC", "limit": 5},
+    ):
+        sql, mem = await _both(client, monkeypatch, params)
+        assert mem == sql, params
+
+
+@pytest.mark.asyncio
+async def test_engine_refresh_reloads_after_delete(
+    client: AsyncClient, db_session: AsyncSession, use_engine, monkeypatch
+):
+    rows = await seed_random(db_session, 10)
+    await use_engine.load(db_session)
+    await db_session.delete(rows[3])
+    await db_session.commit()
+
+    await use_engine.refresh(db_session)
+    assert len(use_engine) == 9
+    sql, mem = await _both(client, monkeypatch, {"sort": "id", "limit": 20})
+    assert mem == sql
+
+
+@pytest.mark.asyncio
+async def test_engine_refresh_does_not_reload_for_rows_in_the_lag_window(
+    db_session: AsyncSession, use_engine, monkeypatch
+):
+    rows = await seed_random(db_session, 10)
+    await use_engine.load(db_session)
+    loads = []
+    real_load = use_engine.load
+
+    async def counting_load(session):
+        loads.append(1)
+        await real_load(session)
+
+    monkeypatch.setattr(use_engine, "load", counting_load)
+    monkeypatch.setattr(settings, "changes_safety_lag_seconds", 3600)
+
+    # A fresh insert and an edit stay behind the horizon: not applied,
+    # and not mistaken for a hard delete
+    db_session.add(Candidate(id=11, first_name="Pending"))
+    rows[0].first_name = "Edited"
+    await db_session.commit()
+    assert await use_engine.refresh(db_session) == 0
+    assert (len(use_engine), loads) == (10, [])
+
+    # A hard delete is still caught
+    await db_session.delete(rows[5])
+    await db_session.commit()
+    await use_engine.refresh(db_session)
+    assert loads == [1]
+
+
+@pytest.mark.asyncio
+async def test_engine_refresh_applies_edits_and_soft_deletes(
+    client: AsyncClient, db_session: AsyncSession, use_engine, monkeypatch
+):
+    rows = await seed_random(db_session, 12)
+    await use_engine.load(db_session)
+    rows[0].first_name = "Renamed"
+    rows[1].deleted_at = datetime(2025, 6, 1)
+    await db_session.commit()
+
+    assert await use_engine.refresh(db_session) == 2
+    assert len(use_engine) == 11
+    for params in (
+        {"search": "renamed"},
+        {"sort": "first_name", "limit": 20},
+        {"sort": "id", "order": "DESC", "limit": 20},
+    ):
+        sql, mem = await _both(client, monkeypatch, params)
+        assert mem == sql, params
+
+
+@pytest.mark.asyncio
+async def test_like_wildcards_fall_back_to_sql(db_session: AsyncSession):
+    engine = MemoryEngine()
+    await engine.load(db_session)
+    assert engine.supports(parse_query("ann state:ohio -bob"))
+    assert not engine.supports(parse_query("a_n"))
+    assert not engine.supports(parse_query("-50%"))
+
+
+@pytest.mark.asyncio
+async def test_engine_refuses_a_non_code_point_collation(
+    db_session: AsyncSession, monkeypatch
+):
+    await seed_random(db_session, 5)
+    sessions = async_sessionmaker(engine)
+    mem = MemoryEngine()
+    await mem.start(sessions)
+    assert mem.ready  # SQLite compares BINARY, like Python
+    await mem.stop()
+
+    async def en_us(session) -> bool:
+        return False
+
+    monkeypatch.setattr(memory_engine_module, "orders_by_code_point", en_us)
+    await mem.start(sessions)
+    assert not mem.ready and not mem.supports(parse_query("ann"))
+    await mem.stop()
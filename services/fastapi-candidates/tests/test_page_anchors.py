@@ -0,0 +1,188 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app import page_anchors as page_anchors_module
+from app.config import settings
+from app.models import Candidate
+from app.page_anchors import PageAnchors
+from app.queries import count_stmt, page_stmt
+from app.sorting import SortField, order_by
+from tests.conftest import engine
+
+BASE = datetime(2025, 1, 1)
+sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.fixture
+def anchors(monkeypatch):
+    anchors = PageAnchors(spacing=3)
+    monkeypatch.setattr(page_anchors_module, "page_anchors", anchors)
+    monkeypatch.setattr(settings, "page_anchor_min_offset", 0)
+    monkeypatch.setattr(settings, "page_anchor_refresh_seconds", 0.0)
+    monkeypatch.setattr(settings, "changes_safety_lag_seconds", 0.0)
+    return anchors
+
+
+def _candidate(i: int) -> Candidate:
+    # Few distinct values per column, so (key, id) ties are exercised
+    return Candidate(
+        id=i,
+        first_name=["Ann", "bob", "Cy", "ann"][i % 4],
+        last_name=f"Last{i % 5}",
+        email=f"user{i % 7}@example.com",
+        state=["Texas", "Ohio", "Utah"][i % 3],
+        favourite=["", "yes"][i % 2],
+        create_time=BASE + timedelta(days=i % 6),
+    )
+
+
+async def _seed(db: AsyncSession, ids) -> None:
+    db.add_all(_candidate(i) for i in ids)
+    await db.commit()
+
+
+async def _assert_pages_match(db: AsyncSession, anchors: PageAnchors) -> None:
+    total = (await db.execute(count_stmt([]))).scalar_one()
+    for name in SortField.__members__:
+        for descending in (False, True):
+            key = (name, descending)
+            for limit in (2, 5):
+                for offset in range(0, total + limit, limit):
+                    stmt = page_stmt([], order_by([key]), offset, limit)
+                    expected = (await db.execute(stmt)).scalars().all()
+                    got = await anchors.page(db, key, offset, limit, total)
+                    if got is None:
+                        # Built in the background, as the lifespan task does
+                        await anchors.build_queued(sessions)
+                        got = await anchors.page(db, key, offset, limit, total)
+                    assert got is not None
+                    assert [c.id for c in got] == [c.id for c in expected], (
+                        key,
+                        offset,
+                        limit,
+                    )
+
+
+@pytest.mark.asyncio
+async def test_anchored_pages_match_offset(db_session: AsyncSession, anchors):
+    await _seed(db_session, range(1, 24))
+    await _assert_pages_match(db_session, anchors)
+    assert anchors.stats.builds == len(SortField.__members__)
+    assert anchors.stats.rows_skipped > 0
+    # Only the first jump per key, before its anchors were built
+    assert anchors.stats.fallbacks == len(SortField.__members__)
+
+
+@pytest.mark.asyncio
+async def test_changes_are_synced_incrementally(
+    db_session: AsyncSession, anchors, monkeypatch
+):
+    # Every lookup syncs here; keep the periodic rebuild out of the way
+    monkeypatch.setattr(page_anchors_module, "REBUILD_AFTER_SYNCS", 10**6)
+    await _seed(db_session, range(1, 40))
+    await _assert_pages_match(db_session, anchors)
+    builds = anchors.stats.builds
+
+    # An insert, a soft delete and an edit that moves a row: each lands in
+    # one segment (the table has 13 per key) and is recounted in place
+    await _seed(db_session, [40])
+    await db_session.execute(
+        update(Candidate).where(Candidate.id == 17).values(deleted_at=BASE)
+    )
+    await db_session.execute(
+        update(Candidate).where(Candidate.id == 22).values(first_name="Zed")
+    )
+    await db_session.commit()
+    await _assert_pages_match(db_session, anchors)
+    assert anchors.stats.syncs > 0
+    # Keys whose old segment for the moved row was not recounted, or whose
+    # anchor row itself changed, rebuild; the rest were recounted in place
+    assert anchors.stats.builds - builds < len(SortField.__members__)
+
+
+@pytest.mark.asyncio
+async def test_growing_segment_is_split(db_session: AsyncSession, anchors):
+    await _seed(db_session, range(1, 10))
+    assert await anchors.page(db_session, ("id", False), 0, 2, 9) is None
+    await anchors.build_queued(sessions)
+    assert await anchors.page(db_session, ("id", False), 0, 2, 9) is not None
+    await _seed(db_session, range(10, 20))
+    total = (await db_session.execute(count_stmt([]))).scalar_one()
+    await _assert_pages_match(db_session, anchors)
+    assert anchors.stats.splits >= 1
+    assert max(anchors._anchors["id"].counts) <= 2 * anchors.spacing
+    assert anchors._anchors["id"].total == total
+
+
+@pytest.mark.asyncio
+async def test_requests_never_build(db_session: AsyncSession, anchors):
+    await _seed(db_session, range(1, 10))
+    key = ("id", False)
+    assert await anchors.page(db_session, key, 0, 2, total=9) is None
+    assert anchors.stats.builds == 0
+    assert anchors.as_dict()["building"] == ["id"]
+
+    await anchors.build_queued(sessions)
+    assert anchors.stats.builds == 1
+    assert await anchors.page(db_session, key, 0, 2, total=9) is not None
+    # A total the anchors cannot reach falls back and queues a rebuild
+    assert await anchors.page(db_session, key, 0, 2, total=8) is None
+    assert anchors.stats.builds == 1
+    assert anchors.as_dict()["building"] == ["id"]
+
+
+@pytest.mark.asyncio
+async def test_background_task_builds_queued_keys(db_session: AsyncSession, anchors):
+    await _seed(db_session, range(1, 10))
+    await anchors.start(sessions)
+    try:
+        assert await anchors.page(db_session, ("id", False), 0, 2, 9) is None
+        for _ in range(100):
+            if anchors.stats.builds:
+                break
+            await asyncio.sleep(0.01)
+        assert await anchors.page(db_session, ("id", False), 0, 2, 9) is not None
+    finally:
+        await anchors.stop()
+    assert anchors.as_dict()["keys"] == {}
+
+
+@pytest.mark.asyncio
+async def test_routes_keep_the_page_contract(
+    client: AsyncClient, db_session: AsyncSession, monkeypatch
+):
+    await _seed(db_session, range(1, 30))
+    monkeypatch.setattr(settings, "page_anchor_min_offset", 0)
+
+    async def pages(spacing: int) -> list:
+        anchors = PageAnchors(spacing)
+        monkeypatch.setattr(page_anchors_module, "page_anchors", anchors)
+        # The first pass queues the builds; the second is served from anchors
+        await fetch(anchors)
+        await anchors.build_queued(sessions)
+        return await fetch(anchors)
+
+    async def fetch(anchors: PageAnchors) -> list:
+        bodies = []
+        for page in (1, 3, 7, 8):
+            resp = await client.get(
+                "/api/candidates", params={"page": page, "limit": 4}
+            )
+            bodies.append(resp.json())
+            resp = await client.get(
+                "/external/candidates",
+                params={"page": page, "limit": 4, "sort": "-create_time"},
+            )
+            bodies.append(resp.json())
+        return bodies
+
+    anchored = await pages(spacing=4)
+    assert page_anchors_module.page_anchors.stats.anchored
+    assert anchored == await pages(spacing=0)
+    stats = (await client.get("/external/stats/page-anchors")).json()
+    assert {"anchored", "fallbacks", "keys"} <= stats.keys()
@@ -0,0 +1,82 @@
+from datetime import date, datetime
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import partitions
+from app.models import Candidate
+
+# ── Partition layout ────────────────────────────────────────────────
+
+
+def test_partition_for_covers_the_calendar_month():
+    p = partitions.partition_for(date(2024, 12, 31))
+    assert p == partitions.Partition(
+        "candidates_p2024_12", date(2024, 12, 1), date(2025, 1, 1)
+    )
+
+
+def test_add_months_crosses_years():
+    assert partitions.add_months(date(2024, 11, 1), 3) == date(2025, 2, 1)
+    assert partitions.add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+
+
+@pytest.mark.asyncio
+async def test_maintenance_is_a_noop_without_partitioning(db_session: AsyncSession):
+    assert not await partitions.is_partitioned(db_session)
+    assert await partitions.ensure_future_partitions(db_session, 3) == []
+    assert await partitions.detach_partitions(db_session, date(2030, 1, 1)) == []
+
+
+@pytest.mark.asyncio
+async def test_detach_rejects_unsafe_schema(db_session: AsyncSession):
+    with pytest.raises(ValueError):
+        await partitions.detach_partitions(db_session, date(2030, 1, 1), "x; --")
+
+
+# ── create_time range filters (partition pruning) ───────────────────
+
+
+async def _seed(db: AsyncSession) -> None:
+    db.add_all(
+        Candidate(
+            id=month,
+            first_name=f"M{month}",
+            email=f"m{month}@example.com",
+            create_time=datetime(2024, month, 15),
+        )
+        for month in range(1, 7)
+    )
+    await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_created_range_filters_external(
+    client: AsyncClient, db_session: AsyncSession
+):
+    await _seed(db_session)
+    resp = await client.get(
+        "/external/candidates",
+        params={
+            "created_from": "2024-02-15T00:00:00",
+            "created_before": "2024-05-01T00:00:00Z",
+            "sort": "id",
+        },
+    )
+    assert [c["id"] for c in resp.json()["data"]] == [2, 3, 4]
+    assert resp.json()["total"] == 3
+
+
+@pytest.mark.asyncio
+async def test_created_range_filters_internal(
+    client: AsyncClient, db_session: AsyncSession
+):
+    await _seed(db_session)
+    resp = await client.get(
+        "/api/candidates",
+        params={"created_from": "2024-05-01", "facets": "state"},
+    )
+    body = resp.json()
+    assert [c["id"] for c in body["data"]] == [6, 5]
+    assert body["facets"] == {"state": {"": 2}}
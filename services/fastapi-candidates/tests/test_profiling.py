@@ -0,0 +1,164 @@
+import asyncio
+import sys
+import time
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import profiling, routes_admin
+from app.config import settings
+from app.models import Candidate
+from app.profiling import (
+    IDLE,
+    ProfileStore,
+    RequestProfile,
+    Sampler,
+    breakdown,
+    folded,
+    render_flamegraph,
+)
+from tests.conftest import engine
+
+ADMIN = {"X-Admin-Key": "admin-secret"}
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    store = ProfileStore(tmp_path, max_profiles=10)
+    monkeypatch.setattr(settings, "admin_api_key", ADMIN["X-Admin-Key"])
+    monkeypatch.setattr(profiling, "profile_store", store)
+    monkeypatch.setattr(routes_admin, "profile_store", store)
+    profiling.install(engine.sync_engine)
+    return store
+
+
+# ── Sampling and rendering ──────────────────────────────────────────
+
+
+def _busy(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_sampler_records_stacks_from_the_root():
+    async def request():
+        profile = RequestProfile()
+        sampler = Sampler(profile, request.__code__, 0.001)
+        sampler.start()
+        _busy(0.1)
+        await asyncio.sleep(0.02)
+        sampler.stop()
+        return profile
+
+    before = sys.getswitchinterval()
+    profile = await request()
+    assert sys.getswitchinterval() == before
+    stacks = list(profile.samples)
+    assert any(s.endswith(":_busy") for s in stacks)
+    # Trimmed at the root, not the event loop
+    assert all(s.split(";")[0].endswith("request") for s in stacks if s != IDLE)
+
+
+def test_breakdown_folded_and_flamegraph():
+    samples = {"starlette.x:f;app.routes:list;sqlalchemy.orm.q:load": 2}
+    samples |= {"starlette.x:f;app.routes:list": 1, IDLE: 1}
+    assert breakdown(samples) == {"orm": 0.5, "app": 0.25, "io_wait": 0.25}
+    assert folded({"a;b": 2, "a": 1}) == "a 1\na;b 2\n"
+    svg = render_flamegraph(samples, "GET /x")
+    assert svg.startswith("<svg") and "GET /x (4 samples)" in svg
+    assert svg.count("<rect") == 4  # f, list, load, idle
+    assert render_flamegraph({}).startswith("<svg")
+
+
+def test_store_prunes_oldest_and_rejects_bad_ids(tmp_path):
+    store = ProfileStore(tmp_path, max_profiles=2)
+    ids = []
+    for n in range(3):
+        ids.append(store.new_id())
+        store.save({"id": ids[-1], "n": n, "samples": {}, "queries": []})
+    assert [s["n"] for s in store.summaries()] == [2, 1]
+    assert store.get(ids[0]) is None
+    assert store.get(ids[2])["n"] == 2
+    assert store.get("../../etc/passwd") is None
+
+
+@pytest.mark.asyncio
+async def test_failed_statement_leaves_no_timing_behind(store: ProfileStore):
+    profile = RequestProfile()
+    token = profiling._active.set(profile)
+    try:
+        async with engine.connect() as conn:
+            with pytest.raises(DBAPIError):
+                await conn.exec_driver_sql("SELECT * FROM no_such_table")
+            await conn.exec_driver_sql("SELECT 1")
+            raw = await conn.get_raw_connection()
+            assert not any(key.startswith("profile") for key in raw.info)
+    finally:
+        profiling._active.reset(token)
+    assert profile.db_statements == 1
+    assert [q["sql"] for q in profile.queries] == ["SELECT 1"]
+
+
+# ── Middleware and admin routes ─────────────────────────────────────
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "headers",
+    [
+        {"X-Profile": "1"},
+        {"X-Profile": "1", "X-Admin-Key": "wrong"},
+        ADMIN,
+    ],
+)
+async def test_not_profiled_without_flag_and_admin_key(
+    client: AsyncClient, store: ProfileStore, headers: dict
+):
+    resp = await client.get("/external/candidates", headers=headers)
+    assert resp.status_code == 200
+    assert "x-profile-id" not in resp.headers
+    assert store.summaries() == []
+
+
+@pytest.mark.asyncio
+async def test_profiled_request_round_trip(
+    client: AsyncClient, db_session: AsyncSession, store: ProfileStore
+):
+    db_session.add(Candidate(id=1, first_name="Ann"))
+    await db_session.commit()
+
+    resp = await client.get(
+        "/external/candidates",
+        params={"search": "ann", "profile": "true"},
+        headers=ADMIN,
+    )
+    assert resp.status_code == 200
+    profile_id = resp.headers["x-profile-id"]
+
+    record = (await client.get(f"/admin/profiles/{profile_id}", headers=ADMIN)).json()
+    assert record["path"] == "/external/candidates"
+    assert record["status"] == 200
+    assert record["db_statements"] == len(record["queries"]) >= 2
+    assert record["db_ms"] <= record["wall_ms"]
+
+    listed = (await client.get("/admin/profiles", headers=ADMIN)).json()["data"]
+    assert [p["id"] for p in listed] == [profile_id]
+    assert "samples" not in listed[0]
+
+    svg = await client.get(f"/admin/profiles/{profile_id}/flamegraph", headers=ADMIN)
+    assert svg.headers["content-type"] == "image/svg+xml"
+    text = await client.get(f"/admin/profiles/{profile_id}/folded", headers=ADMIN)
+    assert text.headers["content-type"].startswith("text/plain")
+
+
+@pytest.mark.asyncio
+async def test_admin_routes_require_admin_key(client: AsyncClient, store):
+    assert (await client.get("/admin/profiles")).status_code == 401
+    resp = await client.get("/admin/profiles", headers={"X-Admin-Key": "nope"})
+    assert resp.status_code == 403
+    resp = await client.get("/admin/profiles/0123456789abcdef-00000000", headers=ADMIN)
+    assert resp.status_code == 404
@@ -0,0 +1,66 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import query_cache
+from app.queries import count_stmt
+from app.search import SEPARATOR, build_filters
+from tests.conftest import engine
+from tests.test_candidates import seed_candidates
+
+
+def test_term_counts_share_statement_shapes():
+    def sql(words: list[str]) -> str:
+        stmt = count_stmt(build_filters(" ".join(words)))
+        return stmt.compile(dialect=postgresql.dialect()).string
+
+    for words in (["ann", "smith", "lee", "york"], ["t0", "t1", "t2", "t3"]):
+        # Two or more terms share one shape, whatever their order
+        shapes = {sql(words[:n]) for n in range(2, 5)}
+        shapes |= {sql(words[n:] + words[:n]) for n in range(4)}
+        assert len(shapes) == 1, words
+        assert sql(words[:1]) not in shapes
+
+
+def test_extra_terms_bind_as_one_array():
+    compiled = count_stmt(build_filters("lee anderson jo")).compile(
+        dialect=postgresql.dialect()
+    )
+    assert compiled.string.count("ILIKE ALL") == 1
+    assert compiled.params["term"] == "%anderson%"
+    assert compiled.params["terms"] == ["%lee%", "%jo%"]
+    # Prefix terms match at the start of a column
+    prefixes = count_stmt(build_filters("jo sm")).compile(dialect=postgresql.dialect())
+    assert prefixes.params["terms"] == [f"%{SEPARATOR}sm%"]
+
+
+@pytest.mark.asyncio
+async def test_array_terms_keep_and_semantics(
+    client: AsyncClient, db_session: AsyncSession
+):
+    await seed_candidates(db_session, 5)
+    resp = await client.get(
+        "/external/candidates", params={"search": "First2 California example"}
+    )
+    body = resp.json()
+    assert body["total"] == 1
+    assert body["data"][0]["first_name"] == "First2"
+
+
+@pytest.mark.asyncio
+async def test_query_cache_stats(client: AsyncClient, db_session: AsyncSession):
+    query_cache.install(engine.sync_engine)
+    await seed_candidates(db_session, 3)
+    for search in ["first", "last", "first1", "user example", "a b c"]:
+        await client.get("/external/candidates", params={"search": search})
+    query_cache.stats.reset()
+    for search in ["irst", "ast", "555", "york first", "x y z"]:
+        await client.get("/external/candidates", params={"search": search})
+
+    body = (await client.get("/external/stats/query-cache")).json()
+    assert body["compiled"]["misses"] == 0
+    assert body["compiled"]["hit_rate"] == 1.0
+    assert body["prepared"]["hit_rate"] == 1.0
+    # count + page for: one term, one term + array, one prefix + array
+    assert body["distinct_statements"] == 6
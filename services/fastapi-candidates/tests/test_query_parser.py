@@ -0,0 +1,183 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Candidate
+from app.queries import count_stmt
+from app.query_parser import FIELDS, Term, estimated_selectivity, parse_query
+from app.search import SEARCH_COLUMNS, build_filters
+
+# ── Parsing ─────────────────────────────────────────────────────────
+
+
+def test_fields_match_search_columns():
+    assert set(FIELDS) == {col.key for col in SEARCH_COLUMNS}
+
+
+def test_scopes_phrases_and_negation():
+    terms = parse_query('State:"New York" -email:@ex.com first:Ann "van der"')
+    assert set(terms) == {
+        Term("new york", "state"),
+        Term("@ex.com", "email", negated=True),
+        Term("ann", "first_name"),
+        Term("van der"),
+    }
+
+
+def test_unknown_prefix_and_empty_values_are_plain():
+    assert parse_query('10:30 http://x.io "" -') == [
+        Term("10:30"),
+        Term("http://x.io"),
+        Term("-"),
+    ]
+
+
+def test_redundant_terms_are_dropped():
+    assert parse_query("ann anna ANN") == [Term("anna")]
+    # A plain term is implied by a scoped one containing it, not vice versa
+    assert parse_query("ann last:annable") == [Term("annable", "last_name")]
+    assert set(parse_query("last:ann annable")) == {
+        Term("ann", "last_name"),
+        Term("annable"),
+    }
+    # Excluding "smi" already excludes everything containing "smith"
+    assert parse_query("-smith -smi") == [Term("smi", negated=True)]
+    assert set(parse_query("-state:smith -smi")) == {Term("smi", negated=True)}
+
+
+def test_terms_in_canonical_order():
+    terms = parse_query("-bob jo state:ohio anderson smith")
+    assert terms == [
+        Term("anderson"),
+        Term("smith"),
+        Term("jo"),
+        Term("ohio", "state"),
+        Term("bob", negated=True),
+    ]
+
+
+def test_same_kinds_of_terms_share_one_statement():
+    def sql(search: str) -> str:
+        stmt = count_stmt(build_filters(search))
+        return stmt.compile(dialect=postgresql.dialect()).string
+
+    assert sql("ann state:ohio -bob") == sql("-x state:texas anderson")
+    assert sql("anderson smith jo") == sql("jo smithson ann")
+
+
+def test_estimated_selectivity():
+    assert estimated_selectivity(Term("anderson")) < estimated_selectivity(Term("ann"))
+    assert estimated_selectivity(Term("ann", "state")) < estimated_selectivity(
+        Term("ann")
+    )
+
+
+# ── SQL ─────────────────────────────────────────────────────────────
+
+
+def test_scoped_term_compiles_to_one_column():
+    sql = (
+        count_stmt(build_filters("state:texas"))
+        .compile(dialect=postgresql.dialect())
+        .string
+    )
+    assert "candidates.state ILIKE" in sql
+    assert "first_name" not in sql
+
+
+async def _seed(db: AsyncSession) -> None:
+    rows = [
+        ("Ann", "Texas", "ann@acme.com"),
+        ("Bob", "Texas", "bob@texas-mail.com"),
+        ("Cat", "New York", "cat@acme.com"),
+        ("Dan", None, "dan@acme.com"),
+    ]
+    db.add_all(
+        Candidate(id=i, first_name=name, state=state, email=email)
+        for i, (name, state, email) in enumerate(rows, start=1)
+    )
+    await db.commit()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("search", "ids"),
+    [
+        ("texas", [1, 2]),
+        ("state:texas", [1, 2]),
+        ("email:texas", [2]),
+        ('"new york"', [3]),
+        ("acme -state:texas", [3, 4]),
+        ("-texas", [3, 4]),
+        ("email:@acme.com -ann", [3, 4]),
+    ],
+)
+async def test_search_language(
+    client: AsyncClient, db_session: AsyncSession, search: str, ids: list[int]
+):
+    await _seed(db_session)
+    resp = await client.get(
+        "/external/candidates", params={"search": search, "sort": "id"}
+    )
+    assert [c["id"] for c in resp.json()["data"]] == ids
+
+
+# ── Short terms ─────────────────────────────────────────────────────
+
+
+def test_short_terms_become_prefixes_only_without_a_long_term():
+    assert set(parse_query("jo -x")) == {
+        Term("jo", prefix=True),
+        Term("x", negated=True),
+    }
+    assert parse_query("jo anderson") == [Term("anderson"), Term("jo")]
+    # Prefix redundancy is by prefix, not substring
+    assert parse_query("j jo") == [Term("jo", prefix=True)]
+    assert set(parse_query("o jo")) == {Term("o", prefix=True), Term("jo", prefix=True)}
+
+
+def test_prefix_and_recheck_compile():
+    dialect = postgresql.dialect()
+    prefix = count_stmt(build_filters("jo")).compile(dialect=dialect).string
+    assert "lower(candidates.first_name) ~>=~" in prefix
+    assert "ILIKE" not in prefix
+    recheck = count_stmt(build_filters("jo anderson")).compile(dialect=dialect)
+    assert "ILIKE ALL" in recheck.string
+    assert recheck.params["terms"] == ["%jo%"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    ("search", "names"),
+    [
+        # Prefix of any column: Jones and Joan are last names
+        ("jo", ["Joan", "John", "Olga"]),
+        ("JO n", ["John"]),  # "n" via state Nevada
+        ("first:jo", ["John"]),
+        # Next to a long term, a short term is still a substring
+        ("jo smith", ["Bjorn", "John"]),
+        ("o", ["Bjorn", "Olga"]),  # state Ohio
+    ],
+)
+async def test_short_term_semantics(
+    client: AsyncClient, db_session: AsyncSession, search: str, names: list[str]
+):
+    people = [
+        ("John", "Smith", "Nevada"),
+        ("Bjorn", "Smith", "Ohio"),
+        ("Olga", "Jones", "Utah"),
+        ("Ann", "Joan", "Texas"),
+    ]
+    db_session.add_all(
+        Candidate(id=i, first_name=f, last_name=ln, state=st, email=f"{f}@x.com")
+        for i, (f, ln, st) in enumerate(people, start=1)
+    )
+    await db_session.commit()
+    resp = await client.get(
+        "/external/candidates", params={"search": search, "sort": "first_name"}
+    )
+    found = {c["first_name"] for c in resp.json()["data"]} | {
+        c["last_name"] for c in resp.json()["data"]
+    }
+    assert sorted(found & {"Joan", "John", "Bjorn", "Olga"}) == names
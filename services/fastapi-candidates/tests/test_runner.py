@@ -0,0 +1,45 @@
+import os
+
+from app import runner
+from app.config import Settings
+
+
+def test_workers_default_to_cpus_and_keep_pool_without_budget():
+    plan = runner.plan_workers(Settings(db_pool_size=5, db_max_overflow=10), cpus=4)
+    assert (plan.workers, plan.pool_size, plan.max_overflow) == (4, 5, 10)
+
+
+def test_budget_is_split_across_workers():
+    config = Settings(db_pool_size=5, db_max_connections=90, web_workers=4)
+    plan = runner.plan_workers(config)
+    # 90 // 4 = 22 per worker: 5 pooled + 17 overflow
+    assert (plan.workers, plan.pool_size, plan.max_overflow) == (4, 5, 17)
+    assert plan.max_connections <= 90
+
+
+def test_small_budget_shrinks_pool_and_workers():
+    plan = runner.plan_workers(Settings(db_max_connections=8), cpus=4)
+    assert (plan.workers, plan.pool_size, plan.max_overflow) == (4, 2, 0)
+
+    plan = runner.plan_workers(Settings(db_max_connections=3), cpus=16)
+    assert (plan.workers, plan.pool_size, plan.max_overflow) == (3, 1, 0)
+
+
+def test_available_cpus_is_positive():
+    assert runner.available_cpus() >= 1
+
+
+def test_main_passes_plan_to_uvicorn(monkeypatch):
+    calls = {}
+    monkeypatch.setattr(runner.uvicorn, "run", lambda app, **kw: calls.update(kw))
+    monkeypatch.setattr(runner.settings, "db_max_connections", 20)
+    monkeypatch.setattr(runner.settings, "web_workers", 0)
+    monkeypatch.setenv("DB_POOL_SIZE", "5")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "10")
+
+    runner.main(["--workers", "2", "--port", "9000"])
+
+    assert calls["workers"] == 2
+    assert calls["port"] == 9000
+    assert os.environ["DB_POOL_SIZE"] == "5"
+    assert os.environ["DB_MAX_OVERFLOW"] == "5"
@@ -0,0 +1,83 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Candidate
+from app.similarity import trigram_similarity
+
+
+async def seed_lookalikes(db: AsyncSession) -> None:
+    people = [
+        ("John", "Smith", "john.smith@acme.com"),
+        ("Jon", "Smith", "jon.smith@acme.com"),
+        ("Johnny", "Smyth", "jsmyth@other.org"),
+        ("Alice", "Walker", "alice@walker.net"),
+        ("Alicia", "Walker", "alice@walker.net"),
+    ]
+    db.add_all(
+        Candidate(
+            id=i,
+            first_name=first,
+            last_name=last,
+            email=email,
+            phone_number="555-0000",
+            state="Texas",
+        )
+        for i, (first, last, email) in enumerate(people, start=1)
+    )
+    await db.commit()
+
+
+def test_similarity_matches_pg_trgm():
+    # Reference value from the pg_trgm documentation
+    assert trigram_similarity("word", "two words") == pytest.approx(0.363636, 1e-4)
+    assert trigram_similarity("", "anything") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_similar_by_name(client: AsyncClient, db_session: AsyncSession):
+    await seed_lookalikes(db_session)
+    resp = await client.get("/external/candidates/1/similar")
+    assert resp.status_code == 200
+    data = resp.json()["data"]
+    assert data[0]["id"] == 2
+    assert data[0]["score"] > 0.5
+    assert 4 not in {c["id"] for c in data}
+    scores = [c["score"] for c in data]
+    assert scores == sorted(scores, reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_similar_not_found(client: AsyncClient):
+    resp = await client.get("/external/candidates/99/similar")
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_duplicate_report(client: AsyncClient, db_session: AsyncSession):
+    await seed_lookalikes(db_session)
+    resp = await client.get(
+        "/external/candidates/duplicates", params={"by": "email", "threshold": 0.9}
+    )
+    body = resp.json()
+    assert body["pairs"] == [{"id": 4, "duplicate_id": 5, "score": 1.0}]
+    assert body["next_after_id"] == 5
+
+
+@pytest.mark.asyncio
+async def test_duplicate_report_batches(client: AsyncClient, db_session: AsyncSession):
+    await seed_lookalikes(db_session)
+    pairs, after = [], 0
+    while after is not None:
+        body = (
+            await client.get(
+                "/external/candidates/duplicates",
+                params={"after_id": after, "batch": 2, "threshold": 0.5},
+            )
+        ).json()
+        pairs += [(p["id"], p["duplicate_id"]) for p in body["pairs"]]
+        after = body["next_after_id"]
+    assert (1, 2) in pairs
+    assert (4, 5) in pairs
+    assert all(a < b for a, b in pairs)
+    assert len(pairs) == len(set(pairs))
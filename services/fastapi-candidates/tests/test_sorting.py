@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Candidate
+from app.sorting import parse_sort
+
+
+async def seed_sortable(db: AsyncSession) -> None:
+    base = datetime(2025, 1, 1)
+    rows = [
+        ("Texas", 1),
+        ("Ohio", 3),
+        ("Texas", 5),
+        ("Ohio", 2),
+        ("Texas", 5),
+        ("Ohio", 4),
+    ]
+    db.add_all(
+        Candidate(
+            id=i,
+            first_name=f"First{i}",
+            last_name="Smith",
+            email=f"user{i}@example.com",
+            phone_number="555-0000",
+            state=state,
+            create_time=base + timedelta(days=day),
+        )
+        for i, (state, day) in enumerate(rows, start=1)
+    )
+    await db.commit()
+
+
+def test_parse_sort_single_key_uses_order():
+    assert parse_sort("first_name", descending=True) == [("first_name", True)]
+
+
+def test_parse_sort_allowlisted_combination():
+    assert parse_sort("state,-create_time") == [
+        ("state", False),
+        ("create_time", True),
+    ]
+    # Fully reversed direction is served by the same index
+    assert parse_sort("-state,create_time") == [
+        ("state", True),
+        ("create_time", False),
+    ]
+
+
+@pytest.mark.parametrize("sort", ["notes", "state,email", "state,state", "-"])
+def test_parse_sort_rejects(sort):
+    with pytest.raises(HTTPException) as exc:
+        parse_sort(sort)
+    assert exc.value.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_multi_key_sort(client: AsyncClient, db_session: AsyncSession):
+    await seed_sortable(db_session)
+    resp = await client.get(
+        "/external/candidates", params={"sort": "state,-create_time"}
+    )
+    assert [c["id"] for c in resp.json()["data"]] == [6, 2, 4, 5, 3, 1]
+
+
+@pytest.mark.asyncio
+async def test_id_tiebreaker_follows_direction(
+    client: AsyncClient, db_session: AsyncSession
+):
+    await seed_sortable(db_session)
+    resp = await client.get(
+        "/api/candidates", params={"sort": "create_time", "order": "desc"}
+    )
+    # Candidates 3 and 5 share create_time; id DESC breaks the tie
+    assert [c["id"] for c in resp.json()["data"]][:2] == [5, 3]
+
+
+@pytest.mark.asyncio
+async def test_unindexed_sort_rejected(client: AsyncClient):
+    resp = await client.get("/api/candidates", params={"sort": "notes"})
+    assert resp.status_code == 422
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import event
+
+from app import main
+from app.config import settings
+from app.database import warmup
+from app.memory_engine import MemoryEngine
+from app.queries import warmup_statements
+from tests.conftest import TestingSessionLocal, engine
+
+
+@pytest.mark.asyncio
+async def test_warmup_runs_hot_statements():
+    executed = []
+
+    def record(conn, cursor, statement, *args):
+        executed.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        primed = await warmup(TestingSessionLocal, 2, warmup_statements())
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+    assert primed == 2
+    assert len(executed) == 2 * len(warmup_statements())
+
+
+@pytest.mark.asyncio
+async def test_warmup_disabled():
+    assert await warmup(TestingSessionLocal, 0, warmup_statements()) == 0
+
+
+class _FakeEngine:
+    disposed = False
+
+    async def dispose(self):
+        self.disposed = True
+
+
+@pytest.mark.asyncio
+async def test_lifespan_records_startup_and_disposes(monkeypatch):
+    fake = _FakeEngine()
+    monkeypatch.setattr(main, "engine", fake)
+    monkeypatch.setattr(main, "async_session", TestingSessionLocal)
+    monkeypatch.setattr(settings, "db_warmup_connections", 1)
+
+    app = main.create_app()
+    async with app.router.lifespan_context(app):
+        startup = app.state.startup
+        assert startup["warmed_connections"] == 1
+        assert startup["boot_seconds"] >= 0
+        assert startup["import_seconds"] > 0
+    assert fake.disposed
+
+
+@pytest.mark.asyncio
+async def test_lifespan_survives_a_failed_memory_engine_start(monkeypatch):
+    mem = MemoryEngine()
+
+    async def broken_load(session):
+        raise RuntimeError("snapshot too large")
+
+    monkeypatch.setattr(mem, "load", broken_load)
+    monkeypatch.setattr(main, "memory_engine", mem)
+    monkeypatch.setattr(main, "engine", _FakeEngine())
+    monkeypatch.setattr(main, "async_session", TestingSessionLocal)
+    monkeypatch.setattr(settings, "search_engine", "memory")
+
+    app = main.create_app()
+    async with app.router.lifespan_context(app):
+        assert not mem.ready
+        assert mem._task is None